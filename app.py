@@ -1,18 +1,27 @@
 # app.py
 import json
 import logging
-import re
 
 from datetime import datetime
 
 import streamlit as st
-from langchain_core.chat_history import InMemoryChatMessageHistory
-from langchain_core.messages import HumanMessage
 
-from src.parsing import parse_trip_text
+# Only light modules at load time. LangChain / LangGraph / OpenAI (the agent) are
+# imported when a plan is generated, ReportLab when a PDF is downloaded
+# (python -m benchmarks.import_time checks this and the startup budget).
+from src.parsing import parse_trip_text, parse_city_explorer_box
 from src.planner import build_agent_request, build_city_explorer_request
-from src.agent.single_agent import create_agent_executor
-from src.export.pdf_export import build_itinerary_pdf
+from src.agent.streaming import CityBlockScanner
+from src.agent.plan_cache import trip_cache_key, explorer_cache_key, get_cached_plan, store_plan
+from src.report import format_city_section, format_multi_city_report, format_city_explorer_report
+from src.config import (
+    CASSETTE_MODE,
+    HTTP_PRECONNECT,
+    PARALLEL_CITY_PLANNING,
+    PLAN_CACHE_ENABLED,
+    PREENRICH_DEFAULT,
+    validate_config,
+)
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s | %(levelname)s | %(message)s")
 logger = logging.getLogger("travel_agent")
@@ -20,19 +29,66 @@ logger = logging.getLogger("travel_agent")
 st.set_page_config(page_title="Travel Planner", page_icon="🛫")
 st.title("🌍 Travel Planner")
 
+
+@st.cache_resource
+def _startup_checks() -> bool:
+    # Runs once per process; a missing key stops the page instead of failing an import.
+    validate_config()
+    return True
+
+
+try:
+    _startup_checks()
+except RuntimeError as e:
+    st.error(str(e))
+    st.stop()
+
+
+@st.cache_resource
+def _install_cassette():
+    # CASSETTE_MODE=record|replay: upstream HTTP + OpenAI calls go through a cassette file.
+    from src.offline.cassette import use_cassette_from_config
+
+    return use_cassette_from_config()
+
+
+if CASSETTE_MODE != "off":
+    _install_cassette()
+
+
+@st.cache_resource
+def _preconnect_upstreams() -> bool:
+    # Runs once per process: warm pooled connections to Places / Air Quality / Open-Meteo.
+    from src.tools.http_client import preconnect
+
+    preconnect()
+    return True
+
+
+if HTTP_PRECONNECT:
+    _preconnect_upstreams()
+
+
+@st.cache_resource
+def _shared_agent():
+    # One executor (LLM client, tools, compiled graph) per process, shared by all sessions.
+    # Built on the first generation, not at startup.
+    from src.agent.single_agent import get_agent_executor
+
+    return get_agent_executor()
+
 # -----------------------------
 # Session State
 # -----------------------------
-st.session_state.setdefault("history", InMemoryChatMessageHistory())
-st.session_state.setdefault("agent", create_agent_executor())
-
 st.session_state.setdefault("last_plan_json", None)
 st.session_state.setdefault("last_plan_text", "")
-st.session_state.setdefault("last_pdf_bytes", b"")
+st.session_state.setdefault("last_pdf", None)  # (title, client_name, report text)
 st.session_state.setdefault("client_name", "")
 
 st.session_state.setdefault("last_generated_local", "")
 st.session_state.setdefault("last_generated_iso", "")
+st.session_state.setdefault("last_trace", None)
+st.session_state.setdefault("history", [])  # follow-up requests: {"role", "content"}
 
 # -----------------------------
 # Helpers
@@ -42,166 +98,82 @@ def _now_local_and_iso():
     return now.strftime("%Y-%m-%d %H:%M"), now.isoformat(timespec="seconds")
 
 
-def _extract_final_text_from_langgraph_result(result) -> str:
-    msgs = (result or {}).get("messages") or []
-    if not msgs:
-        return ""
-    last = msgs[-1]
-    return getattr(last, "content", "") or ""
-
-
-def _invoke_agent(user_text: str) -> str:
-    result = st.session_state.agent.invoke({"messages": [HumanMessage(content=user_text)]})
-    raw_output = _extract_final_text_from_langgraph_result(result)
+def _invoke_agent(user_text: str, progressive: bool = False) -> str:
+    """
+    Stream the agent run: tool calls show up in a status box and, with progressive=True,
+    each finished cities[i] block is rendered as soon as it has streamed in.
+    """
+    from langchain_core.messages import HumanMessage
+    from src.agent.compaction import compaction_stats
+    from src.agent.projection import projection_report
+
+    status = st.status("Planning...", expanded=False)
+    preview = st.empty()
+    sections = []
+    scanner = CityBlockScanner()
+    message_id = None
+    tool_calls = 0
+    raw_output = ""
+
+    for event in _shared_agent().stream({"messages": [HumanMessage(content=user_text)]}):
+        kind = event["type"]
+        if kind == "tool_start":
+            tool_calls += 1
+            status.update(label=f"Planning... ({tool_calls} tool calls)")
+            status.write(f"{event['name']}({', '.join(f'{k}={v}' for k, v in event['args'].items())})")
+        elif kind == "tool_end" and event["error"]:
+            status.write(f"{event['name']} failed")
+        elif kind == "token" and progressive:
+            if event["message_id"] != message_id:
+                # a new model turn: only the final one carries the plan JSON
+                message_id = event["message_id"]
+                scanner = CityBlockScanner()
+                sections = []
+            blocks = scanner.feed(event["text"])
+            if blocks:
+                sections.extend(format_city_section(c) for c in blocks)
+                preview.text("\n".join(sections))
+                status.update(label=f"Planning... ({len(sections)} cities ready)")
+        elif kind == "final":
+            raw_output = event["text"]
+
+    status.update(label="Plan ready", state="complete")
+    preview.empty()  # the full report is rendered below once the JSON is parsed
 
     # Print debug in terminal only (NOT in Streamlit UI)
     logger.info("=== Agent raw output start ===\n%s\n=== Agent raw output end ===", raw_output)
+    logger.info("Tool result projection (cumulative): %s", projection_report())
+    logger.info("Context compaction (cumulative): %s", compaction_stats())
     return raw_output
 
 
-def _build_pdf(title: str, content: str):
-    st.session_state.last_pdf_bytes = build_itinerary_pdf(
-        title=title,
-        client_name=st.session_state.client_name,
-        content=content,
-    )
+def _prefetch(stops):
+    from src.agent.enrichment import enrich_stops
 
+    with st.spinner("Fetching places, weather and air quality..."):
+        return enrich_stops(stops)
 
-def _safe_str(x, default="N/A"):
-    s = (x if x is not None else "").strip() if isinstance(x, str) else x
-    return s if s else default
 
+def _prompt_client_name(cache_key: str) -> str:
+    """Client name for the LLM prompt; plans that get cached are generated without it (_apply_plan re-adds it)."""
+    return "" if cache_key and PLAN_CACHE_ENABLED else st.session_state.client_name
 
-# -----------------------------
-# Formatting
-# -----------------------------
-def format_multi_city_report(plan: dict, generated_local: str, generated_iso: str) -> str:
-    out = []
-    out.append("Travel Planner — Itinerary")
-    out.append(f"Generated: {generated_local}")
-    out.append("TRAVEL ITINERARY REPORT")
-    out.append("=" * 72)
-
-    if st.session_state.client_name:
-        out.append(f"Prepared for: {st.session_state.client_name}")
-    out.append(f"Generated at: {generated_local}")
-    out.append(f"Scope: {_safe_str(plan.get('scope'))}")
-    out.append("")
-
-    out.append("EXECUTIVE SUMMARY")
-    out.append("-" * 72)
-    out.append(_safe_str(plan.get("executive_summary"), ""))
-    out.append("")
-
-    for c in (plan.get("cities") or []):
-        city = _safe_str(c.get("city"), "Unknown City")
-        date = _safe_str(c.get("date"), "Unknown Date")
-
-        out.append("=" * 72)
-        out.append(f"{city} — {date}")
-        out.append("=" * 72)
-
-        insights = c.get("insights") or {}
-        out.append("Conditions & Guidance")
-        out.append("-" * 72)
-        out.append(f"Weather: {_safe_str(insights.get('weather'))}")
-        out.append(f"Umbrella: {_safe_str(insights.get('umbrella'))}")
-        out.append(f"Air Quality: {_safe_str(insights.get('air_quality'))}")
-        out.append("")
-
-        out.append("Schedule")
-        out.append("-" * 72)
-        sched = c.get("schedule") or []
-        if not sched:
-            out.append("No scheduled activities provided.")
-        else:
-            for s in sched:
-                start = _safe_str(s.get("start"), "")
-                end = _safe_str(s.get("end"), "")
-                activity = _safe_str(s.get("activity"), "")
-                address = _safe_str(s.get("address"), "")
-                time_range = f"{start}–{end}".strip("–")
-                out.append(f"{time_range} | {activity}")
-                if address and address != "N/A":
-                    out.append(f" Address: {address}")
-        out.append("")
-
-        packing = c.get("packing") or []
-        if packing:
-            out.append("Packing Checklist")
-            out.append("-" * 72)
-            for item in packing:
-                out.append(f"- {str(item).strip()}")
-            out.append("")
-
-    return "\n".join(out)
-
-
-def format_city_explorer_report(plan: dict, generated_local: str, generated_iso: str) -> str:
-    # expected schema from build_city_explorer_request
-    city = _safe_str(plan.get("city"), "City")
-    date = _safe_str(plan.get("date"), "")
-    summary = _safe_str(plan.get("summary"), "")
-    weather = _safe_str(plan.get("weather"), "")
-    air = _safe_str(plan.get("air_quality"), "")
-
-    out = []
-    out.append("Travel Planner — City Explorer")
-    out.append(f"Generated: {generated_local}")
-    out.append("CITY VISIT PLAN")
-    out.append("=" * 72)
-
-    if st.session_state.client_name:
-        out.append(f"Prepared for: {st.session_state.client_name}")
-    out.append(f"Generated at: {generated_iso}")
-    out.append(f"Destination: {city}" + (f" — {date}" if date and date != "N/A" else ""))
-    out.append("")
-
-    out.append("SUMMARY")
-    out.append("-" * 72)
-    out.append(summary)
-    out.append("")
-
-    out.append("Conditions & Guidance")
-    out.append("-" * 72)
-    out.append(f"Weather: {weather}")
-    out.append(f"Air Quality: {air}")
-    out.append("")
-
-    out.append("Suggested Schedule")
-    out.append("-" * 72)
-    sched = plan.get("schedule") or []
-    if not sched:
-        out.append("No schedule was generated.")
-    else:
-        for s in sched:
-            start = _safe_str(s.get("start"), "")
-            end = _safe_str(s.get("end"), "")
-            activity = _safe_str(s.get("activity"), "")
-            address = _safe_str(s.get("address"), "")
-            time_range = f"{start}–{end}".strip("–")
-            out.append(f"{time_range} | {activity}")
-            if address and address != "N/A":
-                out.append(f" Address: {address}")
-    out.append("")
-
-    tips = plan.get("tips") or []
-    if tips:
-        out.append("Practical Tips")
-        out.append("-" * 72)
-        for t in tips:
-            out.append(f"- {str(t).strip()}")
-        out.append("")
-
-    packing = plan.get("packing") or []
-    if packing:
-        out.append("Packing Checklist")
-        out.append("-" * 72)
-        for item in packing:
-            out.append(f"- {str(item).strip()}")
-        out.append("")
-
-    return "\n".join(out)
+
+def _build_trip_request(stops, prefetch: bool, client_name: str) -> str:
+    prefetched = _prefetch(stops) if prefetch else None
+    return build_agent_request(stops, client_name=client_name, prefetched=prefetched)
+
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def _pdf_bytes(title: str, client_name: str, content: str) -> bytes:
+    from src.export.pdf_export import build_itinerary_pdf
+
+    return build_itinerary_pdf(title=title, client_name=client_name, content=content)
+
+
+def _build_pdf(title: str, content: str):
+    # Rendered only when the download button is clicked (see Main output).
+    st.session_state.last_pdf = (title, st.session_state.client_name, content)
 
 
 def render_report_block(text: str):
@@ -209,67 +181,94 @@ def render_report_block(text: str):
 
 
 # -----------------------------
-# City Explorer input parsing
+# Run generation
 # -----------------------------
-_CITY_HEADER_RE = re.compile(r"^\s*City\s*:\s*(.+?)\s+(\d{4}-\d{2}-\d{2})\s*$", re.IGNORECASE)
-_SIMPLE_HEADER_RE = re.compile(r"^\s*(.+?)\s+(\d{4}-\d{2}-\d{2})\s*$")
+def _traced(label: str, fn, *args, **kwargs):
+    """Run fn under a plan trace; the summary is logged and kept for the Run trace panel."""
+    from src.tracing import trace_run, upstream_stats
 
-def parse_city_explorer_box(raw: str):
-    """
-    One box behavior:
-    - First non-empty line must contain "City: Toronto 2026-02-01" OR "Toronto 2026-02-01"
-    - Optional following lines: activities like "CN Tower;09:00-11:00" or just "CN Tower"
-    Returns: (city, date, has_activities, normalized_trip_text_for_parse_trip_text)
-    """
-    lines = [ln.strip() for ln in (raw or "").splitlines() if ln.strip()]
-    if not lines:
-        raise ValueError("Please enter at least: City and Date (e.g., Toronto 2026-02-01).")
+    with trace_run(label) as trace:
+        result = fn(*args, **kwargs)
+    if trace is not None:
+        st.session_state.last_trace = trace.summary()
+        logger.info("Plan trace: %s", json.dumps(st.session_state.last_trace))
+    logger.info("Upstream stats (cumulative): %s", json.dumps(upstream_stats()))
+    return result
 
-    head = lines[0]
-    city = ""
-    date = ""
 
-    m = _CITY_HEADER_RE.match(head)
-    if m:
-        city, date = m.group(1).strip(), m.group(2).strip()
-    else:
-        m2 = _SIMPLE_HEADER_RE.match(head)
-        if not m2:
-            raise ValueError("First line must look like: Toronto 2026-02-01 (or: City: Toronto 2026-02-01).")
-        city, date = m2.group(1).strip(), m2.group(2).strip()
+def run_trip(stops, prefetch: bool, cache_key: str = "", cache_dates=()):
+    prompt_text = _build_trip_request(stops, prefetch, _prompt_client_name(cache_key))
+    run_generation(prompt_text, mode="Trip Planner", cache_key=cache_key, cache_dates=cache_dates, stops=stops)
 
-    activity_lines = lines[1:]
-    has_activities = len(activity_lines) > 0
 
-    # Build a mini "Trip Input" format that your existing parser understands:
-    # City1: <City> <Date>
-    normalized = [f"City1: {city} {date}"]
-    normalized.extend(activity_lines)
-    return city, date, has_activities, "\n".join(normalized)
+def run_generation(prompt_text: str, mode: str, cache_key: str = "", cache_dates=(), stops=None):
+    raw_output = _invoke_agent(prompt_text, progressive=(mode == "Trip Planner"))
+    _finish_generation(raw_output, mode, cache_key, cache_dates, stops)
 
 
-# -----------------------------
-# Run generation
-# -----------------------------
-def run_generation(prompt_text: str, mode: str):
+def run_parallel_trip(stops, prefetch: bool, cache_key: str = ""):
+    """Map-reduce mode: each city planned in its own concurrent agent run, then summarized."""
+    from src.agent.map_reduce import plan_trip_map_reduce
+
+    prefetched = _prefetch(stops) if prefetch else None
+    with st.spinner(f"Planning {len(stops)} cities in parallel..."):
+        plan = plan_trip_map_reduce(
+            _shared_agent(),
+            stops,
+            client_name=_prompt_client_name(cache_key),
+            prefetched=prefetched,
+        )
+    raw_output = json.dumps(plan, ensure_ascii=False)
+    logger.info("=== Map-reduce plan ===\n%s", raw_output)
+    if any(c.get("_error") for c in plan["cities"]):
+        cache_key = ""  # never cache a plan with a failed city
+    _finish_generation(raw_output, "Trip Planner", cache_key, [s.date for s in stops], stops)
+
+
+def _finish_generation(raw_output: str, mode: str, cache_key: str = "", cache_dates=(), stops=None):
+    from src.agent.validation import validate_plan_output, validation_stats
+
     local_str, iso_str = _now_local_and_iso()
     st.session_state.last_generated_local = local_str
     st.session_state.last_generated_iso = iso_str
 
-    with st.spinner("Planning..."):
-        raw_output = _invoke_agent(prompt_text)
-
-    try:
-        plan = json.loads(raw_output)
-    except Exception:
-        plan = None
+    # Repairs broken JSON locally and re-generates only invalid cities[i] blocks.
+    with st.spinner("Checking plan..."):
+        plan, report = validate_plan_output(
+            raw_output,
+            mode,
+            agent=_shared_agent(),
+            stops=stops,
+            client_name=_prompt_client_name(cache_key),
+        )
+    if report["repairs"] or report["errors"] or report["regenerated"]:
+        logger.info("Plan validation: %s | totals: %s", json.dumps(report), validation_stats())
 
     if not isinstance(plan, dict):
         st.session_state.last_plan_json = None
         st.session_state.last_plan_text = raw_output or "No response received from agent."
-        st.session_state.last_pdf_bytes = b""
+        st.session_state.last_pdf = None
         return
 
+    failed_city = any(c.get("_error") for c in plan.get("cities") or [])
+    if not failed_city and not (mode == "City Explorer" and report["errors"]):
+        store_plan(cache_key, plan, cache_dates)
+    _apply_plan(plan, mode, local_str, iso_str)
+
+
+def serve_cached_plan(cache_key: str, mode: str) -> bool:
+    """Render a cached plan for this input (client name/timestamp re-applied). Returns False on a miss."""
+    plan = get_cached_plan(cache_key)
+    if plan is None:
+        return False
+    local_str, iso_str = _now_local_and_iso()
+    st.session_state.last_generated_local = local_str
+    st.session_state.last_generated_iso = iso_str
+    _apply_plan(plan, mode, local_str, iso_str)
+    return True
+
+
+def _apply_plan(plan: dict, mode: str, local_str: str, iso_str: str):
     # Normalize generated_at/client_name
     plan["generated_at"] = iso_str
     plan["client_name"] = st.session_state.client_name or plan.get("client_name", "")
@@ -277,22 +276,44 @@ def run_generation(prompt_text: str, mode: str):
     st.session_state.last_plan_json = plan
 
     if mode == "City Explorer":
-        report = format_city_explorer_report(plan, local_str, iso_str)
+        report = format_city_explorer_report(plan, local_str, iso_str, client_name=st.session_state.client_name)
         st.session_state.last_plan_text = report
         _build_pdf("Travel Planner — City Explorer", report)
     else:
-        report = format_multi_city_report(plan, local_str, iso_str)
+        report = format_multi_city_report(plan, local_str, iso_str, client_name=st.session_state.client_name)
         st.session_state.last_plan_text = report
         _build_pdf("Travel Planner — Itinerary", report)
 
 
+def _record_reply(text: str):
+    st.session_state.history.append({"role": "assistant", "content": text})
+
+
 def run_update(change_request: str, mode: str):
     """
-    Interactive updates: user can request changes and we send the current JSON for editing.
+    Interactive updates. Changes that name specific cities/dates/activities re-plan only
+    those cities and are patched into the current plan; anything else sends the current
+    JSON for a full edit.
     """
     if not st.session_state.last_plan_json:
         st.warning("Generate a plan first.")
         return
+    st.session_state.history.append({"role": "user", "content": change_request})
+
+    if mode == "Trip Planner":
+        from src.agent.plan_update import plan_update_delta
+
+        with st.spinner("Updating affected cities..."):
+            delta = plan_update_delta(_shared_agent(), st.session_state.last_plan_json, change_request)
+        if delta is not None:
+            logger.info("Applied plan patch: %s", json.dumps(delta["patch"], ensure_ascii=False))
+            local_str, iso_str = _now_local_and_iso()
+            st.session_state.last_generated_local = local_str
+            st.session_state.last_generated_iso = iso_str
+            _apply_plan(delta["plan"], mode, local_str, iso_str)
+            changed = [op["value"]["city"] for op in delta["patch"]]
+            _record_reply(f"Updated {', '.join(changed)} only." if changed else "No changes were needed.")
+            return
 
     current_json = json.dumps(st.session_state.last_plan_json, ensure_ascii=False)
 
@@ -305,6 +326,7 @@ def run_update(change_request: str, mode: str):
     )
 
     run_generation(prompt, mode)
+    _record_reply("Updated the plan." if st.session_state.last_plan_json else "The update could not be applied.")
 
 
 # -----------------------------
@@ -330,6 +352,8 @@ with st.sidebar:
     start_time = "09:00"
     run_trip_btn = False
     run_city_btn = False
+    prefetch = PREENRICH_DEFAULT
+    parallel = PARALLEL_CITY_PLANNING
 
     if mode == "Trip Planner":
         st.subheader("Trip Input")
@@ -346,6 +370,16 @@ with st.sidebar:
                 "City3:\n"
             ),
         )
+        prefetch = st.checkbox(
+            "Pre-fetch places, weather & air quality",
+            value=PREENRICH_DEFAULT,
+            help="Resolve all tool data up front so the agent needs fewer round trips.",
+        )
+        parallel = st.checkbox(
+            "Plan cities in parallel",
+            value=PARALLEL_CITY_PLANNING,
+            help="Plan each city in its own agent run at the same time, then write the summary.",
+        )
         run_trip_btn = st.button("Generate Plan", use_container_width=True)
 
     else:
@@ -379,8 +413,12 @@ if mode == "Trip Planner" and run_trip_btn:
     if raw_trip.strip():
         try:
             stops = parse_trip_text(raw_trip)
-            prompt_text = build_agent_request(stops, client_name=st.session_state.client_name)
-            run_generation(prompt_text, mode="Trip Planner")
+            cache_key = trip_cache_key(stops)
+            if not serve_cached_plan(cache_key, mode="Trip Planner"):
+                if parallel and len(stops) > 1:
+                    _traced("trip_parallel", run_parallel_trip, stops, prefetch, cache_key=cache_key)
+                else:
+                    _traced("trip", run_trip, stops, prefetch, cache_key=cache_key, cache_dates=[s.date for s in stops])
         except Exception as e:
             st.error(f"Input parsing error: {e}")
     else:
@@ -393,17 +431,21 @@ if mode == "City Explorer" and run_city_btn:
 
             if has_activities:
                 stops = parse_trip_text(normalized_trip)
-                prompt_text = build_agent_request(stops, client_name=st.session_state.client_name)
-                run_generation(prompt_text, mode="Trip Planner")
+                cache_key = trip_cache_key(stops)
+                if not serve_cached_plan(cache_key, mode="Trip Planner"):
+                    _traced("trip", run_trip, stops, prefetch, cache_key=cache_key, cache_dates=[date])
             else:
-                prompt_text = build_city_explorer_request(
+                explorer_args = dict(
                     city=city,
                     date=date,
                     interests=interests.strip(),
                     start_time=start_time.strip() or "09:00",
                     pace=pace,
                 )
-                run_generation(prompt_text, mode="City Explorer")
+                cache_key = explorer_cache_key(**explorer_args)
+                if not serve_cached_plan(cache_key, mode="City Explorer"):
+                    prompt_text = build_city_explorer_request(**explorer_args)
+                    _traced("city_explorer", run_generation, prompt_text, mode="City Explorer", cache_key=cache_key, cache_dates=[date])
 
         except Exception as e:
             st.error(f"Input parsing error: {e}")
@@ -418,10 +460,11 @@ if st.session_state.last_plan_text:
     st.subheader("Itinerary Report")
     render_report_block(st.session_state.last_plan_text)
 
-    if st.session_state.last_pdf_bytes:
+    if st.session_state.last_pdf:
+        pdf_args = st.session_state.last_pdf
         st.download_button(
             label="📄 Download PDF",
-            data=st.session_state.last_pdf_bytes,
+            data=lambda: _pdf_bytes(*pdf_args),
             file_name="itinerary.pdf",
             mime="application/pdf",
             use_container_width=True,
@@ -437,7 +480,7 @@ edit_text = st.text_input(
 )
 if st.button("Apply Changes", use_container_width=True):
     if edit_text.strip():
-        run_update(edit_text.strip(), mode=("City Explorer" if "City Explorer" in st.session_state.last_plan_text else "Trip Planner"))
+        _traced("update", run_update, edit_text.strip(), mode=("City Explorer" if "City Explorer" in st.session_state.last_plan_text else "Trip Planner"))
     else:
         st.warning("Type a change request first.")
 
@@ -450,10 +493,15 @@ else:
 # -----------------------------
 st.divider()
 with st.expander("Conversation history", expanded=False):
-    if st.session_state.history.messages:
-        for msg in st.session_state.history.messages[-6:]:
-            role = "assistant" if msg.type == "ai" else "user"
-            with st.chat_message(role):
-                st.write(msg.content)
+    if st.session_state.history:
+        for msg in st.session_state.history[-6:]:
+            with st.chat_message(msg["role"]):
+                st.write(msg["content"])
     else:
         st.caption("No follow-ups yet.")
+
+with st.expander("Run trace", expanded=False):
+    if st.session_state.last_trace:
+        st.json(st.session_state.last_trace)
+    else:
+        st.caption("No traced runs yet.")
@@ -0,0 +1,305 @@
+# benchmarks/bench.py
+"""
+Micro-benchmarks for the pure (no network, no LLM) hot paths: input parsing,
+weather / air-quality summaries, risk scoring, report formatting and PDF export,
+each on small, medium and large inputs (1 / 10 / 100 cities and the like).
+
+    python -m benchmarks.bench                      # run and print timings
+    python -m benchmarks.bench --save               # store them as the baselines
+    python -m benchmarks.bench --compare            # exit 1 on regressions > threshold
+    python -m benchmarks.bench --compare --threshold 0.10 --only pdf
+
+Inputs are generated deterministically, so runs are comparable. Baselines are
+machine-specific: re-save them when the benchmark machine changes.
+For end-to-end agent timings, run against src/offline (stand-ins + cassettes).
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import random
+import statistics
+import sys
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
+
+from src.parsing import parse_trip_text, parse_city_explorer_box
+from src.report import format_multi_city_report
+from src.risk.risk_score import compute_risk_score
+from src.tools.google_air_quality import mask_needed_and_count
+from src.tools.google_weather import _index_by_date, summarize_weather_for_date
+
+BASELINES_PATH = Path(__file__).resolve().parent / "baselines.json"
+DEFAULT_THRESHOLD = 0.25
+START = date(2026, 3, 1)
+SIZES = (1, 10, 100)
+
+
+# -----------------------------
+# Deterministic inputs
+# -----------------------------
+def trip_text(cities: int) -> str:
+    lines = []
+    for i in range(cities):
+        lines.append(f"City{i + 1}: City {i + 1} {(START + timedelta(days=i)).isoformat()}")
+        lines.append(f"Museum {i};9am-11am")
+        lines.append(f"Old Town Walk {i};11:30am-1:00pm")
+        lines.append(f"Harbour Cruise {i};14:00-16:00")
+        lines.append(f"Night Market {i}")
+    return "\n".join(lines)
+
+
+def explorer_box(activities: int) -> str:
+    lines = [f"City: Toronto {START.isoformat()}"]
+    lines.extend(f"Stop {i};{9 + i % 10:02d}:00-{10 + i % 10:02d}:00" for i in range(activities))
+    return "\n".join(lines)
+
+
+def open_meteo_payload(days: int, seed: int = 0) -> Dict[str, Any]:
+    """Open-Meteo hourly response (as returned by get_hourly_weather) covering `days` days."""
+    rng = random.Random(seed)
+    times, temps, feels, probs, winds = [], [], [], [], []
+    for d in range(days):
+        day = (START + timedelta(days=d)).isoformat()
+        for h in range(24):
+            times.append(f"{day}T{h:02d}:00")
+            t = round(rng.uniform(-5, 30), 1)
+            temps.append(t)
+            feels.append(round(t - rng.uniform(0, 4), 1))
+            probs.append(rng.choice((None, rng.randint(0, 100))) if h == 23 else rng.randint(0, 100))
+            winds.append(round(rng.uniform(0, 60), 1))
+    hourly = {
+        "time": times,
+        "temperature_2m": temps,
+        "apparent_temperature": feels,
+        "precipitation_probability": probs,
+        "wind_speed_10m": winds,
+    }
+    return {"timezone": "America/Toronto", "hourly": hourly, "_date_index": _index_by_date(times)}
+
+
+def air_quality_forecast_payload(hours: int, seed: int = 0) -> Dict[str, Any]:
+    """Air Quality forecast:lookup response with `hours` hourlyForecasts entries."""
+    rng = random.Random(seed)
+    start = datetime(START.year, START.month, START.day)
+    out = []
+    for h in range(hours):
+        when = (start + timedelta(hours=h)).strftime("%Y-%m-%dT%H:%M:%SZ")
+        out.append({
+            "dateTime": when,
+            "indexes": [
+                {"code": "can_ec", "displayName": "AQHI (Canada)", "aqi": rng.randint(1, 10)},
+                {"code": "uaqi", "displayName": "Universal AQI", "aqi": rng.randint(10, 130), "category": "Moderate air quality"},
+            ],
+        })
+    return {"hourlyForecasts": out, "regionCode": "ca", "_mode": "forecast"}
+
+
+def air_quality_current_payload() -> Dict[str, Any]:
+    return {
+        "dateTime": f"{START.isoformat()}T12:00:00Z",
+        "indexes": [{"code": "uaqi", "aqi": 64, "category": "Moderate air quality"}],
+        "_mode": "current",
+    }
+
+
+def plan_payload(cities: int) -> Dict[str, Any]:
+    """Validated multi-city plan (build_agent_request schema)."""
+    out = []
+    for i in range(cities):
+        out.append({
+            "city": f"City {i + 1}",
+            "date": (START + timedelta(days=i)).isoformat(),
+            "insights": {
+                "weather": "14.2°C avg (9.8°C to 17.5°C); max precip 40%, max wind 22 km/h",
+                "umbrella": "Yes",
+                "air_quality": "UAQI 64 (Moderate air quality); no mask needed",
+            },
+            "schedule": [
+                {
+                    "start": f"{9 + 2 * j:02d}:00",
+                    "end": f"{10 + 2 * j:02d}:30",
+                    "activity": f"Activity {j + 1} in City {i + 1}",
+                    "address": f"{100 + j} Main Street, City {i + 1}, Country",
+                }
+                for j in range(4)
+            ],
+            "packing": ["Passport", "Umbrella", "Light jacket", "Walking shoes", "Phone charger", "Water bottle"],
+            "risk": {"weather_risk": 4, "air_quality_risk": 5, "overall_risk": 5},
+        })
+    return {
+        "scope": f"{cities}-city trip",
+        "executive_summary": "A balanced itinerary with indoor fallbacks on wet afternoons. " * 3,
+        "cities": out,
+    }
+
+
+# -----------------------------
+# Cases
+# -----------------------------
+def _build_pdf(report: str) -> Callable[[], Any]:
+    from src.export.pdf_export import build_itinerary_pdf  # ReportLab import only when benchmarked
+
+    return lambda: build_itinerary_pdf("Travel Itinerary", "Benchmark Client", report)
+
+
+def build_cases() -> List[Tuple[str, Callable[[], Any]]]:
+    """(name, zero-arg callable) per benchmark; inputs are built here, outside the timing."""
+    cases: List[Tuple[str, Callable[[], Any]]] = []
+    target = START.isoformat()
+    aq_current = air_quality_current_payload()
+    for n in SIZES:
+        text = trip_text(n)
+        box = explorer_box(n)
+        wx = open_meteo_payload(n)
+        aq = air_quality_forecast_payload(96 * n)
+        plan = plan_payload(n)
+        report = format_multi_city_report(plan, "Mar 1, 2026 09:00", "2026-03-01T09:00:00")
+        cases += [
+            (f"parse_trip_text[{n} cities]", lambda text=text: parse_trip_text(text)),
+            (f"parse_city_explorer_box[{n} activities]", lambda box=box: parse_city_explorer_box(box)),
+            (f"summarize_weather_for_date[{n} days]", lambda wx=wx: summarize_weather_for_date(wx, target)),
+            (f"mask_needed_and_count[{96 * n} hours]", lambda aq=aq: mask_needed_and_count(aq)),
+            (f"compute_risk_score[{n} days]", lambda wx=wx: compute_risk_score(wx, aq_current, target)),
+            (
+                f"format_multi_city_report[{n} cities]",
+                lambda plan=plan: format_multi_city_report(plan, "Mar 1, 2026 09:00", "2026-03-01T09:00:00"),
+            ),
+            (f"build_itinerary_pdf[{n} cities]", _build_pdf(report)),
+        ]
+    return cases
+
+
+# -----------------------------
+# Timing
+# -----------------------------
+def measure(fn: Callable[[], Any], repeat: int, min_time: float) -> Dict[str, float]:
+    """
+    Per-call time in microseconds: loops are calibrated so one sample takes at
+    least min_time, then `repeat` samples are taken (median is the headline number).
+    """
+    fn()  # warm-up (imports, caches, font metrics)
+    loops = 1
+    while True:
+        t0 = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        elapsed = time.perf_counter() - t0
+        if elapsed >= min_time:
+            break
+        loops *= 10 if elapsed < min_time / 10 else 2
+
+    samples = [elapsed / loops]
+    for _ in range(repeat - 1):
+        t0 = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        samples.append((time.perf_counter() - t0) / loops)
+    return {
+        "median_us": round(statistics.median(samples) * 1e6, 3),
+        "min_us": round(min(samples) * 1e6, 3),
+        "loops": loops,
+    }
+
+
+def run(only: str = "", repeat: int = 5, min_time: float = 0.05) -> Dict[str, Dict[str, float]]:
+    results: Dict[str, Dict[str, float]] = {}
+    for name, fn in build_cases():
+        if only and only not in name:
+            continue
+        results[name] = measure(fn, repeat, min_time)
+        print(f"{name:<48} {_fmt(results[name]['median_us']):>12}  (min {_fmt(results[name]['min_us'])})", flush=True)
+    return results
+
+
+def _fmt(us: float) -> str:
+    if us >= 1e6:
+        return f"{us / 1e6:.2f} s"
+    if us >= 1e3:
+        return f"{us / 1e3:.2f} ms"
+    return f"{us:.2f} us"
+
+
+# -----------------------------
+# Baselines
+# -----------------------------
+def load_baselines(path: Path = BASELINES_PATH) -> Dict[str, Any]:
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def save_baselines(results: Dict[str, Dict[str, float]], path: Path = BASELINES_PATH) -> None:
+    """Merge results into the stored baselines (cases not run this time are kept)."""
+    data = load_baselines(path)
+    data["machine"] = {"python": platform.python_version(), "platform": platform.platform(), "processor": platform.machine()}
+    data["saved_at"] = datetime.now().isoformat(timespec="seconds")
+    data.setdefault("results", {}).update(results)
+    data["results"] = dict(sorted(data["results"].items()))
+    path.write_text(json.dumps(data, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+
+
+def compare(results: Dict[str, Dict[str, float]], baselines: Dict[str, Any], threshold: float) -> List[str]:
+    """
+    Median vs. baseline median per case. Returns the regressions (slower by more
+    than `threshold`, e.g. 0.25 = 25%) and prints every case's change.
+    """
+    base = baselines.get("results") or {}
+    regressions = []
+    print()
+    print(f"{'case':<48} {'baseline':>12} {'now':>12} {'change':>8}")
+    for name, r in results.items():
+        b = base.get(name)
+        if not b:
+            print(f"{name:<48} {'-':>12} {_fmt(r['median_us']):>12}     new")
+            continue
+        change = r["median_us"] / b["median_us"] - 1 if b["median_us"] else 0.0
+        flag = ""
+        if change > threshold:
+            flag = "  REGRESSION"
+            regressions.append(f"{name}: {_fmt(b['median_us'])} -> {_fmt(r['median_us'])} ({change:+.0%})")
+        elif change < -threshold:
+            flag = "  faster"
+        print(f"{name:<48} {_fmt(b['median_us']):>12} {_fmt(r['median_us']):>12} {change:>+8.0%}{flag}")
+    return regressions
+
+
+def main(argv: List[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description="Benchmark parsing, scoring, reporting and PDF export.")
+    ap.add_argument("--only", default="", help="run only cases whose name contains this text")
+    ap.add_argument("--repeat", type=int, default=5, help="samples per case (median is reported)")
+    ap.add_argument("--min-time", type=float, default=0.05, help="minimum seconds per sample")
+    ap.add_argument("--save", action="store_true", help=f"store results as baselines ({BASELINES_PATH.name})")
+    ap.add_argument("--compare", action="store_true", help="compare with the stored baselines")
+    ap.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                    help="relative slowdown that counts as a regression (default 0.25 = 25%%)")
+    ap.add_argument("--baselines", type=Path, default=BASELINES_PATH, help="baselines file")
+    args = ap.parse_args(argv)
+
+    results = run(only=args.only, repeat=max(1, args.repeat), min_time=args.min_time)
+
+    status = 0
+    if args.compare:
+        baselines = load_baselines(args.baselines)
+        if not baselines:
+            print(f"\nNo baselines at {args.baselines}; run with --save first.")
+            return 2
+        regressions = compare(results, baselines, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) beyond {args.threshold:.0%}:")
+            for line in regressions:
+                print(f"  {line}")
+            status = 1
+        else:
+            print(f"\nNo regressions beyond {args.threshold:.0%}.")
+    if args.save:
+        save_baselines(results, args.baselines)
+        print(f"\nBaselines saved to {args.baselines}")
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
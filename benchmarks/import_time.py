@@ -0,0 +1,124 @@
+# benchmarks/import_time.py
+"""
+Import-time profile of the app entry point (and the modules it loads lazily),
+measured with `python -X importtime` in fresh interpreters.
+
+    python -m benchmarks.import_time                    # report + check the startup budget
+    python -m benchmarks.import_time --budget-ms 600 --top 15
+
+Fails (exit 1) when importing app.py takes longer than the budget (median of
+--runs) or pulls in a module that should only load on first use
+(LangChain / LangGraph / OpenAI when generating, ReportLab when exporting a PDF).
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+ROOT = Path(__file__).resolve().parents[1]
+
+STARTUP_MODULE = "app"
+DEFAULT_BUDGET_MS = 1000.0
+# Loaded on demand only; app.py must not import these at startup.
+LAZY_MODULES = ("langchain", "langchain_core", "langchain_openai", "langgraph", "openai", "reportlab")
+# Also profiled (informational): what the first generation / PDF export pays.
+ON_DEMAND_MODULES = ("src.agent.single_agent", "src.export.pdf_export")
+
+
+def _env() -> Dict[str, str]:
+    env = dict(os.environ)
+    # Importing app.py runs the page in Streamlit's bare mode: no network, no real keys needed.
+    env.setdefault("OPENAI_API_KEY", "import-profile")
+    env.setdefault("GOOGLE_MAPS_API_KEY", "import-profile")
+    env.update({"HTTP_PRECONNECT": "0", "CASSETTE_MODE": "off", "PYTHONPATH": str(ROOT)})
+    return env
+
+
+def profile(module: str) -> List[Tuple[int, int, str]]:
+    """(cumulative_us, depth, name) per imported module, in -X importtime order."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT,
+        env=_env(),
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{proc.stderr[-2000:]}")
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        _self, cumulative, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        rows.append((int(cumulative), depth, name.strip()))
+    return rows
+
+
+def total_ms(rows: List[Tuple[int, int, str]], module: str) -> float:
+    return next((us for us, depth, name in rows if depth == 0 and name == module), 0) / 1000
+
+
+def heaviest(rows: List[Tuple[int, int, str]], module: str, top: int) -> List[Tuple[str, float]]:
+    """Direct imports of `module`, by cumulative time (-X importtime lists children before their parent)."""
+    children: List[Tuple[str, float]] = []
+    for us, depth, name in rows:
+        if depth == 1:
+            children.append((name, us / 1000))
+        elif depth == 0:
+            if name == module:
+                return sorted(children, key=lambda x: -x[1])[:top]
+            children = []
+    return []
+
+
+def lazy_violations(rows: List[Tuple[int, int, str]]) -> List[str]:
+    loaded = {name for _, _, name in rows}
+    return sorted(m for m in LAZY_MODULES if m in loaded)
+
+
+def measure(module: str, runs: int) -> Tuple[float, List[Tuple[int, int, str]]]:
+    """Median import time over `runs` fresh interpreters (after one warm-up run for .pyc files)."""
+    profile(module)
+    samples = []
+    rows: List[Tuple[int, int, str]] = []
+    for _ in range(runs):
+        rows = profile(module)
+        samples.append(total_ms(rows, module))
+    return statistics.median(samples), rows
+
+
+def main(argv: List[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description="Profile import time of the app and check the startup budget.")
+    ap.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS, help="max import time of app.py")
+    ap.add_argument("--runs", type=int, default=3, help="fresh interpreters per module (median)")
+    ap.add_argument("--top", type=int, default=10, help="heaviest direct imports to list")
+    args = ap.parse_args(argv)
+
+    status = 0
+    for module in (STARTUP_MODULE,) + ON_DEMAND_MODULES:
+        ms, rows = measure(module, max(1, args.runs))
+        line = f"{module:<28} {ms:8.1f} ms"
+        if module == STARTUP_MODULE:
+            over = ms > args.budget_ms
+            line += f"   budget {args.budget_ms:.0f} ms  {'OVER' if over else 'ok'}"
+            status |= int(over)
+        print(line)
+        for name, child_ms in heaviest(rows, module, args.top):
+            print(f"    {name:<40} {child_ms:8.1f} ms")
+        if module == STARTUP_MODULE:
+            eager = lazy_violations(rows)
+            if eager:
+                print(f"    imported at startup but should load on first use: {', '.join(eager)}")
+                status = 1
+        print()
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,223 @@
+# src/agent/compaction.py
+from __future__ import annotations
+
+import json
+import logging
+import threading
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from langchain_core.messages import AIMessage, BaseMessage, ToolMessage
+
+from .projection import compact_json
+
+logger = logging.getLogger("travel_agent")
+
+# weather / air_quality calls are matched to a city_latlng result within this distance (degrees)
+_COORD_MATCH_DEG = 0.1
+# A city is only compacted once it has a successful result for each of these
+# (alternatives in a tuple); until then the agent may still be working on it.
+_REQUIRED_RESULTS = (("city_latlng",), ("place_addresses", "place_address"), ("weather",), ("air_quality",))
+
+_lock = threading.Lock()
+_stats = {
+    "steps": 0,                # model calls that went through the hook
+    "steps_compacted": 0,      # ... of which had at least one settled city
+    "cities_compacted": 0,
+    "tool_messages_compacted": 0,
+    "chars_before": 0,         # tool message text the model would have re-read
+    "chars_after": 0,          # what it read instead
+}
+
+
+def _count(**deltas: int) -> None:
+    with _lock:
+        for k, v in deltas.items():
+            _stats[k] += v
+
+
+def _key(city: Any) -> str:
+    return " ".join(str(city or "").split()).lower()
+
+
+def _parse(content: Any) -> Any:
+    if not isinstance(content, str):
+        return None
+    try:
+        return json.loads(content)
+    except ValueError:
+        return None
+
+
+def _is_error(result: Any) -> bool:
+    return not isinstance(result, dict) or "error" in result
+
+
+class _City:
+    def __init__(self, name: str):
+        self.name = name
+        self.coords: Optional[Tuple[float, float]] = None
+        self.last_step = -1
+        self.message_indexes: List[int] = []
+        self.results: List[Tuple[str, Dict[str, Any], Any]] = []  # (tool, args, parsed result)
+
+
+def _attribute(args: Dict[str, Any], cities: Dict[str, _City]) -> Optional[str]:
+    """
+    City key a tool call belongs to: its city argument, else the city at its lat/lng.
+    None when neither identifies one (e.g. coordinates from pre-enrichment); such
+    results are never compacted.
+    """
+    if args.get("city"):
+        return _key(args["city"])
+    lat, lng = args.get("lat"), args.get("lng")
+    if isinstance(lat, (int, float)) and isinstance(lng, (int, float)):
+        best, best_d = None, _COORD_MATCH_DEG
+        for key, c in cities.items():
+            if c.coords is None:
+                continue
+            d = max(abs(c.coords[0] - lat), abs(c.coords[1] - lng))
+            if d <= best_d:
+                best, best_d = key, d
+        return best
+    return None
+
+
+def _group_by_city(messages: Sequence[BaseMessage]) -> Tuple[Dict[str, _City], int]:
+    """Tool messages per city, in order, plus the index of the latest tool-calling step."""
+    cities: Dict[str, _City] = {}
+    calls: Dict[str, Tuple[str, Dict[str, Any], str]] = {}
+    step = -1
+
+    for i, msg in enumerate(messages):
+        if isinstance(msg, AIMessage) and msg.tool_calls:
+            step += 1
+            for call in msg.tool_calls:
+                args = call.get("args") or {}
+                city = _attribute(args, cities)
+                if city:
+                    calls[call["id"]] = (call["name"], args, city)
+                    c = cities.setdefault(city, _City(args.get("city") or city))
+                    c.last_step = step
+            continue
+
+        if isinstance(msg, ToolMessage) and msg.tool_call_id in calls:
+            name, args, city = calls[msg.tool_call_id]
+            c = cities[city]
+            result = _parse(msg.content)
+            c.message_indexes.append(i)
+            c.results.append((name, args, result))
+            if name == "city_latlng" and not _is_error(result):
+                lat, lng = result.get("lat"), result.get("lng")
+                if isinstance(lat, (int, float)) and isinstance(lng, (int, float)):
+                    c.coords = (lat, lng)
+    return cities, step
+
+
+def _settled(city: _City, latest_step: int) -> bool:
+    """All required results are in and the latest tool-calling step did not touch the city."""
+    if not city.message_indexes or city.last_step >= latest_step:
+        return False
+    done = {name for name, _, result in city.results if not _is_error(result)}
+    return all(any(name in done for name in alternatives) for alternatives in _REQUIRED_RESULTS)
+
+
+def _risk(result: Dict[str, Any], key: str) -> Any:
+    return (result.get("risk") or {}).get(key)
+
+
+def _city_digest(city: _City) -> str:
+    """
+    One line with what the final JSON still needs from a city's tool results
+    (coordinates, addresses, weather wording, umbrella, clothes, air quality, risk);
+    bookkeeping fields are dropped. The latest successful result of each tool wins;
+    tools that only failed keep their error.
+    """
+    addresses: Dict[str, str] = {}
+    weather: Dict[str, str] = {}
+    parts: Dict[str, str] = {}
+    errors: Dict[str, Any] = {}
+    for name, args, result in city.results:
+        if _is_error(result):
+            errors[name] = result.get("error") if isinstance(result, dict) else result
+            continue
+        errors.pop(name, None)
+        if name == "place_addresses":
+            for p in result.get("places") or []:
+                addresses[p.get("place_name") or ""] = p.get("formatted_address") or ""
+        elif name == "place_address":
+            addresses[result.get("place_name") or args.get("place_name") or ""] = result.get("formatted_address") or ""
+        elif name == "weather":
+            line = f"{result.get('weather_line')}; umbrella {result.get('umbrella')}; clothes: {result.get('clothes')}"
+            if result.get("source"):
+                line += f" ({result['source']})"
+            weather[str(args.get("target_date") or "")] = f"{line}; weather_risk {_risk(result, 'weather_risk')}"
+        elif name == "air_quality":
+            aq = f"UAQI {result['aqi']} ({result.get('category')})" if result.get("aqi") is not None else "no AQI"
+            mask = "mask recommended" if result.get("mask_needed") else "no mask needed"
+            parts["air"] = f"air quality: {aq}, {mask}; air_quality_risk {_risk(result, 'air_quality_risk')}"
+        elif name == "suggest_attractions":
+            parts["attractions"] = f"suggested attractions: {compact_json(result)}"
+
+    out = [f"{city.name} (settled)"]
+    if city.coords is not None:
+        out.append(f"lat/lng: {city.coords[0]}, {city.coords[1]}")
+    if addresses:
+        out.append("addresses: " + "; ".join(f"{k} = {v}" for k, v in addresses.items()))
+    out.extend(f"weather {d}: {w}" for d, w in weather.items())
+    out.extend(parts[k] for k in ("air", "attractions") if k in parts)
+    if errors:
+        out.append(f"errors: {compact_json(errors)}")
+    return " | ".join(out)
+
+
+def compact_messages(messages: Sequence[BaseMessage]) -> List[BaseMessage]:
+    """
+    Model input for the next step. Once a city is settled (latlng, addresses, weather
+    and air quality all returned, and the latest tool-calling step no longer touches
+    it), that city's tool messages are replaced:
+    the last one carries a one-line digest of all its results, the others a short
+    pointer. Tool call ids and message order are kept, so the conversation stays
+    valid for the API; the graph state itself is not changed.
+    """
+    cities, latest_step = _group_by_city(messages)
+    settled = [c for c in cities.values() if _settled(c, latest_step)]
+    _count(steps=1)
+    if not settled:
+        return list(messages)
+
+    out = list(messages)
+    before = after = 0
+    for c in settled:
+        *pointers, last = c.message_indexes
+        digest = _city_digest(c)
+        pointer = f"(in {c.name} digest)"
+        for i in c.message_indexes:
+            before += len(str(out[i].content))
+        for i in pointers:
+            out[i] = out[i].model_copy(update={"content": pointer})
+            after += len(pointer)
+        out[last] = out[last].model_copy(update={"content": digest})
+        after += len(digest)
+
+    _count(
+        steps_compacted=1,
+        cities_compacted=len(settled),
+        tool_messages_compacted=sum(len(c.message_indexes) for c in settled),
+        chars_before=before,
+        chars_after=after,
+    )
+    logger.debug("Compacted %d settled cities: %d -> %d chars of tool results", len(settled), before, after)
+    return out
+
+
+def compaction_hook(state: Dict[str, Any]) -> Dict[str, Any]:
+    """create_react_agent pre_model_hook: compacted messages go to the model only."""
+    return {"llm_input_messages": compact_messages(state["messages"])}
+
+
+def compaction_stats() -> Dict[str, Any]:
+    """Cumulative counters plus the share of settled-city tool text removed."""
+    with _lock:
+        out: Dict[str, Any] = dict(_stats)
+    out["saved_pct"] = round(100 * (1 - out["chars_after"] / out["chars_before"]), 1) if out["chars_before"] else 0.0
+    return out
@@ -0,0 +1,95 @@
+# src/agent/enrichment.py
+from __future__ import annotations
+
+import contextvars
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List
+
+from ..config import PREENRICH_WORKERS
+from ..models import CityStop
+from ..parsing import split_activity
+from ..tracing import tool_span
+from .projection import project
+from .single_agent import (
+    city_latlng_payload,
+    place_addresses_payload,
+    weather_payloads,
+    air_quality_payload,
+)
+
+logger = logging.getLogger("travel_agent")
+
+
+def _safe(tool: str, fn: Callable[..., Dict[str, Any]], *args: Any) -> Dict[str, Any]:
+    # A failed lookup must not sink the whole stage; the agent falls back to its tools.
+    try:
+        with tool_span(tool, args):
+            return project(tool, fn(*args))
+    except Exception as e:
+        logger.warning("Pre-enrichment %s%s failed: %s", fn.__name__, args, e)
+        return {"error": str(e)}
+
+
+def _safe_weather(lat: float, lng: float, dates: List[str]) -> Dict[str, Dict[str, Any]]:
+    try:
+        with tool_span("weather", [lat, lng, dates]):
+            return {d: project("weather", p) for d, p in weather_payloads(lat, lng, dates).items()}
+    except Exception as e:
+        logger.warning("Pre-enrichment weather(%s, %s, %s) failed: %s", lat, lng, dates, e)
+        return {d: {"error": str(e)} for d in dates}
+
+
+def _submit(pool: ThreadPoolExecutor, fn: Callable[..., Any], *args: Any):
+    # Pool threads keep the caller's contextvars (current trace).
+    return pool.submit(contextvars.copy_context().run, fn, *args)
+
+
+def enrich_stops(stops: List[CityStop], max_workers: int = PREENRICH_WORKERS) -> List[Dict[str, Any]]:
+    """
+    Deterministically fetch everything the agent would otherwise discover tool call by tool call:
+    city lat/lng, addresses for every named activity, weather for each date and air quality per city.
+
+    Results use the same compact projection the tools send to the model.
+    Returns one dict per stop (same order) with keys:
+      city, date, lat, lng, addresses, weather, air_quality
+    Missing/failed items carry an "error" key so the agent knows to call the tool itself.
+    """
+    if not stops:
+        return []
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="enrich") as pool:
+        # 1) lat/lng once per unique city
+        cities = list(dict.fromkeys(s.city for s in stops))
+        latlng_f = [_submit(pool, _safe, "city_latlng", city_latlng_payload, c) for c in cities]
+        latlng = dict(zip(cities, (f.result() for f in latlng_f)))
+
+        # 2) addresses, weather (one date-scoped fetch per city) and air quality all fan out together
+        addr_f, wx_f, aq_f = {}, {}, {}
+        for i, s in enumerate(stops):
+            names = [split_activity(a)[0] for a in s.activities]
+            if names:
+                addr_f[i] = _submit(pool, _safe, "place_addresses", place_addresses_payload, s.city, names)
+
+        for city in cities:
+            ll = latlng[city]
+            if ll.get("lat") is None or ll.get("lng") is None:
+                continue
+            dates = [s.date for s in stops if s.city == city]
+            wx_f[city] = _submit(pool, _safe_weather, ll["lat"], ll["lng"], dates)
+            aq_f[city] = _submit(pool, _safe, "air_quality", air_quality_payload, ll["lat"], ll["lng"])
+
+        out = []
+        for i, s in enumerate(stops):
+            ll = latlng[s.city]
+            missing = {"error": "not fetched (no lat/lng)"}
+            out.append({
+                "city": s.city,
+                "date": s.date,
+                "lat": ll.get("lat"),
+                "lng": ll.get("lng"),
+                "addresses": addr_f[i].result() if i in addr_f else {"places": []},
+                "weather": wx_f[s.city].result().get(s.date, missing) if s.city in wx_f else missing,
+                "air_quality": aq_f[s.city].result() if s.city in aq_f else missing,
+            })
+    return out
@@ -0,0 +1,138 @@
+# src/agent/map_reduce.py
+from __future__ import annotations
+
+import contextvars
+import json
+import logging
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from langchain_core.messages import HumanMessage, SystemMessage
+
+from ..config import PARALLEL_CITY_WORKERS
+from ..llm import get_chat_model
+from ..models import CityStop
+from ..parsing import split_activity
+from ..planner import build_agent_request
+from ..tracing import trace_callbacks
+from .projection import compact_json
+from .single_agent import final_text
+
+logger = logging.getLogger("travel_agent")
+
+SUMMARY_SYSTEM_MESSAGE = (
+    "You write the opening of a client-ready travel itinerary.\n"
+    "Given the per-city plan blocks, return ONLY valid JSON with exactly these keys:\n"
+    '{"executive_summary": "string (3-5 sentences)", "scope": "string (one line: cities and dates)"}\n'
+    "No markdown, no backticks, no extra text."
+)
+
+
+def _unavailable_block(stop: CityStop, reason: str) -> Dict[str, Any]:
+    return {
+        "city": stop.city,
+        "date": stop.date,
+        "schedule": [
+            {"start": start, "end": end, "activity": place, "address": ""}
+            for place, start, end in (split_activity(a) for a in stop.activities)
+        ],
+        "insights": {"weather": "Not available.", "umbrella": "No", "air_quality": "Not available."},
+        "risk": {"weather_risk": 0, "air_quality_risk": 0, "overall_risk": 0},
+        "packing": [],
+        "_error": reason,
+    }
+
+
+def city_block(raw: str) -> Dict[str, Any]:
+    """
+    cities[0] of a single-city agent reply (fences, trailing commas and truncation
+    repaired locally); raises ValueError if it is not usable.
+    """
+    from .validation import repair_json_text  # late import: validation imports this module
+
+    plan, _ = repair_json_text(raw)
+    if plan is None:
+        raise ValueError("reply is not JSON")
+    cities = plan.get("cities") if isinstance(plan, dict) else None
+    if not cities or not isinstance(cities[0], dict):
+        raise ValueError("reply has no cities[0] object")
+    return cities[0]
+
+
+def plan_city(agent, stop: CityStop, client_name: str = "", prefetched: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Map step: one agent run for a single CityStop, returning its cities[0] block.
+    A failed run (model/tool error or unusable reply) gives a placeholder block
+    marked "_error" instead of failing the whole trip.
+    """
+    prompt = build_agent_request([stop], client_name=client_name, prefetched=[prefetched] if prefetched else None)
+    try:
+        raw = final_text(agent.invoke({"messages": [HumanMessage(content=prompt)]}))
+        return city_block(raw)
+    except Exception as e:
+        logger.warning("City sub-run for %s %s failed: %s", stop.city, stop.date, e)
+        return _unavailable_block(stop, f"City plan could not be generated: {e}")
+
+
+def summarize_plan(cities: List[Dict[str, Any]]) -> Dict[str, str]:
+    """Reduce step: one lightweight, tool-free LLM call for executive_summary + scope."""
+    digest = [
+        {
+            "city": c.get("city"),
+            "date": c.get("date"),
+            "activities": [s.get("activity") for s in c.get("schedule") or []],
+            "insights": c.get("insights"),
+            "overall_risk": (c.get("risk") or {}).get("overall_risk"),
+        }
+        for c in cities
+    ]
+    fallback_scope = "; ".join(f"{c.get('city')} ({c.get('date')})" for c in cities)
+    try:
+        txt = get_chat_model().invoke([
+            SystemMessage(content=SUMMARY_SYSTEM_MESSAGE),
+            HumanMessage(content=compact_json(digest)),
+        ], config={"callbacks": trace_callbacks()}).content
+        m = re.search(r"\{[\s\S]*\}", txt)
+        out = json.loads(m.group(0)) if m else {}
+    except Exception as e:
+        logger.warning("Plan summary step failed: %s", e)
+        out = {}
+    return {
+        "executive_summary": str(out.get("executive_summary") or f"Multi-city itinerary covering {fallback_scope}."),
+        "scope": str(out.get("scope") or fallback_scope),
+    }
+
+
+def plan_trip_map_reduce(
+    agent,
+    stops: List[CityStop],
+    client_name: str = "",
+    prefetched: Optional[List[Dict[str, Any]]] = None,
+    max_workers: int = PARALLEL_CITY_WORKERS,
+) -> Dict[str, Any]:
+    """
+    Plan each CityStop in its own agent run (bounded pool), keep input order,
+    then write executive_summary/scope from the merged result.
+    Returns a plan dict in the SYSTEM_MESSAGE schema.
+    """
+    workers = max(1, min(max_workers, len(stops)))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="city-plan") as pool:
+        futures = [
+            # Each sub-run gets its own copy of the caller's context (run-scoped state, tracing).
+            pool.submit(
+                contextvars.copy_context().run,
+                plan_city, agent, stop, client_name, prefetched[i] if prefetched else None,
+            )
+            for i, stop in enumerate(stops)
+        ]
+        cities = [f.result() for f in futures]
+
+    summary = summarize_plan(cities)
+    return {
+        "executive_summary": summary["executive_summary"],
+        "generated_at": "",
+        "client_name": client_name,
+        "scope": summary["scope"],
+        "cities": cities,
+    }
@@ -0,0 +1,111 @@
+# src/agent/plan_cache.py
+from __future__ import annotations
+
+import copy
+import hashlib
+import logging
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+from ..cache import SqliteTTLCache, normalize_key_part, seconds_until_next_boundary
+from ..config import (
+    CACHE_DIR,
+    OPENAI_MODEL,
+    PLAN_CACHE_ENABLED,
+    PLAN_CACHE_MAX_ENTRIES,
+    PLAN_CACHE_MAX_TTL_HOURS,
+    UPSTREAM_CACHE_SUFFIX,
+    WEATHER_HORIZON_DAYS,
+    WEATHER_MODEL_UPDATE_HOURS,
+)
+from ..models import CityStop
+from ..parsing import split_activity
+from .projection import compact_json
+from .prompts import SYSTEM_MESSAGE_VERSION
+
+logger = logging.getLogger("travel_agent")
+
+_PLAN_CACHE = SqliteTTLCache(CACHE_DIR / f"plans{UPSTREAM_CACHE_SUFFIX}.sqlite3", table="plans", max_entries=PLAN_CACHE_MAX_ENTRIES)
+
+
+def _key(kind: str, payload: Any) -> str:
+    canonical = compact_json({
+        "kind": kind,
+        "input": payload,
+        "model": OPENAI_MODEL,
+        "prompt": SYSTEM_MESSAGE_VERSION,
+    })
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def _canonical_activity(activity: str) -> List[str]:
+    place, start, end = split_activity(activity)
+    return [normalize_key_part(place), start.replace(" ", "").lower(), end.replace(" ", "").lower()]
+
+
+def trip_cache_key(stops: List[CityStop]) -> str:
+    """Key for a parsed trip: cities, dates and activities only (client name is not part of it)."""
+    return _key("trip", [
+        [normalize_key_part(s.city), s.date, [_canonical_activity(a) for a in s.activities]]
+        for s in stops
+    ])
+
+
+def explorer_cache_key(city: str, date: str, interests: str, start_time: str, pace: str) -> str:
+    return _key("explorer", {
+        "city": normalize_key_part(city),
+        "date": date,
+        "interests": normalize_key_part(interests),
+        "start_time": start_time.strip(),
+        "pace": pace,
+    })
+
+
+def plan_ttl_seconds(dates: Iterable[str], today: Optional[date] = None) -> float:
+    """
+    Plans containing a forecast-window date expire with the next weather model update.
+    Plans built only from climate normals live until the earliest date enters the
+    forecast window (capped at PLAN_CACHE_MAX_TTL_HOURS).
+    """
+    today = today or date.today()
+    max_ttl = PLAN_CACHE_MAX_TTL_HOURS * 3600
+    days_out = []
+    for d in dates:
+        try:
+            days_out.append((date.fromisoformat(d) - today).days)
+        except (TypeError, ValueError):
+            continue
+    if not days_out or any(-1 <= n < WEATHER_HORIZON_DAYS for n in days_out):
+        return min(max_ttl, seconds_until_next_boundary(WEATHER_MODEL_UPDATE_HOURS * 3600))
+
+    future = [n for n in days_out if n >= WEATHER_HORIZON_DAYS]
+    if not future:
+        return max_ttl
+    now = datetime.now()
+    seconds_left_today = 86400 - (now.hour * 3600 + now.minute * 60 + now.second)
+    until_window = (min(future) - WEATHER_HORIZON_DAYS) * 86400 + seconds_left_today
+    return min(max_ttl, until_window)
+
+
+def get_cached_plan(key: Optional[str]) -> Optional[Dict[str, Any]]:
+    if not key or not PLAN_CACHE_ENABLED:
+        return None
+    found, plan = _PLAN_CACHE.get(key)
+    if found:
+        logger.info("Plan cache hit: %s", key[:12])
+        return plan
+    return None
+
+
+def store_plan(key: Optional[str], plan: Dict[str, Any], dates: Iterable[str]) -> None:
+    if not key or not PLAN_CACHE_ENABLED:
+        return
+    ttl = plan_ttl_seconds(dates)
+    if ttl > 0:
+        stored = copy.deepcopy(plan)
+        stored["client_name"] = ""  # per-user; re-applied when the plan is served
+        _PLAN_CACHE.set(key, stored, ttl)
+
+
+def plan_cache_stats() -> Dict[str, Any]:
+    return _PLAN_CACHE.stats()
@@ -0,0 +1,172 @@
+# src/agent/plan_update.py
+from __future__ import annotations
+
+import contextvars
+import copy
+import logging
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from langchain_core.messages import HumanMessage, SystemMessage
+
+from ..cache import normalize_key_part
+from ..config import PARALLEL_CITY_WORKERS
+from .map_reduce import city_block, summarize_plan
+from .projection import compact_json
+from .prompts import CITY_UPDATE_SYSTEM_MESSAGE
+from .single_agent import final_text
+from .validation import check_city_block
+
+logger = logging.getLogger("travel_agent")
+
+_DATE_RE = re.compile(r"\b\d{4}-\d{2}-\d{2}\b")
+# Requests like these change the whole trip (or the summary), so they take the full update path.
+_TRIP_WIDE_RE = re.compile(
+    r"\b(all|every|each|whole|entire|overall)\s+(cit(y|ies)|days?|stops?|trip|plan|itinerary)\b"
+    r"|\b(summary|scope|client name)\b",
+    re.IGNORECASE,
+)
+# Adding, removing or reordering stops changes the cities list itself, which a
+# per-city patch cannot do. Such a verb counts when it acts on a city of the plan
+# ("Remove Toronto", "Add Chicago after Toronto") or on the trip as a whole.
+_STRUCTURAL_VERBS = r"(add|insert|include|append|remove|delete|drop|skip|cancel|replace|swap|reorder|move)"
+_STRUCTURAL_VERB_RE = re.compile(rf"\b{_STRUCTURAL_VERBS}\b", re.IGNORECASE)
+_STRUCTURAL_OBJECT_RE = re.compile(
+    r"\b(to|from|into|out of)\s+(the|my|this|our)\s+(trip|itinerary|plan|route|tour)\b"
+    r"|\b(another|new|extra|one more)\s+(city|stop|leg|destination)\b"
+    r"|\breorder\b|\bswap\b|\border of\b",
+    re.IGNORECASE,
+)
+
+
+def _mentions(text: str, name: Any) -> bool:
+    name = normalize_key_part(str(name or ""))
+    if len(name) < 3:
+        return False
+    return re.search(r"(?<!\w)" + re.escape(name) + r"(?!\w)", text) is not None
+
+
+def _restructures(text: str, change_request: str, city_names: List[Any]) -> bool:
+    """True when the request adds, removes or reorders stops rather than editing one."""
+    if not _STRUCTURAL_VERB_RE.search(change_request):
+        return False
+    if _STRUCTURAL_OBJECT_RE.search(change_request):
+        return True
+    for name in city_names:
+        name = normalize_key_part(str(name or ""))
+        if len(name) < 3:
+            continue
+        city = re.escape(name)
+        # "remove toronto", "add chicago after toronto", "... before toronto"
+        if re.search(rf"\b{_STRUCTURAL_VERBS}\s+(the\s+)?{city}(?!\w)|\b(after|before|between)\s+{city}(?!\w)", text):
+            return True
+    return False
+
+
+def affected_city_indexes(plan: Dict[str, Any], change_request: str) -> List[int]:
+    """
+    Indexes of the cities[i] blocks a change request refers to: by date, by city
+    name, or by one of the city's scheduled activities. Empty when the request
+    is trip-wide, adds/removes/reorders stops, or names nothing specific (caller
+    falls back to a full update).
+    """
+    cities = plan.get("cities") or []
+    if not cities or _TRIP_WIDE_RE.search(change_request or ""):
+        return []
+    text = normalize_key_part(change_request)
+    if _restructures(text, change_request or "", [c.get("city") for c in cities if isinstance(c, dict)]):
+        return []
+    dates = set(_DATE_RE.findall(change_request or ""))
+
+    hits = []
+    for i, c in enumerate(cities):
+        if not isinstance(c, dict):
+            continue
+        names = [c.get("city")] + [s.get("activity") for s in c.get("schedule") or [] if isinstance(s, dict)]
+        if c.get("date") in dates or any(_mentions(text, n) for n in names):
+            hits.append(i)
+    return hits
+
+
+def update_city(agent, block: Dict[str, Any], change_request: str) -> Dict[str, Any]:
+    """
+    One agent run that edits a single cities[i] block. It runs under
+    CITY_UPDATE_SYSTEM_MESSAGE instead of the full-plan prompt (which requires every
+    tool for every city), so only what the change affects is re-fetched.
+    """
+    prompt = (
+        "Update this one-city plan based on the user request.\n\n"
+        f"CURRENT JSON:\n{compact_json({'cities': [block]})}\n\n"
+        f"USER REQUEST:\n{change_request}\n"
+    )
+    messages = [SystemMessage(content=CITY_UPDATE_SYSTEM_MESSAGE), HumanMessage(content=prompt)]
+    raw = final_text(agent.invoke({"messages": messages}))
+    return city_block(raw)
+
+
+def apply_patch(plan: Dict[str, Any], ops: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Apply RFC 6902 "replace" ops on /cities/<i> to a shallow copy of plan.
+    Blocks that are not replaced are the same objects as before (serialize identically).
+    """
+    patched = dict(plan)
+    cities = list(plan.get("cities") or [])
+    for op in ops:
+        parts = op.get("path", "").split("/")
+        if op.get("op") != "replace" or len(parts) != 3 or parts[1] != "cities":
+            raise ValueError(f"Unsupported patch op: {op}")
+        cities[int(parts[2])] = op["value"]
+    patched["cities"] = cities
+    return patched
+
+
+def plan_update_delta(
+    agent,
+    plan: Dict[str, Any],
+    change_request: str,
+    max_workers: int = PARALLEL_CITY_WORKERS,
+) -> Optional[Dict[str, Any]]:
+    """
+    Re-plan only the cities a change request touches and patch them into plan;
+    executive_summary/scope are re-summarized when a city changed. Returns
+    {"plan": patched_plan, "patch": ops}, or None when the full update path should
+    be used (trip-wide or structural request, nothing matched, a sub-run failed
+    or returned an invalid block).
+    """
+    cities = plan.get("cities") or []
+    indexes = affected_city_indexes(plan, change_request)
+    if not indexes or (len(cities) > 1 and len(indexes) == len(cities)):
+        return None
+
+    workers = max(1, min(max_workers, len(indexes)))
+    try:
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="city-update") as pool:
+            futures = [
+                pool.submit(
+                    contextvars.copy_context().run,
+                    update_city, agent, copy.deepcopy(cities[i]), change_request,
+                )
+                for i in indexes
+            ]
+            blocks = [f.result() for f in futures]
+    except Exception as e:
+        logger.warning("Delta update failed, falling back to a full update: %s", e)
+        return None
+
+    for i, b in zip(indexes, blocks):
+        errors, _ = check_city_block(b)
+        if errors:
+            logger.warning("Delta update returned an invalid block for cities[%d] (%s), falling back to a full update", i, "; ".join(errors))
+            return None
+
+    ops = [
+        {"op": "replace", "path": f"/cities/{i}", "value": b}
+        for i, b in zip(indexes, blocks)
+        if b != cities[i]
+    ]
+    patched = apply_patch(plan, ops)
+    if ops:
+        patched.update(summarize_plan(patched["cities"]))
+    logger.info("Delta update: re-planned %d of %d cities %s, %d changed", len(indexes), len(cities), indexes, len(ops))
+    return {"plan": patched, "patch": ops}
@@ -0,0 +1,125 @@
+# src/agent/projection.py
+from __future__ import annotations
+
+import json
+import threading
+from typing import Any, Dict, List, Optional
+
+from ..config import TOOL_DEBUG_RAW
+
+# Rough chars-per-token ratio for JSON-ish text; good enough for before/after comparisons.
+_CHARS_PER_TOKEN = 4
+
+_lock = threading.Lock()
+_report: Dict[str, Dict[str, int]] = {}
+
+
+def compact_json(obj: Any) -> str:
+    """Stable, minimal JSON text (sorted keys, no whitespace)."""
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"), sort_keys=True, default=str)
+
+
+def _round(x: Any, nd: int = 5) -> Any:
+    return round(x, nd) if isinstance(x, float) else x
+
+
+def _uaqi(indexes: List[Dict[str, Any]]) -> Dict[str, Any]:
+    for idx in indexes or []:
+        if idx.get("code") == "uaqi":
+            return idx
+    return (indexes or [{}])[0]
+
+
+def _project_air_quality(p: Dict[str, Any]) -> Dict[str, Any]:
+    raw = p.get("raw") or {}
+    mask = p.get("mask") or {}
+    out: Dict[str, Any] = {
+        "mode": raw.get("_mode", "unknown"),
+        "mask_needed": bool(mask.get("mask_needed")),
+        "mask_days": mask.get("mask_days", 0),
+        "risk": p.get("risk"),
+    }
+    if raw.get("_error"):
+        out["error"] = mask.get("detail") or f"Air Quality API error {raw.get('status_code')}"
+        return out
+
+    hours = raw.get("hourlyForecasts") or []
+    idx = _uaqi(hours[0].get("indexes") if hours else raw.get("indexes"))
+    if idx.get("aqi") is not None:
+        out["aqi"] = idx.get("aqi")
+        out["category"] = idx.get("category")
+        if idx.get("dominantPollutant"):
+            out["dominant_pollutant"] = idx.get("dominantPollutant")
+    if hours and mask.get("detail"):
+        out["detail"] = mask["detail"]
+    return out
+
+
+def _with_error(out: Dict[str, Any], p: Dict[str, Any]) -> Dict[str, Any]:
+    if p.get("_error"):
+        out["error"] = p["_error"]
+    return out
+
+
+def _project_place(p: Dict[str, Any]) -> Dict[str, Any]:
+    return _with_error({"place_name": p.get("place_name"), "formatted_address": p.get("formatted_address") or ""}, p)
+
+
+def project(tool: str, payload: Any) -> Any:
+    """
+    Reduce a tool payload to the fields the SYSTEM_MESSAGE rules actually use.
+    Error payloads ({"error": ...}) pass through unchanged.
+    """
+    if not isinstance(payload, dict) or ("error" in payload and len(payload) == 1):
+        return payload
+
+    if tool == "city_latlng":
+        return _with_error(
+            {"city": payload.get("city"), "lat": _round(payload.get("lat")), "lng": _round(payload.get("lng"))}, payload
+        )
+    if tool == "place_address":
+        return _project_place(payload)
+    if tool == "place_addresses":
+        return {"city": payload.get("city"), "places": [_project_place(p) for p in payload.get("places") or []]}
+    if tool == "weather":
+        keep = ("available", "source", "weather_line", "umbrella", "clothes", "risk")
+        return _with_error({k: payload.get(k) for k in keep if k in payload}, payload)
+    if tool == "air_quality":
+        return _project_air_quality(payload)
+    return payload
+
+
+def _record(tool: str, before: str, after: str) -> None:
+    with _lock:
+        r = _report.setdefault(tool, {"calls": 0, "bytes_before": 0, "bytes_after": 0})
+        r["calls"] += 1
+        r["bytes_before"] += len(before.encode("utf-8"))
+        r["bytes_after"] += len(after.encode("utf-8"))
+
+
+def to_model_text(tool: str, payload: Any, debug: Optional[bool] = None) -> str:
+    """
+    Serialize a tool result for the model: projected + compact JSON.
+    With debug (TOOL_DEBUG_RAW=1) the unprojected payload is attached under "raw".
+    """
+    debug = TOOL_DEBUG_RAW if debug is None else debug
+    projected = project(tool, payload)
+    if debug and projected is not payload:
+        projected = {**projected, "raw": payload} if isinstance(projected, dict) else projected
+
+    text = compact_json(projected)
+    # "before" = how LangChain would have stringified the unprojected payload.
+    before = payload if isinstance(payload, str) else json.dumps(payload, ensure_ascii=False, default=str)
+    _record(tool, before, text)
+    return text
+
+
+def projection_report() -> Dict[str, Dict[str, int]]:
+    """Per-tool bytes and estimated tokens sent to the model, before vs. after projection."""
+    with _lock:
+        items = {k: dict(v) for k, v in _report.items()}
+    for r in items.values():
+        r["tokens_before"] = r["bytes_before"] // _CHARS_PER_TOKEN
+        r["tokens_after"] = r["bytes_after"] // _CHARS_PER_TOKEN
+        r["saved_pct"] = round(100 * (1 - r["bytes_after"] / r["bytes_before"]), 1) if r["bytes_before"] else 0.0
+    return items
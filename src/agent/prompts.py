@@ -0,0 +1,84 @@
+# src/agent/prompts.py
+"""
+Agent system prompt, kept free of LangChain imports so callers that only need its
+version (e.g. the plan cache key) do not load the agent stack.
+"""
+from __future__ import annotations
+
+import hashlib
+
+_WORDING_RULES = (
+    "Weather wording rules:\n"
+    "- If available: insights.weather like: '<min>°C to <max>°C, rain up to <pct>%, wind up to <kmh> km/h'.\n"
+    "- If not available but the weather result has source 'climatology', describe it as typical conditions "
+    "for that month (e.g. 'Typically 5°C to 13°C in October; precipitation on about 35% of days').\n"
+    "- If not available otherwise: write a short professional sentence (no tool references).\n\n"
+    "Air quality wording rules:\n"
+    "- Use a short professional summary. If numeric AQI/category exists, include it.\n"
+    "- Include whether a mask is recommended based on your tool’s mask field.\n\n"
+    "Risk rules:\n"
+    "- risk.weather_risk, risk.air_quality_risk, risk.overall_risk MUST be integers 0–10.\n"
+    "- overall_risk should reflect the higher of the two unless you have reason to adjust.\n\n"
+)
+
+_CITY_SCHEMA = (
+    "    {\n"
+    '      "city": "string",\n'
+    '      "date": "YYYY-MM-DD",\n'
+    '      "schedule": [{"start":"HH:MM","end":"HH:MM","activity":"string","address":"string"}],\n'
+    '      "insights": {"weather":"string","umbrella":"string","air_quality":"string"},\n'
+    '      "risk": {"weather_risk":0,"air_quality_risk":0,"overall_risk":0},\n'
+    '      "packing": ["string"]\n'
+    "    }\n"
+)
+
+SYSTEM_MESSAGE = (
+    "Create professional, client-ready travel itineraries.\n"
+    "Return ONLY valid JSON. No markdown, no backticks, no extra text.\n\n"
+    "You MUST do the following for EACH city in the input:\n"
+    "1) Call city_latlng(city) to get lat/lng.\n"
+    "2) Call place_addresses(city, [place names]) ONCE with ALL of that city's scheduled activities and set "
+    "schedule[i].address to the matching formatted_address (string only). "
+    "Use place_address(city, place_name) only to retry a single place.\n"
+    "3) Call weather(lat, lng, target_date) using that city's date.\n"
+    "   - Put the temperature/rain/wind numbers into insights.weather when available.\n"
+    "   - Put exactly 'Yes' or 'No' into insights.umbrella.\n"
+    "4) Call air_quality(lat, lng) and summarize into insights.air_quality.\n"
+    "5) Packing MUST be a list of at specific items tailored to that city’s conditions.\n\n"
+    + _WORDING_RULES
+    + "If the input contains a 'Pre-fetched tool data' section, use those values directly and only call tools "
+    "for items that are missing there or marked with an error.\n\n"
+    "If a city has no activities, you MUST call suggest_attractions(city), build a schedule with times, and still resolve addresses with place_addresses.\n\n"
+    "JSON schema (keys must match exactly):\n"
+    "{\n"
+    '  "executive_summary": "string",\n'
+    '  "generated_at": "ISO-8601 string",\n'
+    '  "client_name": "string",\n'
+    '  "scope": "string",\n'
+    '  "cities": [\n'
+    + _CITY_SCHEMA
+    + "  ]\n"
+    "}\n"
+)
+
+# System prompt for plan_update.update_city: the block already carries resolved data,
+# so (unlike SYSTEM_MESSAGE) tools are only called for what the change affects.
+CITY_UPDATE_SYSTEM_MESSAGE = (
+    "Edit one city of an existing client-ready travel itinerary.\n"
+    "Return ONLY valid JSON. No markdown, no backticks, no extra text.\n\n"
+    "The current city block already holds resolved addresses, weather, air quality and risk. "
+    "Keep every field the user request does not change exactly as it is, and call tools ONLY for what the change needs:\n"
+    "- New or renamed activity: place_addresses(city, [new place names]) for its address; keep existing addresses.\n"
+    "- Changed date: city_latlng(city), then weather(lat, lng, target_date) for the new date and air_quality(lat, lng); "
+    "update insights and risk from those results.\n"
+    "- Changed times, order, wording or packing only: no tool calls.\n"
+    "Never re-fetch addresses, weather or air quality that the change does not affect.\n\n"
+    + _WORDING_RULES
+    + "JSON schema (keys must match exactly, exactly one city):\n"
+    '{"cities": [\n'
+    + _CITY_SCHEMA
+    + "]}\n"
+)
+
+# Changes whenever the prompt changes, so cached plans from an older prompt are never served.
+SYSTEM_MESSAGE_VERSION = hashlib.sha256(SYSTEM_MESSAGE.encode("utf-8")).hexdigest()[:12]
@@ -0,0 +1,107 @@
+# src/agent/run_memo.py
+from __future__ import annotations
+
+import contextlib
+import contextvars
+import logging
+import threading
+from typing import Any, Callable, Dict, Iterator, Optional
+
+from langchain_core.tools import BaseTool, StructuredTool
+
+from ..cache import SingleFlight
+from ..tracing import tool_span
+from .projection import compact_json
+
+logger = logging.getLogger("travel_agent")
+
+
+def failed(payload: Any) -> bool:
+    return isinstance(payload, dict) and bool(payload.get("_error"))
+
+
+class RunMemo:
+    """
+    Tool payloads for one agent run, keyed by tool name + canonical arguments.
+    Identical calls made while the first is still running wait for it (SingleFlight).
+    Payloads flagged "_error" (a failed upstream lookup) are not kept, so the model
+    can retry a transient failure.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._results: Dict[str, Any] = {}
+        self._flight = SingleFlight()
+        self.calls = 0
+        self.repeats = 0
+
+    def call(self, name: str, kwargs: Dict[str, Any], fn: Callable[[], Any]) -> Any:
+        key = name + compact_json(kwargs)
+        with self._lock:
+            self.calls += 1
+            if key in self._results:
+                self.repeats += 1
+                logger.info("Repeated tool call served from run memo: %s %s", name, compact_json(kwargs))
+                return self._results[key]
+
+        def _run() -> Any:
+            out = fn()
+            if not failed(out):
+                with self._lock:
+                    self._results[key] = out
+            return out
+
+        out, shared = self._flight.do(key, _run)
+        if shared:
+            with self._lock:
+                self.repeats += 1
+            logger.info("Repeated tool call joined in-flight call: %s %s", name, compact_json(kwargs))
+        return out
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"calls": self.calls, "repeats": self.repeats, "entries": len(self._results)}
+
+
+_current: contextvars.ContextVar[Optional[RunMemo]] = contextvars.ContextVar("tool_run_memo", default=None)
+
+
+@contextlib.contextmanager
+def run_scope() -> Iterator[RunMemo]:
+    """Fresh memo for the duration of one agent run (tool threads inherit it via contextvars)."""
+    memo = RunMemo()
+    token = _current.set(memo)
+    try:
+        yield memo
+    finally:
+        _current.reset(token)
+        if memo.repeats:
+            logger.info("Run memo: %s", memo.stats())
+
+
+def memoized(name: str, kwargs: Dict[str, Any], fn: Callable[[], Any]) -> Any:
+    """
+    fn() through the current run's memo (the tools call this with their payload
+    builder). Outside a run_scope() (e.g. direct calls) fn() simply runs.
+    """
+    memo = _current.get()
+    if memo is None:
+        return fn()
+    return memo.call(name, kwargs, fn)
+
+
+def with_tool_span(tool: BaseTool) -> StructuredTool:
+    """Copy of a sync tool whose calls are timed on the current trace (src/tracing.py)."""
+    func = tool.func
+    name = tool.name
+
+    def _timed(**kwargs):
+        with tool_span(name, kwargs):
+            return func(**kwargs)
+
+    return StructuredTool.from_function(
+        func=_timed,
+        name=name,
+        description=tool.description,
+        args_schema=tool.args_schema,
+    )
@@ -1,101 +1,110 @@
 # src/agent/single_agent.py
 from __future__ import annotations
 
-from typing import Any, Dict
+import threading
+from typing import Any, Dict, Iterator, List
 
-from langchain_openai import ChatOpenAI
 from langchain_core.tools import tool as lc_tool
 from langchain_core.messages import SystemMessage
 
 from langgraph.prebuilt import create_react_agent
 
-from ..config import OPENAI_API_KEY, OPENAI_MODEL
-from ..tools.google_places import resolve_city_to_latlng, resolve_place_address
-from ..tools.google_weather import get_hourly_weather, summarize_weather_for_date, clothes_from_temp
+from ..config import CONTEXT_COMPACTION
+from ..llm import get_chat_model
+from ..tools.google_places import resolve_city_to_latlng, resolve_place_address, resolve_place_addresses
+from ..tools.google_weather import (
+    get_hourly_weather,
+    summarize_weather_for_date,
+    clothes_from_temp,
+    in_forecast_window,
+)
+from ..tools.climatology import monthly_normals
 from ..tools.google_air_quality import get_air_quality_forecast, mask_needed_and_count
 from ..tools.attractions_llm import suggest_attractions
 from ..policy import enforce_policy
-from ..risk.risk_score import compute_risk_score
-
-
-SYSTEM_MESSAGE = (
-    "Create professional, client-ready travel itineraries.\n"
-    "Return ONLY valid JSON. No markdown, no backticks, no extra text.\n\n"
-    "You MUST do the following for EACH city in the input:\n"
-    "1) Call city_latlng(city) to get lat/lng.\n"
-    "2) For each scheduled activity, call place_address(city, place_name) and set schedule[i].address "
-    "to the returned formatted_address (string only).\n"
-    "3) Call weather(lat, lng, target_date) using that city's date.\n"
-    "   - Put the temperature/rain/wind numbers into insights.weather when available.\n"
-    "   - Put exactly 'Yes' or 'No' into insights.umbrella.\n"
-    "4) Call air_quality(lat, lng) and summarize into insights.air_quality.\n"
-    "5) Packing MUST be a list of at specific items tailored to that city’s conditions.\n\n"
-    "Weather wording rules:\n"
-    "- If available: insights.weather like: '<min>°C to <max>°C, rain up to <pct>%, wind up to <kmh> km/h'.\n"
-    "- If not available: write a short professional sentence (no tool references).\n\n"
-    "Air quality wording rules:\n"
-    "- Use a short professional summary. If numeric AQI/category exists, include it.\n"
-    "- Include whether a mask is recommended based on your tool’s mask field.\n\n"
-    "Risk rules:\n"
-    "- risk.weather_risk, risk.air_quality_risk, risk.overall_risk MUST be integers 0–10.\n"
-    "- overall_risk should reflect the higher of the two unless you have reason to adjust.\n\n"
-    "If a city has no activities, you MUST call suggest_attractions(city), build a schedule with times, and still resolve addresses.\n\n"
-    "JSON schema (keys must match exactly):\n"
-    "{\n"
-    '  "executive_summary": "string",\n'
-    '  "generated_at": "ISO-8601 string",\n'
-    '  "client_name": "string",\n'
-    '  "scope": "string",\n'
-    '  "cities": [\n'
-    "    {\n"
-    '      "city": "string",\n'
-    '      "date": "YYYY-MM-DD",\n'
-    '      "schedule": [{"start":"HH:MM","end":"HH:MM","activity":"string","address":"string"}],\n'
-    '      "insights": {"weather":"string","umbrella":"string","air_quality":"string"},\n'
-    '      "risk": {"weather_risk":0,"air_quality_risk":0,"overall_risk":0},\n'
-    '      "packing": ["string"]\n'
-    "    }\n"
-    "  ]\n"
-    "}\n"
-)
+from ..risk.risk_score import compute_risk_score, compute_risk_scores
+from ..tools.http_client import run_io
+from ..tracing import trace_callbacks
+from .compaction import compaction_hook
+from .projection import to_model_text
+from .prompts import SYSTEM_MESSAGE, SYSTEM_MESSAGE_VERSION  # noqa: F401 (re-exported)
+from .run_memo import memoized, run_scope, with_tool_span
 
 
 def _jsonable(x):
     return x.model_dump() if hasattr(x, "model_dump") else x
 
 
-@lc_tool("suggest_attractions")
-def tool_suggest_attractions(city: str) -> Any:
-    """Suggest 4–8 popular attractions for a city (returns JSON list/dict)."""
-    enforce_policy(city)
-    return _jsonable(suggest_attractions(city))
+# -----------------------------
+# Tool payloads (shared by the agent tools and the pre-enrichment stage)
+#
+# A payload whose upstream lookup failed carries "_error" (a short reason): the
+# projection shows it to the model as "error", and the run memo never keeps it.
+# -----------------------------
+def _upstream_error(out: Dict[str, Any], what: str) -> str:
+    if out.get("status_code") == 404:
+        return f"No {what} found"
+    return f"{what.capitalize()} lookup failed (HTTP {out.get('status_code')})"
 
 
-@lc_tool("city_latlng")
-def tool_city_latlng(city: str) -> Dict[str, Any]:
-    """Resolve a city to representative lat/lng (returns JSON with keys: city, lat, lng)."""
+def city_latlng_payload(city: str) -> Dict[str, Any]:
     enforce_policy(city)
     out = _jsonable(resolve_city_to_latlng(city)) or {}
-    return {"city": out.get("city", city), "lat": out.get("lat"), "lng": out.get("lng")}
+    payload = {"city": out.get("city", city), "lat": out.get("lat"), "lng": out.get("lng")}
+    if out.get("_error") or payload["lat"] is None or payload["lng"] is None:
+        payload["_error"] = _upstream_error(out, "city location")
+    return payload
 
 
-@lc_tool("place_address")
-def tool_place_address(city: str, place_name: str) -> Dict[str, Any]:
-    """Resolve a place to a formatted address + lat/lng (returns JSON)."""
-    enforce_policy(city)
-    out = _jsonable(resolve_place_address(city, place_name)) or {}
-    return {
+def _place_payload(out: Dict[str, Any], place_name: str) -> Dict[str, Any]:
+    payload = {
         "place_name": out.get("place_name", place_name),
         "formatted_address": out.get("formatted_address") or out.get("address") or "",
         "lat": out.get("lat"),
         "lng": out.get("lng"),
     }
+    if out.get("_error") or not payload["formatted_address"]:
+        payload["_error"] = _upstream_error(out, "address")
+    return payload
 
 
-@lc_tool("weather")
-def tool_weather(lat: float, lng: float, target_date: str) -> Dict[str, Any]:
-    """Weather for the target date (if within the next 10 days), plus clothes/umbrella + risk score."""
-    wx = get_hourly_weather(lat, lng, hours=240)  # 10 days
+def place_addresses_payload(city: str, place_names: List[str]) -> Dict[str, Any]:
+    enforce_policy(city)
+    outs = resolve_place_addresses(city, place_names)
+    places = [_place_payload(o, o["place_name"]) for o in outs]
+    payload: Dict[str, Any] = {"city": city, "places": places}
+    failed = sum(1 for p in places if p.get("_error"))
+    if failed:
+        payload["_error"] = f"{failed} of {len(places)} addresses not resolved"
+    return payload
+
+
+def weather_payloads(lat: float, lng: float, target_dates: List[str]) -> Dict[str, Dict[str, Any]]:
+    """
+    Weather payload per date. Dates inside the forecast horizon share ONE date-scoped
+    fetch; dates outside it are answered from bundled climate normals without any network call.
+    """
+    dates = sorted(set(target_dates))
+    live = [d for d in dates if in_forecast_window(d)]
+    out: Dict[str, Dict[str, Any]] = {}
+    if live:
+        wx = get_hourly_weather(lat, lng, start_date=live[0], end_date=live[-1])
+        risks = compute_risk_scores(weather=wx, air_quality=None, target_dates=live)
+        out.update({d: _weather_payload_for(wx, d, risk) for d, risk in zip(live, risks)})
+        if wx.get("_error"):
+            for d in live:
+                out[d]["_error"] = _upstream_error(wx, "forecast")
+    for d in dates:
+        if d not in out:
+            out[d] = _climatology_payload(lat, lng, d)
+    return out
+
+
+def weather_payload(lat: float, lng: float, target_date: str) -> Dict[str, Any]:
+    return weather_payloads(lat, lng, [target_date])[target_date]
+
+
+def _weather_payload_for(wx: Dict[str, Any], target_date: str, risk: Dict[str, int]) -> Dict[str, Any]:
     day = summarize_weather_for_date(wx, target_date)
 
     if day.get("available"):
@@ -112,8 +121,6 @@ def tool_weather(lat: float, lng: float, target_date: str) -> Dict[str, Any]:
         weather_line = "Forecast will be available when the travel date is within the next 10 days."
         clothes = "Dress in layers; plan based on typical seasonal conditions."
 
-    risk = compute_risk_score(weather=wx, air_quality=None)
-
     return {
         "available": bool(day.get("available")),
         "timezone": day.get("timezone") or wx.get("timezone", ""),
@@ -124,51 +131,250 @@ def tool_weather(lat: float, lng: float, target_date: str) -> Dict[str, Any]:
     }
 
 
-@lc_tool("air_quality")
-def tool_air_quality(lat: float, lng: float) -> Dict[str, Any]:
-    """Current air quality + mask suggestion + risk score (0–10)."""
+def _climatology_payload(lat: float, lng: float, target_date: str) -> Dict[str, Any]:
+    try:
+        month = int(target_date[5:7])
+    except (TypeError, ValueError):
+        month = 0
+    normals = monthly_normals(lat, lng, month)
+    if normals is None:
+        return {
+            "available": False,
+            "weather_line": "Forecast will be available when the travel date is within the next 10 days.",
+            "umbrella": "No",
+            "clothes": "Dress in layers; plan based on typical seasonal conditions.",
+            "risk": compute_risk_score(weather=None, air_quality=None),
+        }
+
+    lo, hi, wet = normals["min_temp_c"], normals["max_temp_c"], normals["wet_day_pct"]
+    return {
+        "available": False,
+        "source": "climatology",
+        "weather_line": (
+            f"Typical for {normals['month']}: {lo:.0f}°C to {hi:.0f}°C, "
+            f"precipitation on about {int(round(wet))}% of days"
+        ),
+        "umbrella": "Yes" if wet >= 40 else "No",
+        "clothes": clothes_from_temp((lo + hi) / 2, 0.0),
+        # Same 0-10 mapping as the forecast path, using wet-day share as the rain chance.
+        "risk": compute_risk_score(weather={"hourly": {"precipitation_probability": [wet]}}, air_quality=None),
+    }
+
+
+def air_quality_payload(lat: float, lng: float) -> Dict[str, Any]:
     aq = get_air_quality_forecast(lat, lng)
     mask = mask_needed_and_count(aq)
     risk = compute_risk_score(weather=None, air_quality=aq)
-    return {"raw": aq, "mask": mask, "risk": risk}
+    payload = {"raw": aq, "mask": mask, "risk": risk}
+    if aq.get("_error"):
+        payload["_error"] = _upstream_error(aq, "air quality")
+    return payload
+
+
+# -----------------------------
+# Agent tools
+# -----------------------------
+def _tool_text(name: str, kwargs: Dict[str, Any], payload_fn) -> str:
+    """Payload through the current run's memo (failed lookups are not kept), as model text."""
+    return to_model_text(name, memoized(name, kwargs, payload_fn))
+
+
+@lc_tool("suggest_attractions")
+def tool_suggest_attractions(city: str) -> str:
+    """Suggest 4–8 popular attractions for a city (returns JSON list/dict)."""
+    enforce_policy(city)
+    return _tool_text("suggest_attractions", {"city": city}, lambda: _jsonable(suggest_attractions(city)))
+
+
+@lc_tool("city_latlng")
+def tool_city_latlng(city: str) -> str:
+    """Resolve a city to representative lat/lng (returns JSON with keys: city, lat, lng)."""
+    return _tool_text("city_latlng", {"city": city}, lambda: city_latlng_payload(city))
+
+
+@lc_tool("place_address")
+def tool_place_address(city: str, place_name: str) -> str:
+    """Resolve a place to a formatted address (returns JSON)."""
+    enforce_policy(city)
+    return _tool_text(
+        "place_address",
+        {"city": city, "place_name": place_name},
+        lambda: _place_payload(_jsonable(resolve_place_address(city, place_name)) or {}, place_name),
+    )
+
+
+@lc_tool("place_addresses")
+def tool_place_addresses(city: str, place_names: List[str]) -> str:
+    """Resolve ALL places for one city in a single call (returns JSON with one entry per unique place)."""
+    return _tool_text(
+        "place_addresses", {"city": city, "place_names": place_names}, lambda: place_addresses_payload(city, place_names)
+    )
+
+
+@lc_tool("weather")
+def tool_weather(lat: float, lng: float, target_date: str) -> str:
+    """Weather for the target date (if within the next 10 days), plus clothes/umbrella + risk score."""
+    return _tool_text(
+        "weather", {"lat": lat, "lng": lng, "target_date": target_date}, lambda: weather_payload(lat, lng, target_date)
+    )
+
+
+@lc_tool("air_quality")
+def tool_air_quality(lat: float, lng: float) -> str:
+    """Current air quality (AQI/category) + mask suggestion + risk score (0–10)."""
+    return _tool_text("air_quality", {"lat": lat, "lng": lng}, lambda: air_quality_payload(lat, lng))
+
+
+def _with_async_impl(tool):
+    """
+    Give a sync tool a native coroutine so the async agent path never blocks the
+    event loop: the blocking body runs on the shared tool I/O pool, and several
+    tool calls from the same agent step overlap.
+    """
+    func = tool.func
+
+    async def _acall(*args, **kwargs):
+        return await run_io(func, *args, **kwargs)
+
+    tool.coroutine = _acall
+    return tool
 
 
 class _AgentWithSystemMessage:
     """
     Wrap a LangGraph agent so app.py can keep calling:
       agent.invoke({"messages":[HumanMessage(...)]})
+      await agent.ainvoke({"messages":[HumanMessage(...)]})
+      for event in agent.stream({"messages":[HumanMessage(...)]}): ...
     while we ensure a SystemMessage is always present first.
     """
     def __init__(self, agent, system_text: str):
         self._agent = agent
         self._system = SystemMessage(content=system_text)
 
-    def invoke(self, inputs: Dict[str, Any], **kwargs):
+    def _with_system(self, inputs: Dict[str, Any]) -> Dict[str, Any]:
         inputs = dict(inputs or {})
         msgs = list(inputs.get("messages") or [])
         if not msgs or msgs[0].__class__.__name__ != "SystemMessage":
             msgs = [self._system] + msgs
         inputs["messages"] = msgs
-        return self._agent.invoke(inputs, **kwargs)
+        return inputs
+
+    @staticmethod
+    def _traced(kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        # LLM steps are reported to the current plan trace (if any) via callbacks.
+        callbacks = trace_callbacks()
+        if not callbacks:
+            return kwargs
+        config = dict(kwargs.get("config") or {})
+        config["callbacks"] = list(config.get("callbacks") or []) + callbacks
+        return {**kwargs, "config": config}
+
+    def invoke(self, inputs: Dict[str, Any], **kwargs):
+        with run_scope():
+            return self._agent.invoke(self._with_system(inputs), **self._traced(kwargs))
+
+    async def ainvoke(self, inputs: Dict[str, Any], **kwargs):
+        with run_scope():
+            return await self._agent.ainvoke(self._with_system(inputs), **self._traced(kwargs))
+
+    def stream(self, inputs: Dict[str, Any], **kwargs) -> Iterator[Dict[str, Any]]:
+        """
+        Run the agent and yield progress events as they happen:
+          {"type": "tool_start", "name", "args"}   model asked for a tool
+          {"type": "tool_end", "name", "error"}     tool result is back
+          {"type": "token", "text", "message_id"}   piece of the model's reply
+          {"type": "final", "text"}                 full final reply (same as final_text(invoke(...)))
+        Tokens from LLM calls made inside tools (e.g. suggest_attractions) are not forwarded.
+        """
+        with run_scope():
+            yield from self._stream_events(inputs, **self._traced(kwargs))
+
+    def _stream_events(self, inputs: Dict[str, Any], **kwargs) -> Iterator[Dict[str, Any]]:
+        final = ""
+        for mode, data in self._agent.stream(
+            self._with_system(inputs), stream_mode=["messages", "updates"], **kwargs
+        ):
+            if mode == "messages":
+                chunk, meta = data
+                content = getattr(chunk, "content", "")
+                if meta.get("langgraph_node") == "agent" and isinstance(content, str) and content:
+                    yield {"type": "token", "text": content, "message_id": chunk.id}
+                continue
+
+            for node, update in (data or {}).items():
+                for msg in (update or {}).get("messages") or []:
+                    if node == "tools":
+                        yield {
+                            "type": "tool_end",
+                            "name": getattr(msg, "name", ""),
+                            "error": getattr(msg, "status", "") == "error",
+                        }
+                        continue
+                    calls = getattr(msg, "tool_calls", None) or []
+                    for call in calls:
+                        yield {"type": "tool_start", "name": call.get("name", ""), "args": call.get("args", {})}
+                    if not calls:
+                        final = getattr(msg, "content", "") or ""
+        yield {"type": "final", "text": final}
+
+
+def final_text(result) -> str:
+    """Content of the last message in a LangGraph agent result ("" if none)."""
+    msgs = (result or {}).get("messages") or []
+    if not msgs:
+        return ""
+    return getattr(msgs[-1], "content", "") or ""
 
 
 def create_agent_executor():
     """
     Returns a runnable agent compatible with:
-      agent.invoke({"messages":[...]}).
+      agent.invoke({"messages":[...]}) and await agent.ainvoke({"messages":[...]}).
 
     NOTE: Your installed create_react_agent does NOT accept state_modifier,
     so we inject the system message via a wrapper instead.
     """
-    llm = ChatOpenAI(api_key=OPENAI_API_KEY, model=OPENAI_MODEL)
+    llm = get_chat_model()
 
+    # Each run gets its own memo (run_scope in the wrapper), so repeated identical
+    # tool calls inside one plan are answered without re-running the tool.
     tools = [
-        tool_suggest_attractions,
-        tool_city_latlng,
-        tool_place_address,
-        tool_weather,
-        tool_air_quality,
+        _with_async_impl(with_tool_span(t))
+        for t in (
+            tool_suggest_attractions,
+            tool_city_latlng,
+            tool_place_address,
+            tool_place_addresses,
+            tool_weather,
+            tool_air_quality,
+        )
     ]
 
-    agent = create_react_agent(model=llm, tools=tools)
+    # Tool results of cities the agent has finished with reach the model as one digest
+    # per city (the graph state keeps the full messages).
+    agent = create_react_agent(
+        model=llm,
+        tools=tools,
+        pre_model_hook=compaction_hook if CONTEXT_COMPACTION else None,
+    )
     return _AgentWithSystemMessage(agent, SYSTEM_MESSAGE)
+
+
+_executor_lock = threading.Lock()
+_executor = None
+
+
+def get_agent_executor():
+    """
+    Process-wide agent executor, built once and shared by every session and thread.
+    The compiled graph keeps no state between runs (no checkpointer), so per-session
+    data lives only in the messages each caller passes in.
+    """
+    global _executor
+    if _executor is not None:
+        return _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = create_agent_executor()
+    return _executor
@@ -0,0 +1,89 @@
+# src/agent/streaming.py
+from __future__ import annotations
+
+import json
+import logging
+import re
+from typing import Any, Dict, List
+
+logger = logging.getLogger("travel_agent")
+
+# The model may wrap the JSON in fences or lead with whitespace; inside a JSON
+# string the key would appear escaped (\"cities\"), so this only hits the real key.
+_CITIES_KEY_RE = re.compile(r'(?<!\\)"cities"\s*:\s*\[')
+
+
+class CityBlockScanner:
+    """
+    Incremental reader for a plan JSON arriving token by token.
+    feed() returns each cities[i] object as soon as its closing brace has streamed in,
+    so the report can show city 1 while the model is still writing city 2.
+    Every character is scanned once; the full output is still parsed with json.loads at the end.
+    """
+
+    def __init__(self):
+        self._buf = ""
+        self._pos = 0
+        self._in_array = False
+        self._done = False
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._start = -1
+        self.count = 0
+
+    def feed(self, text: str) -> List[Dict[str, Any]]:
+        if self._done or not text:
+            return []
+        self._buf += text
+        if not self._in_array:
+            m = _CITIES_KEY_RE.search(self._buf)
+            if not m:
+                return []
+            self._in_array = True
+            self._pos = m.end()
+
+        out: List[Dict[str, Any]] = []
+        buf = self._buf
+        i = self._pos
+        while i < len(buf):
+            ch = buf[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                self._in_string = True
+            elif ch in "{[":
+                if self._depth == 0 and ch == "{":
+                    self._start = i
+                self._depth += 1
+            elif ch in "}]":
+                if self._depth == 0:
+                    # closing bracket of the cities array itself
+                    self._done = True
+                    i += 1
+                    break
+                self._depth -= 1
+                if self._depth == 0 and self._start >= 0:
+                    block = self._parse(buf[self._start:i + 1])
+                    if block is not None:
+                        out.append(block)
+                    self._start = -1
+            i += 1
+        self._pos = i
+        return out
+
+    def _parse(self, text: str):
+        try:
+            block = json.loads(text)
+        except ValueError as e:
+            logger.debug("Streamed city block #%d not parseable yet: %s", self.count, e)
+            return None
+        if not isinstance(block, dict):
+            return None
+        self.count += 1
+        return block
@@ -0,0 +1,371 @@
+# src/agent/validation.py
+from __future__ import annotations
+
+import contextvars
+import json
+import logging
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from ..config import PARALLEL_CITY_WORKERS
+from ..models import CityStop
+from .map_reduce import plan_city, summarize_plan
+
+logger = logging.getLogger("travel_agent")
+
+_FENCE_RE = re.compile(r"^\s*```[a-zA-Z]*\s*\n?|\n?\s*```\s*$")
+_DATE_RE = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+_TIME_RE = re.compile(r"^\d{1,2}:\d{2}$")
+_RISK_KEYS = ("weather_risk", "air_quality_risk", "overall_risk")
+
+_lock = threading.Lock()
+_stats = {
+    "plans": 0,            # outputs validated
+    "valid": 0,            # parsed and matched the schema as-is
+    "json_repaired": 0,    # needed a local text fix (fences, trailing commas, truncation)
+    "fields_coerced": 0,   # fixable field values normalized locally (e.g. "5" -> 5)
+    "blocks_regenerated": 0,
+    "plans_with_regeneration": 0,
+    "unusable": 0,         # nothing parseable; raw text shown instead
+}
+
+
+def _count(**deltas: int) -> None:
+    with _lock:
+        for k, v in deltas.items():
+            _stats[k] += v
+
+
+# -----------------------------
+# Text repair
+# -----------------------------
+def _scan(text: str) -> Tuple[str, List[str], bool, List[Tuple[int, List[str]]], List[str]]:
+    """
+    One pass over JSON-ish text. Returns (text without trailing commas or unmatched
+    closing brackets, open-bracket stack at the end, whether it ended inside a string,
+    cut points, fixes made). A cut point is a position right after an opening bracket
+    or a complete array item / object member, with the stack there.
+    """
+    fixes: List[str] = []
+    out: List[str] = []
+    stack: List[str] = []
+    cuts: List[Tuple[int, List[str]]] = []
+    in_string = escape = False
+    i, n = 0, len(text)
+    while i < n:
+        ch = text[i]
+        if in_string:
+            out.append(ch)
+            if escape:
+                escape = False
+            elif ch == "\\":
+                escape = True
+            elif ch == '"':
+                in_string = False
+            i += 1
+            continue
+        if ch == '"':
+            in_string = True
+        elif ch in "{[":
+            stack.append("}" if ch == "{" else "]")
+            out.append(ch)
+            cuts.append((len(out), list(stack)))
+            i += 1
+            continue
+        elif ch in "}]":
+            if not stack:
+                i += 1  # closes nothing (e.g. '{"a": 1}}')
+                if "unmatched_brackets" not in fixes:
+                    fixes.append("unmatched_brackets")
+                continue
+            stack.pop()
+            out.append(ch)
+            cuts.append((len(out), list(stack)))
+            i += 1
+            continue
+        elif ch == ",":
+            j = i + 1
+            while j < n and text[j].isspace():
+                j += 1
+            if j < n and text[j] in "}]":
+                i += 1  # trailing comma
+                if "trailing_commas" not in fixes:
+                    fixes.append("trailing_commas")
+                continue
+            cuts.append((len(out), list(stack)))
+        out.append(ch)
+        i += 1
+    return "".join(out), stack, in_string, cuts, fixes
+
+
+def repair_json_text(raw: str) -> Tuple[Optional[Any], List[str]]:
+    """
+    Parse model output, fixing what can be fixed locally: code fences, text around
+    the JSON object, trailing commas and truncation (open strings/arrays/objects are
+    closed, or the last incomplete member dropped). Returns (obj or None, repairs).
+    """
+    text = raw or ""
+    try:
+        return json.loads(text), []
+    except ValueError:
+        pass
+
+    repairs: List[str] = []
+    stripped = _FENCE_RE.sub("", text).strip()
+    if stripped != text.strip():
+        repairs.append("fences")
+    start = stripped.find("{")
+    if start > 0:
+        repairs.append("leading_text")
+    stripped = stripped[start:] if start >= 0 else stripped
+    try:
+        return json.loads(stripped), repairs
+    except ValueError:
+        pass
+
+    cleaned, stack, in_string, cuts, fixes = _scan(stripped)
+    repairs += fixes
+    candidates = []
+    if not stack and not in_string:
+        # balanced: anything after the last closing bracket is stray text
+        end = max(cleaned.rfind("}"), cleaned.rfind("]")) + 1
+        candidates.append((cleaned[:end], "trailing_text" if cleaned[end:].strip() else None))
+    else:
+        tail = '"' if in_string else ""
+        candidates.append((cleaned + tail + "".join(reversed(stack)), "truncated"))
+        for pos, st in reversed(cuts):
+            if st:
+                candidates.append((cleaned[:pos].rstrip().rstrip(",") + "".join(reversed(st)), "truncated"))
+                break
+    for candidate, reason in candidates:
+        try:
+            obj = json.loads(candidate)
+        except ValueError:
+            continue
+        return obj, repairs + ([reason] if reason else [])
+    return None, repairs
+
+
+# -----------------------------
+# Schema checks
+# -----------------------------
+def _is_text(x: Any) -> bool:
+    return isinstance(x, str)
+
+
+def _coerce_risk(risk: Any) -> Tuple[Optional[Dict[str, int]], int]:
+    if not isinstance(risk, dict):
+        return None, 0
+    out, coerced = {}, 0
+    for k in _RISK_KEYS:
+        v = orig = risk.get(k)
+        if isinstance(v, bool):
+            return None, 0
+        if isinstance(v, str):
+            try:
+                v = float(v.strip())
+            except ValueError:
+                return None, 0
+        if not isinstance(v, (int, float)):
+            return None, 0
+        out[k] = min(10, max(0, int(round(v))))
+        coerced += int(not isinstance(orig, int) or out[k] != orig)
+    return out, coerced
+
+
+def _schedule_errors(sched: Any) -> List[str]:
+    if not isinstance(sched, list):
+        return ["schedule is not a list"]
+    errors = []
+    for j, s in enumerate(sched):
+        if not isinstance(s, dict):
+            errors.append(f"schedule[{j}] is not an object")
+        elif not _is_text(s.get("activity")) or not s.get("activity", "").strip():
+            errors.append(f"schedule[{j}].activity missing")
+        elif any(not _is_text(s.get(k, "")) for k in ("start", "end", "address")):
+            errors.append(f"schedule[{j}] has non-string fields")
+    return errors
+
+
+def _text_list_errors(value: Any, name: str) -> List[str]:
+    if not isinstance(value, list) or not all(_is_text(x) for x in value):
+        return [f"{name} is not a list of strings"]
+    return []
+
+
+def check_city_block(block: Any) -> Tuple[List[str], int]:
+    """
+    Errors for one cities[i] block of the SYSTEM_MESSAGE schema (empty = valid).
+    Fixable values (risk as strings/floats, umbrella casing) are normalized in place;
+    the second value is how many were.
+    """
+    if not isinstance(block, dict):
+        return ["not an object"], 0
+    errors: List[str] = []
+    coerced = 0
+    if block.get("_error"):
+        # placeholder from a failed city sub-run (map_reduce._unavailable_block)
+        errors.append(f"placeholder: {block['_error']}")
+    if not _is_text(block.get("city")) or not block["city"].strip():
+        errors.append("city missing")
+    if not _is_text(block.get("date")) or not _DATE_RE.match(block["date"]):
+        errors.append("date is not YYYY-MM-DD")
+    errors += _schedule_errors(block.get("schedule"))
+
+    insights = block.get("insights")
+    if not isinstance(insights, dict) or any(not _is_text(insights.get(k)) for k in ("weather", "umbrella", "air_quality")):
+        errors.append("insights incomplete")
+    else:
+        umbrella = insights["umbrella"].strip().capitalize()
+        if umbrella in ("Yes", "No") and umbrella != insights["umbrella"]:
+            insights["umbrella"] = umbrella
+            coerced += 1
+
+    risk, n = _coerce_risk(block.get("risk"))
+    if risk is None:
+        errors.append("risk is not three integers 0-10")
+    else:
+        block["risk"] = risk
+        coerced += n
+    errors += _text_list_errors(block.get("packing"), "packing")
+    return errors, coerced
+
+
+def check_explorer_plan(plan: Any) -> List[str]:
+    """Errors for a build_city_explorer_request plan (empty = valid)."""
+    if not isinstance(plan, dict):
+        return ["not an object"]
+    errors = [f"{k} missing" for k in ("city", "summary", "weather", "air_quality") if not _is_text(plan.get(k))]
+    if not _is_text(plan.get("date", "")) or (plan.get("date") and not _DATE_RE.match(plan["date"])):
+        errors.append("date is not YYYY-MM-DD or empty")
+    errors += _schedule_errors(plan.get("schedule"))
+    errors += _text_list_errors(plan.get("tips", []), "tips")
+    errors += _text_list_errors(plan.get("packing", []), "packing")
+    return errors
+
+
+# -----------------------------
+# Validate + targeted repair
+# -----------------------------
+def _stop_from_block(block: Any) -> Optional[CityStop]:
+    # Used when the caller has no parsed input (e.g. updates): rebuild the stop from the block itself.
+    if not isinstance(block, dict) or not _is_text(block.get("city")) or not _is_text(block.get("date")):
+        return None
+    activities = []
+    for s in block.get("schedule") or []:
+        if isinstance(s, dict) and _is_text(s.get("activity")) and s["activity"].strip():
+            start, end = s.get("start") or "", s.get("end") or ""
+            valid_times = _is_text(start) and _is_text(end) and _TIME_RE.match(start) and _TIME_RE.match(end)
+            activities.append(f"{s['activity'].strip()};{start}-{end}" if valid_times else s["activity"].strip())
+    return CityStop(city=block["city"], date=block["date"], activities=activities)
+
+
+def validate_plan_output(
+    raw: str,
+    mode: str,
+    agent=None,
+    stops: Optional[Sequence[CityStop]] = None,
+    client_name: str = "",
+    max_workers: int = PARALLEL_CITY_WORKERS,
+) -> Tuple[Optional[Dict[str, Any]], Dict[str, Any]]:
+    """
+    Parse and validate an agent reply against the plan schema.
+
+    - Broken JSON is repaired locally where possible.
+    - Trip plans: each invalid (or missing, if stops are known) cities[i] block is
+      re-generated on its own via plan_city(); a missing summary/scope is rewritten
+      by the tool-free summary step. The rest of the plan is kept as-is.
+    - City Explorer plans are returned with their problems reported (the report
+      formatter tolerates missing fields).
+    Returns (plan or None if nothing usable, report).
+    """
+    _count(plans=1)
+    plan, repairs = repair_json_text(raw)
+    report: Dict[str, Any] = {"repairs": repairs, "errors": {}, "regenerated": [], "coerced": 0}
+    if repairs:
+        _count(json_repaired=1)
+    if not isinstance(plan, dict):
+        _count(unusable=1)
+        logger.warning("Plan output unusable (repairs tried: %s)", repairs)
+        return None, report
+
+    if mode == "City Explorer":
+        errors = check_explorer_plan(plan)
+        if errors:
+            report["errors"]["plan"] = errors
+            logger.warning("City Explorer plan has schema problems: %s", errors)
+        elif not repairs:
+            _count(valid=1)
+        return plan, report
+
+    cities = plan.get("cities")
+    if not isinstance(cities, list):
+        cities = []
+    stops = list(stops or [])
+
+    invalid: List[int] = []
+    for i, block in enumerate(cities):
+        errors, coerced = check_city_block(block)
+        report["coerced"] += coerced
+        if errors:
+            report["errors"][f"cities[{i}]"] = errors
+            invalid.append(i)
+    missing = list(range(len(cities), len(stops)))
+    if missing:
+        report["errors"]["cities"] = [f"{len(stops) - len(cities)} of {len(stops)} cities missing"]
+    if report["coerced"]:
+        _count(fields_coerced=1)
+
+    targets = []
+    for i in invalid + missing:
+        stop = stops[i] if i < len(stops) else _stop_from_block(cities[i])
+        if stop is None or agent is None:
+            continue
+        targets.append((i, stop))
+
+    if targets:
+        logger.info("Re-generating %d invalid city block(s): %s", len(targets), report["errors"])
+        workers = max(1, min(max_workers, len(targets)))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="city-repair") as pool:
+            futures = [
+                pool.submit(contextvars.copy_context().run, plan_city, agent, stop, client_name)
+                for _, stop in targets
+            ]
+            blocks = [f.result() for f in futures]
+        cities = list(cities) + [None] * (len(stops) - len(cities))
+        for (i, _), block in zip(targets, blocks):
+            check_city_block(block)
+            cities[i] = block
+        cities = [c for c in cities if c is not None]
+        report["regenerated"] = [i for i, _ in targets]
+        _count(blocks_regenerated=len(targets), plans_with_regeneration=1)
+
+    # Blocks that are still not objects are dropped; other leftovers render with N/A fields.
+    plan["cities"] = [c for c in cities if isinstance(c, dict)]
+    if not plan["cities"]:
+        _count(unusable=1)
+        return None, report
+
+    if any(not _is_text(plan.get(k)) or not plan[k].strip() for k in ("executive_summary", "scope")):
+        summary = summarize_plan(plan["cities"])
+        for k in ("executive_summary", "scope"):
+            if not _is_text(plan.get(k)) or not plan[k].strip():
+                plan[k] = summary[k]
+                report["errors"].setdefault("plan", []).append(f"{k} missing")
+
+    if not repairs and not report["errors"] and not report["coerced"]:
+        _count(valid=1)
+    return plan, report
+
+
+def validation_stats() -> Dict[str, Any]:
+    """Counters plus repair/regeneration rates over all validated outputs."""
+    with _lock:
+        out: Dict[str, Any] = dict(_stats)
+    plans = out["plans"] or 1
+    out["repair_rate"] = round(out["json_repaired"] / plans, 3)
+    out["regeneration_rate"] = round(out["plans_with_regeneration"] / plans, 3)
+    out["valid_rate"] = round(out["valid"] / plans, 3)
+    return out
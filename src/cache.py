@@ -0,0 +1,284 @@
+# src/cache.py
+from __future__ import annotations
+
+import json
+import math
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple, Union
+
+_WS_RE = re.compile(r"\s+")
+
+
+def normalize_key_part(text: str) -> str:
+    """Case/whitespace-insensitive form used in cache keys ("  CN  Tower, " -> "cn tower")."""
+    return _WS_RE.sub(" ", (text or "").casefold()).strip(" ,.;")
+
+
+def snap_to_grid(lat: float, lng: float, step_deg: float) -> Tuple[float, float]:
+    """Snap coordinates to a step_deg grid so nearby points share one cache key."""
+    if step_deg <= 0:
+        return float(lat), float(lng)
+    digits = max(0, -int(math.floor(math.log10(step_deg))) + 1)
+    return (
+        round(round(float(lat) / step_deg) * step_deg, digits),
+        round(round(float(lng) / step_deg) * step_deg, digits),
+    )
+
+
+def seconds_until_next_boundary(period_seconds: float, now: Optional[float] = None) -> float:
+    """Seconds until the next wall-clock multiple of period_seconds (e.g. the next model run)."""
+    now = time.time() if now is None else now
+    if period_seconds <= 0:
+        return 0.0
+    return period_seconds - (now % period_seconds)
+
+
+class _Pending:
+    __slots__ = ("event", "value", "error")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.value: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """
+    Collapse concurrent identical calls: the first caller for a key runs fn,
+    callers arriving while it is in flight wait and share its result (or error).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._inflight: Dict[Hashable, _Pending] = {}
+        self._stats = {"calls": 0, "executed": 0, "collapsed": 0}
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """Return (value, shared) where shared=True means another caller's result was reused."""
+        with self._lock:
+            self._stats["calls"] += 1
+            pending = self._inflight.get(key)
+            leader = pending is None
+            if leader:
+                pending = self._inflight[key] = _Pending()
+                self._stats["executed"] += 1
+            else:
+                self._stats["collapsed"] += 1
+
+        if not leader:
+            pending.event.wait()
+            if pending.error is not None:
+                raise pending.error
+            return pending.value, True
+
+        try:
+            pending.value = fn()
+            return pending.value, False
+        except BaseException as e:
+            pending.error = e
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            pending.event.set()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            out = dict(self._stats)
+            out["in_flight"] = len(self._inflight)
+        return out
+
+
+_MISSING = object()
+
+
+class TTLCache:
+    """
+    Thread-safe in-process LRU cache with per-entry TTL.
+
+    get_or_set() also coalesces concurrent misses: the first caller computes the
+    value while other callers for the same key wait and share its result.
+    """
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._flight = SingleFlight()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "shared": 0, "evictions": 0}
+
+    def _get_locked(self, key: Hashable) -> Any:
+        item = self._data.get(key)
+        if item is None:
+            return _MISSING
+        expires_at, value = item
+        if expires_at <= time.time():
+            del self._data[key]
+            return _MISSING
+        self._data.move_to_end(key)
+        return value
+
+    def _set_locked(self, key: Hashable, value: Any, ttl_seconds: float) -> None:
+        if ttl_seconds <= 0:
+            return
+        self._data[key] = (time.time() + ttl_seconds, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+            self._stats["evictions"] += 1
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            value = self._get_locked(key)
+            if value is _MISSING:
+                self._stats["misses"] += 1
+                return default
+            self._stats["hits"] += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl_seconds: float) -> None:
+        with self._lock:
+            self._set_locked(key, value, ttl_seconds)
+
+    def get_or_set(
+        self,
+        key: Hashable,
+        compute: Callable[[], Any],
+        ttl: Union[float, Callable[[Any], float]],
+    ) -> Any:
+        """
+        Return the cached value for key, or compute and store it.
+        ttl may be a number of seconds or a function of the computed value
+        (return <= 0 to skip caching, e.g. for error payloads).
+        """
+        with self._lock:
+            value = self._get_locked(key)
+            if value is not _MISSING:
+                self._stats["hits"] += 1
+                return value
+
+        def _compute_and_store():
+            value = compute()
+            ttl_seconds = ttl(value) if callable(ttl) else ttl
+            with self._lock:
+                self._set_locked(key, value, ttl_seconds)
+            return value
+
+        value, shared = self._flight.do(key, _compute_and_store)
+        with self._lock:
+            self._stats["shared" if shared else "misses"] += 1
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            out: Dict[str, Any] = dict(self._stats)
+            out["entries"] = len(self._data)
+        lookups = out["hits"] + out["misses"] + out["shared"]
+        out["hit_rate"] = round((out["hits"] + out["shared"]) / lookups, 3) if lookups else 0.0
+        return out
+
+
+class SqliteTTLCache:
+    """
+    Small disk-backed key/value cache with per-entry TTL and LRU eviction.
+
+    - Values are stored as JSON text.
+    - One connection per thread; WAL mode lets several Streamlit workers/processes
+      read and write the same file safely.
+    - When the table grows past max_entries, the least recently used rows are evicted.
+    """
+
+    def __init__(self, path: Path, table: str = "cache", max_entries: int = 5000):
+        self.path = Path(path)
+        self.table = table
+        self.max_entries = max_entries
+        self._local = threading.local()
+        self._stats_lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "expired": 0, "sets": 0, "evictions": 0}
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {self.table} ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+                "expires_at REAL NOT NULL, last_access REAL NOT NULL)"
+            )
+            conn.execute(
+                f"CREATE INDEX IF NOT EXISTS {self.table}_last_access ON {self.table}(last_access)"
+            )
+            self._local.conn = conn
+        return conn
+
+    def count(self, name: str, n: int = 1) -> None:
+        with self._stats_lock:
+            self._stats[name] = self._stats.get(name, 0) + n
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        """Return (found, value). Expired rows are deleted and reported as a miss."""
+        now = time.time()
+        conn = self._conn()
+        row = conn.execute(
+            f"SELECT value, expires_at FROM {self.table} WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            self.count("misses")
+            return False, None
+        value, expires_at = row
+        if expires_at <= now:
+            conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+            self.count("expired")
+            self.count("misses")
+            return False, None
+        conn.execute(f"UPDATE {self.table} SET last_access = ? WHERE key = ?", (now, key))
+        self.count("hits")
+        return True, json.loads(value)
+
+    def set(self, key: str, value: Any, ttl_seconds: float) -> None:
+        now = time.time()
+        conn = self._conn()
+        conn.execute(
+            f"INSERT OR REPLACE INTO {self.table} (key, value, expires_at, last_access) VALUES (?, ?, ?, ?)",
+            (key, json.dumps(value, ensure_ascii=False), now + ttl_seconds, now),
+        )
+        self.count("sets")
+        self._evict(conn)
+
+    def delete(self, key: str) -> None:
+        self._conn().execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        (size,) = conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()
+        overflow = size - self.max_entries
+        if overflow <= 0:
+            return
+        cur = conn.execute(
+            f"DELETE FROM {self.table} WHERE key IN ("
+            f"SELECT key FROM {self.table} ORDER BY last_access ASC LIMIT ?)",
+            (overflow,),
+        )
+        self.count("evictions", cur.rowcount or 0)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            out: Dict[str, Any] = dict(self._stats)
+        lookups = out["hits"] + out["misses"]
+        out["hit_rate"] = round(out["hits"] / lookups, 3) if lookups else 0.0
+        try:
+            (out["entries"],) = self._conn().execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()
+        except sqlite3.Error:
+            out["entries"] = None
+        return out
@@ -1,32 +1,117 @@
 from pathlib import Path
 from dotenv import load_dotenv
 
+import hashlib
+import logging
 import os
 
-# Force-load .env from the project root (travel_agent_uv/.env)
+# Load .env from the project root (travel_agent_uv/.env); variables already set in the
+# process environment (tests, workers, CI) take precedence over the file.
 ROOT = Path(__file__).resolve().parents[1]  # src/ -> project root
-load_dotenv(dotenv_path=ROOT / ".env", override=True)
+load_dotenv(dotenv_path=ROOT / ".env", override=False)
 
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "")
 OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
 GOOGLE_MAPS_API_KEY = os.getenv("GOOGLE_MAPS_API_KEY", "")
 BAD_AQI_THRESHOLD = int(os.getenv("BAD_AQI_THRESHOLD", "100"))
 
+# Memoized suggest_attractions results per city
+ATTRACTIONS_CACHE_TTL_HOURS = float(os.getenv("ATTRACTIONS_CACHE_TTL_HOURS", "24"))
+
+# Attach unprojected tool payloads to what the model sees (debugging only; costs tokens)
+TOOL_DEBUG_RAW = os.getenv("TOOL_DEBUG_RAW", "0") == "1"
+
+# Pre-enrichment: fetch places/weather/air quality for parsed trips before the agent runs
+PREENRICH_DEFAULT = os.getenv("PREENRICH_DEFAULT", "1") == "1"
+PREENRICH_WORKERS = int(os.getenv("PREENRICH_WORKERS", "8"))
+
+# Replace a city's tool results with one short digest once the agent has moved on to the next city
+CONTEXT_COMPACTION = os.getenv("CONTEXT_COMPACTION", "1") == "1"
+
+# Map-reduce planner: plan each city in its own agent run, then summarize
+PARALLEL_CITY_PLANNING = os.getenv("PARALLEL_CITY_PLANNING", "0") == "1"
+PARALLEL_CITY_WORKERS = int(os.getenv("PARALLEL_CITY_WORKERS", "4"))
+
+# Upstream base URLs (point these at the local stand-ins in src/offline/standins.py for offline runs)
+_DEFAULT_BASE_URLS = ("https://places.googleapis.com", "https://airquality.googleapis.com", "https://api.open-meteo.com")
+GOOGLE_PLACES_BASE_URL = os.getenv("GOOGLE_PLACES_BASE_URL", _DEFAULT_BASE_URLS[0]).rstrip("/")
+GOOGLE_AIR_QUALITY_BASE_URL = os.getenv("GOOGLE_AIR_QUALITY_BASE_URL", _DEFAULT_BASE_URLS[1]).rstrip("/")
+OPEN_METEO_BASE_URL = os.getenv("OPEN_METEO_BASE_URL", _DEFAULT_BASE_URLS[2]).rstrip("/")
+# Suffix for the persistent cache files: runs against other upstreams (stand-ins, proxies)
+# get their own SQLite files, so their results never reach the real caches.
+_BASE_URLS = (GOOGLE_PLACES_BASE_URL, GOOGLE_AIR_QUALITY_BASE_URL, OPEN_METEO_BASE_URL)
+UPSTREAM_CACHE_SUFFIX = (
+    "" if _BASE_URLS == _DEFAULT_BASE_URLS
+    else "-" + hashlib.sha256("|".join(_BASE_URLS).encode("utf-8")).hexdigest()[:12]
+)
+
+# Shared HTTP transport for upstream tool APIs (Places, Air Quality, Open-Meteo)
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "10"))
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "25"))
+HTTP_MAX_RETRIES = int(os.getenv("HTTP_MAX_RETRIES", "2"))
+HTTP_BACKOFF_BASE = float(os.getenv("HTTP_BACKOFF_BASE", "0.5"))
+HTTP_PRECONNECT = os.getenv("HTTP_PRECONNECT", "0") == "1"
+HTTP_COALESCE = os.getenv("HTTP_COALESCE", "1") == "1"
+# Threads used to run blocking tool I/O for the async agent path
+ASYNC_IO_WORKERS = int(os.getenv("ASYNC_IO_WORKERS", "32"))
 
-if not OPENAI_API_KEY:
-    raise RuntimeError("Missing OPENAI_API_KEY in .env")
-if not GOOGLE_MAPS_API_KEY:
-    raise RuntimeError("Missing GOOGLE_MAPS_API_KEY in .env")
+# Record/replay of upstream HTTP + OpenAI calls: off | record | replay (src/offline/cassette.py)
+CASSETTE_MODE = os.getenv("CASSETTE_MODE", "off")
+CASSETTE_PATH = Path(os.getenv("CASSETTE_PATH", str(ROOT / "cassettes" / "default.json")))
+# In replay, sleep for the recorded upstream latency so timings stay comparable
+CASSETTE_REPLAY_LATENCY = os.getenv("CASSETTE_REPLAY_LATENCY", "0") == "1"
+
+# Persistent geocode/address cache (SQLite, shared across threads and processes).
+# Off while a cassette is recording or replaying: hits from a cache the cassette
+# does not carry would skip calls on one side only and break replay.
+CACHE_DIR = Path(os.getenv("CACHE_DIR", str(ROOT / ".cache")))
+GEOCODE_CACHE_ENABLED = os.getenv("GEOCODE_CACHE_ENABLED", "1") == "1" and CASSETTE_MODE == "off"
+GEOCODE_CACHE_TTL_DAYS = float(os.getenv("GEOCODE_CACHE_TTL_DAYS", "30"))
+GEOCODE_NEGATIVE_TTL_HOURS = float(os.getenv("GEOCODE_NEGATIVE_TTL_HOURS", "24"))
+GEOCODE_CACHE_MAX_ENTRIES = int(os.getenv("GEOCODE_CACHE_MAX_ENTRIES", "5000"))
+PLACES_BATCH_WORKERS = int(os.getenv("PLACES_BATCH_WORKERS", "8"))
+
+# Per-plan tracing (LLM steps, tool calls, upstream HTTP); set a path to "" to skip that export
+TRACE_ENABLED = os.getenv("TRACE_ENABLED", "1") == "1"
+TRACE_JSONL_PATH = os.getenv("TRACE_JSONL_PATH", str(CACHE_DIR / "traces.jsonl"))
+TRACE_PROM_PATH = os.getenv("TRACE_PROM_PATH", str(CACHE_DIR / "metrics.prom"))
+
+# Persistent full-plan cache (same SQLite directory as the geocode cache; off with a cassette too)
+PLAN_CACHE_ENABLED = os.getenv("PLAN_CACHE_ENABLED", "1") == "1" and CASSETTE_MODE == "off"
+PLAN_CACHE_MAX_ENTRIES = int(os.getenv("PLAN_CACHE_MAX_ENTRIES", "500"))
+PLAN_CACHE_MAX_TTL_HOURS = float(os.getenv("PLAN_CACHE_MAX_TTL_HOURS", "24"))
+
+# In-process Open-Meteo forecast cache
+WEATHER_GRID_DEG = float(os.getenv("WEATHER_GRID_DEG", "0.05"))
+WEATHER_MODEL_UPDATE_HOURS = float(os.getenv("WEATHER_MODEL_UPDATE_HOURS", "1"))
+WEATHER_CACHE_MAX_ENTRIES = int(os.getenv("WEATHER_CACHE_MAX_ENTRIES", "512"))
+# Days ahead Open-Meteo is queried for; later dates use bundled climate normals instead
+WEATHER_HORIZON_DAYS = int(os.getenv("WEATHER_HORIZON_DAYS", "10"))
+CLIMATE_MAX_DISTANCE_KM = float(os.getenv("CLIMATE_MAX_DISTANCE_KM", "300"))
+
+# In-process Air Quality cache + "forecast unsupported here" memo
+AQ_GRID_DEG = float(os.getenv("AQ_GRID_DEG", "0.05"))
+AQ_CACHE_TTL_MINUTES = float(os.getenv("AQ_CACHE_TTL_MINUTES", "15"))
+AQ_UNSUPPORTED_GRID_DEG = float(os.getenv("AQ_UNSUPPORTED_GRID_DEG", "1.0"))
+AQ_UNSUPPORTED_TTL_HOURS = float(os.getenv("AQ_UNSUPPORTED_TTL_HOURS", "24"))
 
 
 # Travel constraints (course policy)
 BLOCKED_COUNTRIES = {"North Korea"}
 ALLOWED_REGIONS = {"North America", "Asia"}
 
-import logging
 logger = logging.getLogger("travel_agent")
 
-if OPENAI_API_KEY:
+
+def validate_config() -> None:
+    """
+    Startup check for the settings the app cannot run without (app.py calls it once).
+    Importing this module never raises, so tools, benchmarks and tests can load it
+    without credentials.
+    """
+    if not OPENAI_API_KEY:
+        raise RuntimeError("Missing OPENAI_API_KEY in .env")
+    if not GOOGLE_MAPS_API_KEY:
+        raise RuntimeError("Missing GOOGLE_MAPS_API_KEY in .env")
     logger.info("OPENAI_API_KEY loaded (prefix): %s", OPENAI_API_KEY[:12])
-else:
-    logger.warning("OPENAI_API_KEY is missing")
@@ -0,0 +1,30 @@
+# src/llm.py
+from __future__ import annotations
+
+import threading
+from typing import Dict, Optional
+
+from langchain_openai import ChatOpenAI
+
+from .config import OPENAI_API_KEY, OPENAI_MODEL
+
+_lock = threading.Lock()
+_clients: Dict[Optional[float], ChatOpenAI] = {}
+
+
+def get_chat_model(temperature: Optional[float] = None) -> ChatOpenAI:
+    """
+    Process-wide ChatOpenAI client (one per temperature), so every caller shares
+    the same underlying HTTP connection pool instead of building a new client per call.
+    """
+    llm = _clients.get(temperature)
+    if llm is not None:
+        return llm
+    with _lock:
+        llm = _clients.get(temperature)
+        if llm is None:
+            kwargs = {} if temperature is None else {"temperature": temperature}
+            # stream_usage: token counts are reported for streamed runs too (see src/tracing.py)
+            llm = ChatOpenAI(api_key=OPENAI_API_KEY, model=OPENAI_MODEL, stream_usage=True, **kwargs)
+            _clients[temperature] = llm
+    return llm
@@ -0,0 +1,225 @@
+# src/offline/cassette.py
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+import warnings
+from datetime import date
+from pathlib import Path
+from typing import Any, Dict, Optional, Sequence
+from urllib.parse import urlsplit
+
+import requests
+from langchain_core.caches import BaseCache
+from langchain_core.globals import set_llm_cache
+from langchain_core.load import dumpd, load
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, Generation
+
+from ..config import CASSETTE_MODE, CASSETTE_PATH, CASSETTE_REPLAY_LATENCY
+
+logger = logging.getLogger("travel_agent")
+
+MODES = ("off", "record", "replay")
+# Request headers that change the response (API keys and the like are left out of the key).
+_KEY_HEADERS = ("x-goog-fieldmask",)
+_LLM_CLASSES = [ChatGeneration, ChatGenerationChunk, Generation, AIMessage, AIMessageChunk]
+# Message fields that differ between a live reply and the same reply served from the
+# cassette (run ids, token usage, provider metadata); they never change what the model sees.
+_VOLATILE_MESSAGE_FIELDS = ("id", "usage_metadata", "response_metadata")
+
+
+class CassetteMiss(LookupError):
+    """Replay mode got a request that was never recorded."""
+
+
+def _digest(obj: Any) -> str:
+    text = json.dumps(obj, ensure_ascii=False, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def llm_prompt_key(prompt: str, llm_string: str) -> str:
+    """Digest of a serialized chat prompt with the volatile per-message fields removed."""
+    try:
+        messages = json.loads(prompt)
+    except ValueError:
+        return _digest([prompt, llm_string])
+    if isinstance(messages, list):
+        for m in messages:
+            kwargs = m.get("kwargs") if isinstance(m, dict) else None
+            if isinstance(kwargs, dict):
+                for field in _VOLATILE_MESSAGE_FIELDS:
+                    kwargs.pop(field, None)
+    return _digest([messages, llm_string])
+
+
+def http_request_key(method: str, url: str, kwargs: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Canonical request: method, path (no scheme/host, so recordings made against the
+    stand-ins replay against the real base URLs and vice versa), params, body and
+    the response-shaping headers. Secrets are never part of it.
+    """
+    headers = {k.lower(): v for k, v in (kwargs.get("headers") or {}).items()}
+    return {
+        "method": method.upper(),
+        "path": urlsplit(url).path,
+        "params": kwargs.get("params"),
+        "json": kwargs.get("json"),
+        "headers": {k: headers[k] for k in _KEY_HEADERS if k in headers},
+    }
+
+
+class Cassette:
+    """
+    One JSON file of recorded upstream HTTP responses and LLM generations.
+
+    - record: calls go out as usual; every response is written to the file
+      (replacing an older recording of the same request).
+    - replay: calls are answered from the file; an unrecorded call raises CassetteMiss.
+    The file is rewritten after each new recording, so an interrupted run keeps what it got.
+
+    The file also stores the date it was recorded on; while replaying, reference_date()
+    returns it so date-relative decisions (forecast window vs. climatology) make the
+    same requests they made when recording.
+    """
+
+    def __init__(self, path: Path, mode: str):
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Cassette mode must be 'record' or 'replay', got {mode!r}")
+        self.path = Path(path)
+        self.mode = mode
+        self._lock = threading.Lock()
+        self._data: Dict[str, Dict[str, Any]] = {"http": {}, "llm": {}}
+        self.stats = {"http_hits": 0, "http_recorded": 0, "llm_hits": 0, "llm_recorded": 0, "misses": 0}
+        self.today = date.today()
+        if self.path.exists():
+            loaded = json.loads(self.path.read_text(encoding="utf-8"))
+            self._data["http"].update(loaded.get("http") or {})
+            self._data["llm"].update(loaded.get("llm") or {})
+            if mode == "replay" and loaded.get("today"):
+                self.today = date.fromisoformat(loaded["today"])
+        elif mode == "replay":
+            raise FileNotFoundError(f"No cassette at {self.path} (record one with CASSETTE_MODE=record)")
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == "replay"
+
+    def _save_locked(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+        tmp.write_text(json.dumps({"version": 1, "today": self.today.isoformat(), **self._data}, ensure_ascii=False, indent=1, sort_keys=True), encoding="utf-8")
+        os.replace(tmp, self.path)
+
+    # ---- HTTP ----
+    def record_http(self, method: str, url: str, kwargs: Dict[str, Any], resp: requests.Response, seconds: float) -> None:
+        request = http_request_key(method, url, kwargs)
+        entry = {
+            "request": request,
+            "status": resp.status_code,
+            "content_type": resp.headers.get("Content-Type", ""),
+            "body": resp.text,
+            "elapsed_ms": round(seconds * 1000, 1),
+        }
+        with self._lock:
+            self._data["http"][_digest(request)] = entry
+            self.stats["http_recorded"] += 1
+            self._save_locked()
+
+    def replay_http(self, method: str, url: str, kwargs: Dict[str, Any]) -> requests.Response:
+        request = http_request_key(method, url, kwargs)
+        with self._lock:
+            entry = self._data["http"].get(_digest(request))
+            self.stats["misses" if entry is None else "http_hits"] += 1
+        if entry is None:
+            raise CassetteMiss(f"No recorded response for {request['method']} {request['path']} in {self.path}")
+        if CASSETTE_REPLAY_LATENCY:
+            time.sleep(entry.get("elapsed_ms", 0) / 1000)
+
+        resp = requests.Response()
+        resp.status_code = entry["status"]
+        resp._content = entry["body"].encode("utf-8")
+        resp.encoding = "utf-8"
+        resp.headers["Content-Type"] = entry.get("content_type") or "application/json"
+        resp.url = url
+        resp.reason = "Replayed"
+        return resp
+
+    # ---- LLM ----
+    def lookup_llm(self, prompt: str, llm_string: str) -> Optional[Sequence[Generation]]:
+        if not self.replaying:
+            return None  # record mode always calls the API (and overwrites the entry)
+        with self._lock:
+            entry = self._data["llm"].get(llm_prompt_key(prompt, llm_string))
+            self.stats["misses" if entry is None else "llm_hits"] += 1
+        if entry is None:
+            raise CassetteMiss(f"No recorded LLM reply for this prompt in {self.path}")
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            return [load(g, allowed_objects=_LLM_CLASSES) for g in entry["generations"]]
+
+    def record_llm(self, prompt: str, llm_string: str, generations: Sequence[Generation]) -> None:
+        with self._lock:
+            self._data["llm"][llm_prompt_key(prompt, llm_string)] = {"generations": [dumpd(g) for g in generations]}
+            self.stats["llm_recorded"] += 1
+            self._save_locked()
+
+
+class CassetteLLMCache(BaseCache):
+    """LangChain LLM cache backed by a Cassette (ChatOpenAI consults it before calling the API)."""
+
+    def __init__(self, cassette: Cassette):
+        self._cassette = cassette
+
+    def lookup(self, prompt: str, llm_string: str):
+        return self._cassette.lookup_llm(prompt, llm_string)
+
+    def update(self, prompt: str, llm_string: str, return_val) -> None:
+        if self._cassette.mode == "record":
+            self._cassette.record_llm(prompt, llm_string, return_val)
+
+    def clear(self, **kwargs: Any) -> None:
+        pass
+
+
+_active: Optional[Cassette] = None
+
+
+def active_cassette() -> Optional[Cassette]:
+    return _active
+
+
+def reference_date() -> date:
+    """Today's date, or the recording date while a cassette is replaying."""
+    if _active is not None and _active.replaying:
+        return _active.today
+    return date.today()
+
+
+def use_cassette(path: Path, mode: str) -> Optional[Cassette]:
+    """
+    Process-wide switch: route upstream HTTP (src/tools/http_client.py) and every
+    ChatOpenAI call through a cassette. mode="off" removes it again.
+    """
+    global _active
+    if mode not in MODES:
+        raise ValueError(f"CASSETTE_MODE must be one of {MODES}, got {mode!r}")
+    if mode == "off":
+        _active = None
+        set_llm_cache(None)
+        return None
+    _active = Cassette(path, mode)
+    set_llm_cache(CassetteLLMCache(_active))
+    logger.info("Cassette %s: %s", mode, _active.path)
+    return _active
+
+
+def use_cassette_from_config() -> Optional[Cassette]:
+    """Apply CASSETTE_MODE / CASSETTE_PATH (no-op when the mode is 'off')."""
+    if CASSETTE_MODE == "off":
+        return None
+    return use_cassette(CASSETTE_PATH, CASSETTE_MODE)
@@ -0,0 +1,332 @@
+# src/offline/standins.py
+"""
+Local stand-in servers for Google Places (searchText), Google Air Quality
+(forecast/currentConditions) and Open-Meteo (forecast).
+
+Responses are deterministic for a given request (derived from the query /
+coordinates), so runs are repeatable; latency and error injection are
+configurable so timings and retry paths can be exercised offline.
+
+    python -m src.offline.standins --port 8701 --latency-ms 120 --error-rate 0.02
+
+prints the environment variables that point the tools at the stand-ins.
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import math
+import random
+import threading
+import time
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+# Open-Meteo only serves roughly this many days ahead; later dates get its 400.
+FORECAST_LIMIT_DAYS = 16
+
+
+@dataclass
+class StandInConfig:
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    error_rate: float = 0.0       # share of requests answered with error_status
+    error_status: int = 503
+    aq_forecast_supported: bool = False  # the real forecast:lookup rejects our location-only body
+    seed: int = 0
+
+
+def _unit(*parts: Any) -> float:
+    """Stable pseudo-random number in [0, 1) for the given inputs."""
+    digest = hashlib.sha256("|".join(str(p) for p in parts).encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big") / 2 ** 64
+
+
+# -----------------------------
+# Fake payloads
+# -----------------------------
+def places_response(text_query: str) -> Dict[str, Any]:
+    q = (text_query or "").strip()
+    return {
+        "places": [{
+            "id": "standin-" + hashlib.sha1(q.lower().encode("utf-8")).hexdigest()[:16],
+            "displayName": {"text": q.split(",")[0].strip() or q, "languageCode": "en"},
+            "formattedAddress": f"{q} (stand-in address)",
+            "location": {
+                "latitude": round(-60 + 130 * _unit("lat", q.lower()), 6),
+                "longitude": round(-180 + 360 * _unit("lng", q.lower()), 6),
+            },
+        }]
+    }
+
+
+def _uaqi(lat: float, lng: float, when: str) -> Dict[str, Any]:
+    aqi = int(10 + 140 * _unit("aqi", round(lat, 2), round(lng, 2), when))
+    category = "Good air quality" if aqi <= 50 else "Moderate air quality" if aqi <= 100 else "Poor air quality"
+    return {"code": "uaqi", "displayName": "Universal AQI", "aqi": aqi, "category": category, "dominantPollutant": "pm25"}
+
+
+def air_quality_current(lat: float, lng: float) -> Dict[str, Any]:
+    hour = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0)
+    when = hour.strftime("%Y-%m-%dT%H:%M:%SZ")
+    return {"dateTime": when, "regionCode": "xx", "indexes": [_uaqi(lat, lng, when)]}
+
+
+def air_quality_forecast(lat: float, lng: float, hours: int = 96) -> Dict[str, Any]:
+    start = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0)
+    out = []
+    for h in range(hours):
+        when = (start + timedelta(hours=h)).strftime("%Y-%m-%dT%H:%M:%SZ")
+        out.append({"dateTime": when, "indexes": [_uaqi(lat, lng, when)]})
+    return {"hourlyForecasts": out, "regionCode": "xx"}
+
+
+def _hourly_value(var: str, lat: float, lng: float, day: date, hour: int) -> float:
+    seasonal = math.cos((day.timetuple().tm_yday - 200) / 365 * 2 * math.pi)
+    base = 25 - abs(lat) * 0.35 + (10 if lat >= 0 else -10) * seasonal
+    diurnal = 5 * math.sin((hour - 9) / 24 * 2 * math.pi)
+    noise = _unit(var, round(lat, 2), round(lng, 2), day.isoformat(), hour)
+    if var == "temperature_2m":
+        return round(base + diurnal + 2 * noise, 1)
+    if var == "apparent_temperature":
+        return round(base + diurnal - 2 + 3 * noise, 1)
+    if var == "precipitation_probability":
+        wet = _unit("wet", round(lat, 2), round(lng, 2), day.isoformat())
+        return float(int(100 * wet * noise))
+    if var in ("wind_speed_10m", "windspeed_10m"):
+        return round(5 + 40 * noise * _unit("windy", day.isoformat()), 1)
+    return round(noise, 3)
+
+
+def open_meteo_forecast(params: Dict[str, str]) -> Tuple[int, Dict[str, Any]]:
+    try:
+        lat = float(params["latitude"])
+        lng = float(params["longitude"])
+    except (KeyError, ValueError):
+        return 400, {"error": True, "reason": "latitude and longitude are required"}
+    today = date.today()
+    if params.get("start_date"):
+        try:
+            start = date.fromisoformat(params["start_date"])
+            end = date.fromisoformat(params.get("end_date") or params["start_date"])
+        except ValueError:
+            return 400, {"error": True, "reason": "Invalid date"}
+        if start < today - timedelta(days=92) or end > today + timedelta(days=FORECAST_LIMIT_DAYS - 1) or end < start:
+            return 400, {"error": True, "reason": "Parameter 'start_date' is out of allowed range"}
+    else:
+        start = today
+        end = today + timedelta(days=max(1, min(FORECAST_LIMIT_DAYS, int(params.get("forecast_days") or 7))) - 1)
+
+    variables = [v for v in (params.get("hourly") or "").split(",") if v]
+    times: List[str] = []
+    columns: Dict[str, List[float]] = {v: [] for v in variables}
+    day = start
+    while day <= end:
+        for hour in range(24):
+            times.append(f"{day.isoformat()}T{hour:02d}:00")
+            for v in variables:
+                columns[v].append(_hourly_value(v, lat, lng, day, hour))
+        day += timedelta(days=1)
+    units = {"temperature_2m": "°C", "apparent_temperature": "°C", "precipitation_probability": "%", "wind_speed_10m": "km/h"}
+    return 200, {
+        "latitude": lat,
+        "longitude": lng,
+        "timezone": "GMT",
+        "utc_offset_seconds": 0,
+        "hourly_units": {"time": "iso8601", **{v: units.get(v, "") for v in variables}},
+        "hourly": {"time": times, **columns},
+    }
+
+
+# -----------------------------
+# Servers
+# -----------------------------
+class _Handler(BaseHTTPRequestHandler):
+    server_version = "StandIn/1.0"
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real APIs
+    service = ""  # set per server class
+
+    def log_message(self, fmt, *args):  # keep test/benchmark output clean
+        pass
+
+    def _reply(self, status: int, payload: Dict[str, Any]) -> None:
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _injected(self) -> bool:
+        """Apply latency; return True if this request was answered with an injected error."""
+        standins: "StandIns" = self.server.standins  # type: ignore[attr-defined]
+        delay_ms, fail = standins.draw(self.service)
+        if delay_ms > 0:
+            time.sleep(delay_ms / 1000)
+        if fail:
+            cfg = standins.config
+            self._reply(cfg.error_status, {"error": {"code": cfg.error_status, "message": "Injected stand-in error"}})
+        return fail
+
+    def _json_body(self) -> Dict[str, Any]:
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            return json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            return {}
+
+    def do_HEAD(self):  # pre-connect
+        self.send_response(200)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def do_GET(self):
+        self._reply(404, {"error": {"code": 404, "message": f"Unknown path {self.path}"}})
+
+    def do_POST(self):
+        self._reply(404, {"error": {"code": 404, "message": f"Unknown path {self.path}"}})
+
+
+class _PlacesHandler(_Handler):
+    service = "places"
+
+    def do_POST(self):
+        if urlsplit(self.path).path != "/v1/places:searchText":
+            return super().do_POST()
+        if self._injected():
+            return
+        self._reply(200, places_response(self._json_body().get("textQuery", "")))
+
+
+class _AirQualityHandler(_Handler):
+    service = "air_quality"
+
+    def do_POST(self):
+        path = urlsplit(self.path).path
+        if path not in ("/v1/forecast:lookup", "/v1/currentConditions:lookup"):
+            return super().do_POST()
+        if self._injected():
+            return
+        loc = self._json_body().get("location") or {}
+        lat, lng = float(loc.get("latitude") or 0), float(loc.get("longitude") or 0)
+        if path == "/v1/currentConditions:lookup":
+            return self._reply(200, air_quality_current(lat, lng))
+        if not self.server.standins.config.aq_forecast_supported:  # type: ignore[attr-defined]
+            return self._reply(400, {"error": {"code": 400, "message": "Period or dateTime is required", "status": "INVALID_ARGUMENT"}})
+        self._reply(200, air_quality_forecast(lat, lng))
+
+
+class _OpenMeteoHandler(_Handler):
+    service = "open_meteo"
+
+    def do_GET(self):
+        parts = urlsplit(self.path)
+        if parts.path != "/v1/forecast":
+            return super().do_GET()
+        if self._injected():
+            return
+        params = {k: v[-1] for k, v in parse_qs(parts.query).items()}
+        status, payload = open_meteo_forecast(params)
+        self._reply(status, payload)
+
+
+_SERVICES = (
+    ("places", _PlacesHandler, "GOOGLE_PLACES_BASE_URL"),
+    ("air_quality", _AirQualityHandler, "GOOGLE_AIR_QUALITY_BASE_URL"),
+    ("open_meteo", _OpenMeteoHandler, "OPEN_METEO_BASE_URL"),
+)
+
+
+class StandIns:
+    """
+    The three stand-in servers, one port each (base_port, +1, +2; 0 = any free port),
+    so per-host stats and traces still tell Places, Air Quality and Open-Meteo apart.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", base_port: int = 0, config: Optional[StandInConfig] = None):
+        self.host = host
+        self.base_port = base_port
+        self.config = config or StandInConfig()
+        self._rng = random.Random(self.config.seed)
+        self._lock = threading.Lock()
+        self._servers: List[ThreadingHTTPServer] = []
+        self._threads: List[threading.Thread] = []
+        self.urls: Dict[str, str] = {}
+        self.counts: Dict[str, Dict[str, int]] = {name: {"requests": 0, "injected_errors": 0} for name, _, _ in _SERVICES}
+
+    def draw(self, service: str) -> Tuple[float, bool]:
+        cfg = self.config
+        with self._lock:
+            delay = cfg.latency_ms + (self._rng.uniform(0, cfg.jitter_ms) if cfg.jitter_ms > 0 else 0)
+            fail = cfg.error_rate > 0 and self._rng.random() < cfg.error_rate
+            self.counts[service]["requests"] += 1
+            self.counts[service]["injected_errors"] += int(fail)
+        return delay, fail
+
+    def start(self) -> "StandIns":
+        for i, (name, handler, _) in enumerate(_SERVICES):
+            port = self.base_port + i if self.base_port else 0
+            server = ThreadingHTTPServer((self.host, port), handler)
+            server.daemon_threads = True
+            server.standins = self  # type: ignore[attr-defined]
+            thread = threading.Thread(target=server.serve_forever, name=f"standin-{name}", daemon=True)
+            thread.start()
+            self._servers.append(server)
+            self._threads.append(thread)
+            self.urls[name] = f"http://{self.host}:{server.server_address[1]}"
+        return self
+
+    def stop(self) -> None:
+        for server in self._servers:
+            server.shutdown()
+            server.server_close()
+        self._servers.clear()
+        self._threads.clear()
+
+    def env(self) -> Dict[str, str]:
+        """Environment that points src/config.py's base URLs at these servers."""
+        return {var: self.urls[name] for name, _, var in _SERVICES}
+
+    def __enter__(self) -> "StandIns":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Run local stand-ins for Places, Air Quality and Open-Meteo.")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8701, help="first port; the others use +1 and +2")
+    ap.add_argument("--latency-ms", type=float, default=0.0)
+    ap.add_argument("--jitter-ms", type=float, default=0.0)
+    ap.add_argument("--error-rate", type=float, default=0.0)
+    ap.add_argument("--error-status", type=int, default=503)
+    ap.add_argument("--aq-forecast", action="store_true", help="answer forecast:lookup instead of rejecting it")
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+
+    cfg = StandInConfig(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        aq_forecast_supported=args.aq_forecast,
+        seed=args.seed,
+    )
+    standins = StandIns(args.host, args.port, cfg).start()
+    for k, v in standins.env().items():
+        print(f"export {k}={v}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        standins.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,6 @@
 # src/parsing.py
 import re
-from typing import List
+from typing import List, Tuple
 from .models import CityStop
 
 _CITY_RE = re.compile(r"^City\d+\s*:\s*(.+?)\s+(\d{4}-\d{2}-\d{2})\s*$", re.IGNORECASE)
@@ -14,6 +14,10 @@ _TIME_RE = re.compile(
     re.IGNORECASE
 )
 
+# City Explorer box header: "City: Toronto 2026-02-01" or "Toronto 2026-02-01"
+_CITY_HEADER_RE = re.compile(r"^\s*City\s*:\s*(.+?)\s+(\d{4}-\d{2}-\d{2})\s*$", re.IGNORECASE)
+_SIMPLE_HEADER_RE = re.compile(r"^\s*(.+?)\s+(\d{4}-\d{2}-\d{2})\s*$")
+
 def parse_trip_text(raw: str) -> List[CityStop]:
     lines = [ln.strip() for ln in raw.splitlines() if ln.strip()]
     stops: List[CityStop] = []
@@ -52,3 +56,44 @@ def parse_trip_text(raw: str) -> List[CityStop]:
         raise ValueError("No cities found. Use: City1: <City> YYYY-MM-DD")
 
     return stops
+
+
+def split_activity(activity: str) -> Tuple[str, str, str]:
+    """Split a normalized activity ("Place;start-end" or "Place") into (place, start, end)."""
+    place, _, times = (activity or "").partition(";")
+    start, _, end = times.partition("-")
+    return place.strip(), start.strip(), end.strip()
+
+
+def parse_city_explorer_box(raw: str):
+    """
+    One box behavior:
+    - First non-empty line must contain "City: Toronto 2026-02-01" OR "Toronto 2026-02-01"
+    - Optional following lines: activities like "CN Tower;09:00-11:00" or just "CN Tower"
+    Returns: (city, date, has_activities, normalized_trip_text_for_parse_trip_text)
+    """
+    lines = [ln.strip() for ln in (raw or "").splitlines() if ln.strip()]
+    if not lines:
+        raise ValueError("Please enter at least: City and Date (e.g., Toronto 2026-02-01).")
+
+    head = lines[0]
+    city = ""
+    date = ""
+
+    m = _CITY_HEADER_RE.match(head)
+    if m:
+        city, date = m.group(1).strip(), m.group(2).strip()
+    else:
+        m2 = _SIMPLE_HEADER_RE.match(head)
+        if not m2:
+            raise ValueError("First line must look like: Toronto 2026-02-01 (or: City: Toronto 2026-02-01).")
+        city, date = m2.group(1).strip(), m2.group(2).strip()
+
+    activity_lines = lines[1:]
+    has_activities = len(activity_lines) > 0
+
+    # Build a mini "Trip Input" format that your existing parser understands:
+    # City1: <City> <Date>
+    normalized = [f"City1: {city} {date}"]
+    normalized.extend(activity_lines)
+    return city, date, has_activities, "\n".join(normalized)
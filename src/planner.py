@@ -1,9 +1,14 @@
 # src/planner.py
-from typing import List
+import json
+from typing import Any, Dict, List, Optional
 from .models import CityStop
 
 
-def build_agent_request(stops: List[CityStop], client_name: str = "") -> str:
+def build_agent_request(
+    stops: List[CityStop],
+    client_name: str = "",
+    prefetched: Optional[List[Dict[str, Any]]] = None,
+) -> str:
     lines = []
     if client_name:
         lines.append(f"Client: {client_name}")
@@ -25,6 +30,11 @@ def build_agent_request(stops: List[CityStop], client_name: str = "") -> str:
         else:
             lines.append("  * (no activities provided; suggest some)")
     lines.append("")
+    if prefetched:
+        lines.append("Pre-fetched tool data (one entry per city/day, same order as the trip input).")
+        lines.append("Use it directly; call tools only for items that are missing or have an \"error\" key:")
+        lines.append(json.dumps(prefetched, ensure_ascii=False, separators=(",", ":")))
+        lines.append("")
     lines.append("Output MUST be valid JSON only (no markdown, no backticks, no extra text).")
     return "\n".join(lines)
 
@@ -55,7 +65,7 @@ def build_city_explorer_request(
     lines.append("Tool steps (do these):")
     lines.append("1) Call city_latlng(city) to get lat/lng.")
     lines.append("2) Suggest 4–6 attractions and build a timed schedule.")
-    lines.append("3) For each attraction, call place_address(city, place_name) and use ONLY formatted_address in the schedule.")
+    lines.append("3) Call place_addresses(city, [all attraction names]) once and use ONLY formatted_address in the schedule.")
     lines.append("4) If date is provided, call weather(lat, lng, target_date) and air_quality(lat, lng) and summarize briefly.")
     lines.append("5) Provide a packing checklist (8+ items) based on expected conditions + essentials.")
     lines.append("")
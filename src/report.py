@@ -0,0 +1,144 @@
+# src/report.py
+from __future__ import annotations
+
+from typing import Any, Dict, List
+
+
+def _safe_str(x, default="N/A"):
+    s = (x if x is not None else "").strip() if isinstance(x, str) else x
+    return s if s else default
+
+
+def _schedule_lines(sched: List[Dict[str, Any]]) -> List[str]:
+    out = []
+    for s in sched:
+        start = _safe_str(s.get("start"), "")
+        end = _safe_str(s.get("end"), "")
+        activity = _safe_str(s.get("activity"), "")
+        address = _safe_str(s.get("address"), "")
+        time_range = f"{start}–{end}".strip("–")
+        out.append(f"{time_range} | {activity}")
+        if address and address != "N/A":
+            out.append(f" Address: {address}")
+    return out
+
+
+def format_city_section(c: Dict[str, Any]) -> str:
+    """One cities[i] block of the multi-city report (also rendered on its own while streaming)."""
+    out = []
+    city = _safe_str(c.get("city"), "Unknown City")
+    date = _safe_str(c.get("date"), "Unknown Date")
+
+    out.append("=" * 72)
+    out.append(f"{city} — {date}")
+    out.append("=" * 72)
+
+    insights = c.get("insights") or {}
+    out.append("Conditions & Guidance")
+    out.append("-" * 72)
+    out.append(f"Weather: {_safe_str(insights.get('weather'))}")
+    out.append(f"Umbrella: {_safe_str(insights.get('umbrella'))}")
+    out.append(f"Air Quality: {_safe_str(insights.get('air_quality'))}")
+    out.append("")
+
+    out.append("Schedule")
+    out.append("-" * 72)
+    sched = c.get("schedule") or []
+    if not sched:
+        out.append("No scheduled activities provided.")
+    else:
+        out.extend(_schedule_lines(sched))
+    out.append("")
+
+    packing = c.get("packing") or []
+    if packing:
+        out.append("Packing Checklist")
+        out.append("-" * 72)
+        for item in packing:
+            out.append(f"- {str(item).strip()}")
+        out.append("")
+
+    return "\n".join(out)
+
+
+def format_multi_city_report(plan: dict, generated_local: str, generated_iso: str, client_name: str = "") -> str:
+    out = []
+    out.append("Travel Planner — Itinerary")
+    out.append(f"Generated: {generated_local}")
+    out.append("TRAVEL ITINERARY REPORT")
+    out.append("=" * 72)
+
+    if client_name:
+        out.append(f"Prepared for: {client_name}")
+    out.append(f"Generated at: {generated_local}")
+    out.append(f"Scope: {_safe_str(plan.get('scope'))}")
+    out.append("")
+
+    out.append("EXECUTIVE SUMMARY")
+    out.append("-" * 72)
+    out.append(_safe_str(plan.get("executive_summary"), ""))
+    out.append("")
+
+    for c in (plan.get("cities") or []):
+        out.append(format_city_section(c))
+
+    return "\n".join(out)
+
+
+def format_city_explorer_report(plan: dict, generated_local: str, generated_iso: str, client_name: str = "") -> str:
+    # expected schema from build_city_explorer_request
+    city = _safe_str(plan.get("city"), "City")
+    date = _safe_str(plan.get("date"), "")
+    summary = _safe_str(plan.get("summary"), "")
+    weather = _safe_str(plan.get("weather"), "")
+    air = _safe_str(plan.get("air_quality"), "")
+
+    out = []
+    out.append("Travel Planner — City Explorer")
+    out.append(f"Generated: {generated_local}")
+    out.append("CITY VISIT PLAN")
+    out.append("=" * 72)
+
+    if client_name:
+        out.append(f"Prepared for: {client_name}")
+    out.append(f"Generated at: {generated_iso}")
+    out.append(f"Destination: {city}" + (f" — {date}" if date and date != "N/A" else ""))
+    out.append("")
+
+    out.append("SUMMARY")
+    out.append("-" * 72)
+    out.append(summary)
+    out.append("")
+
+    out.append("Conditions & Guidance")
+    out.append("-" * 72)
+    out.append(f"Weather: {weather}")
+    out.append(f"Air Quality: {air}")
+    out.append("")
+
+    out.append("Suggested Schedule")
+    out.append("-" * 72)
+    sched = plan.get("schedule") or []
+    if not sched:
+        out.append("No schedule was generated.")
+    else:
+        out.extend(_schedule_lines(sched))
+    out.append("")
+
+    tips = plan.get("tips") or []
+    if tips:
+        out.append("Practical Tips")
+        out.append("-" * 72)
+        for t in tips:
+            out.append(f"- {str(t).strip()}")
+        out.append("")
+
+    packing = plan.get("packing") or []
+    if packing:
+        out.append("Packing Checklist")
+        out.append("-" * 72)
+        for item in packing:
+            out.append(f"- {str(item).strip()}")
+        out.append("")
+
+    return "\n".join(out)
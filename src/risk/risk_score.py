@@ -1,61 +1,144 @@
 from __future__ import annotations
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 
-def compute_risk_score(weather: Optional[Dict[str, Any]], air_quality: Optional[Dict[str, Any]]) -> Dict[str, int]:
-    """Return risk scores as ints 0-10. Conservative/simple for explainability."""
-    weather_risk = 0
-    aq_risk = 0
+from ..tools.google_weather import date_span
 
-    # Weather risk (based on wind + precip probability if present)
-    if isinstance(weather, dict):
+
+def _column_max(col: Sequence[Any]) -> float:
+    """
+    max() over a column slice (list, array.array or NumPy); Open-Meteo nulls and
+    NaN readings are skipped (v == v is False only for NaN). 0 when nothing is left.
+    """
+    return max((v for v in col if v is not None and v == v), default=0)
+
+
+def _weather_risk(max_prob: float, max_wind: float) -> int:
+    # map to 0-10
+    # precip: 0%->0, 100%->10
+    risk = min(10, int(round(max_prob / 10)))
+    # wind: add up to +3 if very windy
+    if max_wind >= 50:
+        risk = min(10, risk + 3)
+    elif max_wind >= 35:
+        risk = min(10, risk + 2)
+    elif max_wind >= 25:
+        risk = min(10, risk + 1)
+    return risk
+
+
+def _weather_columns(weather: Dict[str, Any]) -> Tuple[Sequence[Any], Sequence[Any]]:
+    # open-meteo style: hourly.precipitation_probability / windspeed
+    hourly = weather.get("hourly", {})
+    probs = hourly.get("precipitation_probability")
+    winds = hourly.get("wind_speed_10m")
+    if winds is None:
+        winds = hourly.get("windspeed_10m")
+    return (probs if probs is not None else []), (winds if winds is not None else [])
+
+
+def score_weather_pairs(pairs: Sequence[Tuple[Optional[Dict[str, Any]], Optional[str]]]) -> List[int]:
+    """
+    Weather risk (0-10) for many (hourly payload, date) pairs, e.g. every city/date
+    of a trip, in one call. Each payload's columns are resolved once and each date
+    only reads its own slice (via the payload's date index). A date missing from
+    its payload, or a malformed pair, scores 0; a None date scores the whole window.
+    """
+    columns: Dict[int, Optional[Tuple[Sequence[Any], Sequence[Any]]]] = {}
+    out = []
+    for weather, d in pairs:
         try:
-            # open-meteo style: hourly.precipitation_probability / windspeed
-            hourly = weather.get("hourly", {})
-            probs = hourly.get("precipitation_probability") or []
-            winds = hourly.get("wind_speed_10m") or hourly.get("windspeed_10m") or []
-            max_prob = max(probs) if probs else 0
-            max_wind = max(winds) if winds else 0
-
-            # map to 0-10
-            # precip: 0%->0, 100%->10
-            weather_risk = min(10, int(round(max_prob / 10)))
-            # wind: add up to +3 if very windy
-            if max_wind >= 50:
-                weather_risk = min(10, weather_risk + 3)
-            elif max_wind >= 35:
-                weather_risk = min(10, weather_risk + 2)
-            elif max_wind >= 25:
-                weather_risk = min(10, weather_risk + 1)
+            key = id(weather)
+            if key not in columns:
+                columns[key] = _weather_columns(weather) if isinstance(weather, dict) else None
+            cols = columns[key]
+            if cols is None:
+                out.append(0)
+                continue
+            probs, winds = cols
+            span = (0, max(len(probs), len(winds))) if d is None else date_span(weather, d)
+            if span is None:
+                out.append(0)
+                continue
+            lo, hi = span
+            out.append(_weather_risk(_column_max(probs[lo:hi]), _column_max(winds[lo:hi])))
         except Exception:
-            weather_risk = 0
+            out.append(0)
+    return out
+
+
+def score_weather_batch(weather: Optional[Dict[str, Any]], target_dates: Sequence[Optional[str]]) -> List[int]:
+    """score_weather_pairs for many dates of one payload."""
+    return score_weather_pairs([(weather, d) for d in target_dates])
+
 
+def score_air_quality(air_quality: Optional[Dict[str, Any]]) -> int:
     # Air quality risk (UAQI)
-    if isinstance(air_quality, dict) and not air_quality.get("_error"):
-        try:
-            indexes = air_quality.get("indexes") or []
-            aqi = None
-            for idx in indexes:
-                if idx.get("code") == "uaqi":
-                    aqi = idx.get("aqi")
-                    break
-            if aqi is None and indexes:
-                aqi = indexes[0].get("aqi")
-
-            if isinstance(aqi, (int, float)):
-                # UAQI: lower is better; rough mapping:
-                # 0-50 -> 0-2, 51-100 -> 3-5, 101-150 -> 6-7, 151-200 -> 8, 201+ -> 9-10
-                if aqi <= 50:
-                    aq_risk = 2
-                elif aqi <= 100:
-                    aq_risk = 5
-                elif aqi <= 150:
-                    aq_risk = 7
-                elif aqi <= 200:
-                    aq_risk = 8
-                else:
-                    aq_risk = 10
-        except Exception:
-            aq_risk = 0
+    if not isinstance(air_quality, dict) or air_quality.get("_error"):
+        return 0
+    try:
+        indexes = air_quality.get("indexes") or []
+        aqi = None
+        for idx in indexes:
+            if idx.get("code") == "uaqi":
+                aqi = idx.get("aqi")
+                break
+        if aqi is None and indexes:
+            aqi = indexes[0].get("aqi")
+
+        if isinstance(aqi, (int, float)):
+            # UAQI: lower is better; rough mapping:
+            # 0-50 -> 0-2, 51-100 -> 3-5, 101-150 -> 6-7, 151-200 -> 8, 201+ -> 9-10
+            if aqi <= 50:
+                return 2
+            elif aqi <= 100:
+                return 5
+            elif aqi <= 150:
+                return 7
+            elif aqi <= 200:
+                return 8
+            else:
+                return 10
+    except Exception:
+        return 0
+    return 0
 
+
+def _combine(weather_risk: int, aq_risk: int) -> Dict[str, int]:
     overall = max(weather_risk, aq_risk)
     return {"weather_risk": int(weather_risk), "air_quality_risk": int(aq_risk), "overall_risk": int(overall)}
+
+
+def compute_risk_scores(
+    weather: Optional[Dict[str, Any]],
+    air_quality: Optional[Dict[str, Any]],
+    target_dates: Sequence[Optional[str]],
+) -> List[Dict[str, int]]:
+    """Batched compute_risk_score: one result per target date, air quality scored once."""
+    aq_risk = score_air_quality(air_quality)
+    return [_combine(w, aq_risk) for w in score_weather_batch(weather, target_dates)]
+
+
+def compute_risk_score_pairs(
+    items: Sequence[Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]], Optional[str]]],
+) -> List[Dict[str, int]]:
+    """compute_risk_score for many (weather, air_quality, date) items, e.g. all stops of a trip."""
+    weather_risks = score_weather_pairs([(w, d) for w, _, d in items])
+    aq_risks: Dict[int, int] = {}
+    out = []
+    for (_, aq, _), w in zip(items, weather_risks):
+        if id(aq) not in aq_risks:
+            aq_risks[id(aq)] = score_air_quality(aq)
+        out.append(_combine(w, aq_risks[id(aq)]))
+    return out
+
+
+def compute_risk_score(
+    weather: Optional[Dict[str, Any]],
+    air_quality: Optional[Dict[str, Any]],
+    target_date: Optional[str] = None,
+) -> Dict[str, int]:
+    """
+    Return risk scores as ints 0-10. Conservative/simple for explainability.
+    With target_date, weather risk only considers that day's hours.
+    """
+    return compute_risk_scores(weather, air_quality, [target_date])[0]
@@ -1,18 +1,42 @@
 from __future__ import annotations
+import json
+import re
 from typing import Any, Dict, List
-from langchain_openai import ChatOpenAI
 from langchain_core.messages import SystemMessage, HumanMessage
-from ..config import OPENAI_API_KEY, OPENAI_MODEL
+from ..cache import TTLCache, normalize_key_part
+from ..config import ATTRACTIONS_CACHE_TTL_HOURS
+from ..llm import get_chat_model
+
+_FALLBACK = ["Downtown walking area", "Main museum", "Top viewpoint", "Local market", "Popular park"]
+
+_SUGGESTIONS = TTLCache(max_entries=256)
+
 
 def suggest_attractions(city: str) -> List[str]:
-    llm = ChatOpenAI(api_key=OPENAI_API_KEY, model=OPENAI_MODEL, temperature=0.4)
+    """
+    Ask the LLM for popular attractions; memoized per normalized city so repeated
+    cities don't cost another nested LLM call. Fallback lists are not cached.
+    """
+    result = _SUGGESTIONS.get_or_set(
+        normalize_key_part(city),
+        lambda: _ask_llm(city),
+        ttl=lambda arr: 0 if arr is _FALLBACK else ATTRACTIONS_CACHE_TTL_HOURS * 3600,
+    )
+    return list(result)
+
+
+def attractions_cache_stats() -> Dict[str, Any]:
+    return _SUGGESTIONS.stats()
+
+
+def _ask_llm(city: str) -> List[str]:
+    llm = get_chat_model(temperature=0.4)
     msgs = [
         SystemMessage(content="Suggest 5-7 popular, safe tourist attractions for the city. Return ONLY a JSON array of strings."),
         HumanMessage(content=f"City: {city}"),
     ]
     txt = llm.invoke(msgs).content
     # very safe parse: extract JSON array
-    import json, re
     m = re.search(r"\[[\s\S]*\]", txt)
     if m:
         try:
@@ -22,4 +46,4 @@ def suggest_attractions(city: str) -> List[str]:
         except Exception:
             pass
     # fallback
-    return ["Downtown walking area", "Main museum", "Top viewpoint", "Local market", "Popular park"]
+    return _FALLBACK
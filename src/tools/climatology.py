@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import calendar
+import math
+import threading
+from array import array
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from ..config import CLIMATE_MAX_DISTANCE_KM
+
+CLIMATE_NORMALS_PATH = Path(__file__).resolve().parent / "data" / "climate_normals.csv"
+
+_FIELDS_PER_ROW = 36  # 12 x tmin, 12 x tmax, 12 x wet-day %
+
+
+class _NormalsTable:
+    """Bundled normals held in flat typed arrays (one row of 36 values per location)."""
+
+    def __init__(self, names: List[str], coords: array, values: array):
+        self.names = names
+        self.coords = coords  # lat0, lng0, lat1, lng1, ...
+        self.values = values  # row-major, _FIELDS_PER_ROW per location
+
+    @classmethod
+    def load(cls, path: Path) -> "_NormalsTable":
+        names: List[str] = []
+        coords = array("d")
+        values = array("f")
+        for line in path.read_text(encoding="utf-8").splitlines():
+            if not line.strip() or line.startswith("#"):
+                continue
+            parts = line.split(",")
+            names.append(parts[0])
+            coords.extend((float(parts[1]), float(parts[2])))
+            values.extend(float(v) for v in parts[3:3 + _FIELDS_PER_ROW])
+        return cls(names, coords, values)
+
+    def nearest(self, lat: float, lng: float) -> Optional[tuple]:
+        best, best_km = None, float("inf")
+        for i in range(len(self.names)):
+            km = _haversine_km(lat, lng, self.coords[2 * i], self.coords[2 * i + 1])
+            if km < best_km:
+                best, best_km = i, km
+        return (best, best_km) if best is not None else None
+
+
+_table: Optional[_NormalsTable] = None
+_table_lock = threading.Lock()
+
+
+def _get_table() -> _NormalsTable:
+    global _table
+    if _table is None:
+        with _table_lock:
+            if _table is None:
+                _table = _NormalsTable.load(CLIMATE_NORMALS_PATH)
+    return _table
+
+
+def _haversine_km(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    dp, dl = p2 - p1, math.radians(lng2 - lng1)
+    a = math.sin(dp / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dl / 2) ** 2
+    return 2 * 6371.0 * math.asin(math.sqrt(a))
+
+
+def monthly_normals(lat: float, lng: float, month: int) -> Optional[Dict[str, Any]]:
+    """
+    Typical conditions for month (1-12) at the nearest bundled location,
+    or None when nothing lies within CLIMATE_MAX_DISTANCE_KM.
+    """
+    if not 1 <= month <= 12:
+        return None
+    table = _get_table()
+    hit = table.nearest(float(lat), float(lng))
+    if hit is None or hit[1] > CLIMATE_MAX_DISTANCE_KM:
+        return None
+    i, km = hit
+    row = i * _FIELDS_PER_ROW
+    m = month - 1
+    return {
+        "reference": table.names[i],
+        "distance_km": round(km),
+        "month": calendar.month_name[month],
+        "min_temp_c": float(table.values[row + m]),
+        "max_temp_c": float(table.values[row + 12 + m]),
+        "wet_day_pct": float(table.values[row + 24 + m]),
+    }
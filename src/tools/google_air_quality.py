@@ -1,24 +1,76 @@
 from __future__ import annotations
-import requests
+import json
 from typing import Any, Dict
-from ..config import GOOGLE_MAPS_API_KEY, BAD_AQI_THRESHOLD
+from ..cache import TTLCache, snap_to_grid
+from ..config import (
+    GOOGLE_MAPS_API_KEY,
+    GOOGLE_AIR_QUALITY_BASE_URL,
+    BAD_AQI_THRESHOLD,
+    AQ_GRID_DEG,
+    AQ_CACHE_TTL_MINUTES,
+    AQ_UNSUPPORTED_GRID_DEG,
+    AQ_UNSUPPORTED_TTL_HOURS,
+)
+from . import http_client
 
-AQ_FORECAST_URL = "https://airquality.googleapis.com/v1/forecast:lookup"
-AQ_CURRENT_URL = "https://airquality.googleapis.com/v1/currentConditions:lookup"
+AQ_FORECAST_URL = f"{GOOGLE_AIR_QUALITY_BASE_URL}/v1/forecast:lookup"
+AQ_CURRENT_URL = f"{GOOGLE_AIR_QUALITY_BASE_URL}/v1/currentConditions:lookup"
+
+_AQ_CACHE = TTLCache(max_entries=512)
+# Coarse regions where forecast:lookup rejected the location -> go straight to current conditions.
+_FORECAST_UNSUPPORTED = TTLCache(max_entries=1024)
+# 400 messages that will repeat for the same body at that location (lower-case substrings):
+# an unsupported region, or the real API rejecting our location-only body.
+# Auth/quota errors (403), rate limits and other 4xx are not remembered.
+_UNSUPPORTED_MESSAGES = (
+    "information is unavailable for this location",
+    "period or datetime is required",
+)
 
 def _post(url: str, body: dict) -> Dict[str, Any]:
     headers = {"X-Goog-Api-Key": GOOGLE_MAPS_API_KEY, "Content-Type": "application/json"}
-    r = requests.post(url, headers=headers, json=body, timeout=30)
+    r = http_client.post_json(url, body, headers=headers)
     if not r.ok:
         return {"_error": True, "status_code": r.status_code, "body": r.text[:2000], "_url": url}
     return r.json()
 
+def _forecast_unsupported(fc: Dict[str, Any]) -> bool:
+    if fc.get("status_code") != 400:
+        return False
+    body = fc.get("body") or ""
+    try:
+        message = (json.loads(body).get("error") or {}).get("message") or ""
+    except (ValueError, AttributeError):
+        message = body
+    return any(m in message.lower() for m in _UNSUPPORTED_MESSAGES)
+
 def get_air_quality_forecast(lat: float, lng: float) -> Dict[str, Any]:
-    # Try forecast first (often unsupported)
-    fc = _post(AQ_FORECAST_URL, {"location": {"latitude": lat, "longitude": lng}})
-    if not fc.get("_error"):
-        fc["_mode"] = "forecast"
-        return fc
+    # Nearby points share a cache entry; the request itself carries the real coordinates.
+    data = _AQ_CACHE.get_or_set(
+        snap_to_grid(lat, lng, AQ_GRID_DEG),
+        lambda: _fetch_air_quality(lat, lng),
+        ttl=lambda aq: 0 if aq.get("_mode") == "error" else AQ_CACHE_TTL_MINUTES * 60,
+    )
+    return dict(data)
+
+
+def air_quality_cache_stats() -> Dict[str, Any]:
+    out = _AQ_CACHE.stats()
+    out["forecast_unsupported_regions"] = _FORECAST_UNSUPPORTED.stats()["entries"]
+    return out
+
+
+def _fetch_air_quality(lat: float, lng: float) -> Dict[str, Any]:
+    region = snap_to_grid(lat, lng, AQ_UNSUPPORTED_GRID_DEG)
+    fc = None
+    if not _FORECAST_UNSUPPORTED.get(region, False):
+        # Try forecast first (often unsupported)
+        fc = _post(AQ_FORECAST_URL, {"location": {"latitude": lat, "longitude": lng}})
+        if not fc.get("_error"):
+            fc["_mode"] = "forecast"
+            return fc
+        if _forecast_unsupported(fc):
+            _FORECAST_UNSUPPORTED.set(region, True, AQ_UNSUPPORTED_TTL_HOURS * 3600)
 
     # Fallback to current conditions
     cur = _post(AQ_CURRENT_URL, {"location": {"latitude": lat, "longitude": lng}})
@@ -26,8 +78,9 @@ def get_air_quality_forecast(lat: float, lng: float) -> Dict[str, Any]:
         cur["_mode"] = "current"
         return cur
 
-    fc["_mode"] = "error"
-    return fc
+    err = fc if fc is not None else cur
+    err["_mode"] = "error"
+    return err
 
 def mask_needed_and_count(aq_json: Dict[str, Any]) -> Dict[str, Any]:
     if aq_json.get("_error"):
@@ -1,9 +1,26 @@
 from __future__ import annotations
-import requests
-from typing import Any, Dict
-from ..config import GOOGLE_MAPS_API_KEY
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List
+from ..config import (
+    GOOGLE_MAPS_API_KEY,
+    GOOGLE_PLACES_BASE_URL,
+    PLACES_BATCH_WORKERS,
+    CACHE_DIR,
+    GEOCODE_CACHE_ENABLED,
+    GEOCODE_CACHE_TTL_DAYS,
+    GEOCODE_NEGATIVE_TTL_HOURS,
+    GEOCODE_CACHE_MAX_ENTRIES,
+    UPSTREAM_CACHE_SUFFIX,
+)
+from ..cache import SqliteTTLCache, normalize_key_part
+from . import http_client
 
-PLACES_TEXT_URL = "https://places.googleapis.com/v1/places:searchText"
+PLACES_TEXT_URL = f"{GOOGLE_PLACES_BASE_URL}/v1/places:searchText"
+
+_GEO_CACHE = SqliteTTLCache(
+    CACHE_DIR / f"geocode{UPSTREAM_CACHE_SUFFIX}.sqlite3", table="geocode", max_entries=GEOCODE_CACHE_MAX_ENTRIES
+)
 
 def _post_places(text_query: str) -> Dict[str, Any]:
     headers = {
@@ -13,12 +30,77 @@ def _post_places(text_query: str) -> Dict[str, Any]:
         "X-Goog-FieldMask": "places.displayName,places.formattedAddress,places.location,places.id",
     }
     body = {"textQuery": text_query}
-    r = requests.post(PLACES_TEXT_URL, headers=headers, json=body, timeout=30)
+    r = http_client.post_json(PLACES_TEXT_URL, body, headers=headers)
     if not r.ok:
         return {"_error": True, "status_code": r.status_code, "body": r.text[:2000]}
     return r.json()
 
+def _cached_lookup(key: str, fetch: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Serve a Places lookup from the persistent cache.
+    Successful results live for GEOCODE_CACHE_TTL_DAYS; "no places found" (404)
+    results are cached for GEOCODE_NEGATIVE_TTL_HOURS. Other errors are not cached.
+    """
+    if not GEOCODE_CACHE_ENABLED:
+        return fetch()
+
+    found, value = _GEO_CACHE.get(key)
+    if found:
+        if value.get("_error"):
+            _GEO_CACHE.count("negative_hits")
+        return value
+
+    value = fetch()
+    if not value.get("_error"):
+        _GEO_CACHE.set(key, value, GEOCODE_CACHE_TTL_DAYS * 86400)
+    elif value.get("status_code") == 404:
+        _GEO_CACHE.set(key, value, GEOCODE_NEGATIVE_TTL_HOURS * 3600)
+    return value
+
+
+def geocode_cache_stats() -> Dict[str, Any]:
+    return _GEO_CACHE.stats()
+
+
 def resolve_city_to_latlng(city: str) -> Dict[str, Any]:
+    return _cached_lookup(
+        f"city|{normalize_key_part(city)}",
+        lambda: _fetch_city_to_latlng(city),
+    )
+
+
+def resolve_place_address(city: str, place_name: str) -> Dict[str, Any]:
+    return _cached_lookup(
+        f"place|{normalize_key_part(city)}|{normalize_key_part(place_name)}",
+        lambda: _fetch_place_address(city, place_name),
+    )
+
+
+def resolve_place_addresses(city: str, place_names: List[str], max_workers: int = PLACES_BATCH_WORKERS) -> List[Dict[str, Any]]:
+    """
+    Resolve many places in one city concurrently (bounded thread pool).
+    Names are de-duplicated (case/whitespace-insensitive); results keep first-seen order,
+    one entry per unique name, each tagged with the requested place_name.
+    """
+    unique: Dict[str, str] = {}
+    for name in place_names or []:
+        name = (name or "").strip()
+        key = normalize_key_part(name)
+        if key and key not in unique:
+            unique[key] = name
+    names = list(unique.values())
+    if not names:
+        return []
+
+    workers = max(1, min(max_workers, len(names)))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="places") as pool:
+        # each lookup keeps the caller's contextvars (current trace / tool span)
+        futures = [pool.submit(contextvars.copy_context().run, resolve_place_address, city, n) for n in names]
+        results = [f.result() for f in futures]
+    return [{"place_name": n, **r} for n, r in zip(names, results)]
+
+
+def _fetch_city_to_latlng(city: str) -> Dict[str, Any]:
     res = _post_places(city)
     if res.get("_error"):
         return res
@@ -35,7 +117,7 @@ def resolve_city_to_latlng(city: str) -> Dict[str, Any]:
         "place_id": p.get("id"),
     }
 
-def resolve_place_address(city: str, place_name: str) -> Dict[str, Any]:
+def _fetch_place_address(city: str, place_name: str) -> Dict[str, Any]:
     query = f"{place_name}, {city}"
     res = _post_places(query)
     if res.get("_error"):
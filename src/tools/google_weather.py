@@ -1,52 +1,147 @@
 from __future__ import annotations
 
 import math
-import requests
-from typing import Any, Dict, Optional
+from datetime import date
+from typing import Any, Dict, List, Optional, Tuple
 
-OPEN_METEO_URL = "https://api.open-meteo.com/v1/forecast"
+from ..cache import TTLCache, snap_to_grid, seconds_until_next_boundary
+from ..config import (
+    OPEN_METEO_BASE_URL,
+    WEATHER_GRID_DEG,
+    WEATHER_MODEL_UPDATE_HOURS,
+    WEATHER_CACHE_MAX_ENTRIES,
+    WEATHER_HORIZON_DAYS,
+)
+from ..offline.cassette import reference_date
+from . import http_client
 
+OPEN_METEO_URL = f"{OPEN_METEO_BASE_URL}/v1/forecast"
 
-def get_hourly_weather(lat: float, lng: float, hours: int = 240) -> Dict[str, Any]:
+_FORECAST_CACHE = TTLCache(max_entries=WEATHER_CACHE_MAX_ENTRIES)
+
+
+# Only the hourly variables the summaries / risk scoring actually read.
+HOURLY_VARIABLES = (
+    "temperature_2m",
+    "apparent_temperature",
+    "precipitation_probability",
+    "wind_speed_10m",
+)
+
+
+def in_forecast_window(target_date: str, today: Optional[date] = None) -> bool:
+    """
+    True if target_date (YYYY-MM-DD) is within the forecast horizon, checked locally
+    before any network call. One day of slack on the past side covers time zones
+    ahead of the server. "Today" is the recording date while a cassette replays.
+    """
+    try:
+        d = date.fromisoformat(target_date)
+    except (TypeError, ValueError):
+        return False
+    delta = (d - (today or reference_date())).days
+    return -1 <= delta < WEATHER_HORIZON_DAYS
+
+
+def get_hourly_weather(
+    lat: float,
+    lng: float,
+    hours: int = 240,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+) -> Dict[str, Any]:
     """
     Open-Meteo forecast (max 240h / 10 days).
-    Returns hourly arrays + timezone.
+    Returns hourly arrays + timezone, plus "_date_index" ({YYYY-MM-DD: [start, end)}).
+
+    Pass start_date/end_date (YYYY-MM-DD, local to the location) to fetch only those
+    days instead of the whole `hours` window. A date range the forecast cannot serve
+    returns an empty result with "_error" set instead of raising.
+
+    Coordinates are snapped to WEATHER_GRID_DEG and responses are cached until the
+    next forecast model update, so nearby points / repeated dates share one fetch.
     """
     hours = max(1, min(int(hours), 240))
-    forecast_days = max(1, min(10, math.ceil(hours / 24)))
-
-    params = {
+    if start_date:
+        end_date = end_date or start_date
+    lat, lng = snap_to_grid(lat, lng, WEATHER_GRID_DEG)
+    key = (lat, lng, start_date, end_date) if start_date else (lat, lng, hours)
+    data = _FORECAST_CACHE.get_or_set(
+        key,
+        lambda: _fetch_hourly_weather(lat, lng, hours, start_date, end_date),
+        ttl=lambda wx: 0 if wx.get("_error") else seconds_until_next_boundary(WEATHER_MODEL_UPDATE_HOURS * 3600),
+    )
+    return dict(data)
+
+
+def forecast_cache_stats() -> Dict[str, Any]:
+    return _FORECAST_CACHE.stats()
+
+
+def _index_by_date(times: List[str]) -> Dict[str, List[int]]:
+    """One pass over the (sorted) hourly timestamps -> {date: [first_idx, last_idx + 1]}."""
+    index: Dict[str, List[int]] = {}
+    for i, t in enumerate(times):
+        if not isinstance(t, str):
+            continue
+        span = index.get(t[:10])
+        if span is None:
+            index[t[:10]] = [i, i + 1]
+        else:
+            span[1] = i + 1
+    return index
+
+
+def _fetch_hourly_weather(
+    lat: float,
+    lng: float,
+    hours: int,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+) -> Dict[str, Any]:
+    params: Dict[str, Any] = {
         "latitude": lat,
         "longitude": lng,
-        "hourly": ",".join(
-            [
-                "temperature_2m",
-                "apparent_temperature",
-                "precipitation_probability",
-                "wind_speed_10m",
-                "relative_humidity_2m",
-            ]
-        ),
-        "daily": ",".join(
-            [
-                "temperature_2m_max",
-                "temperature_2m_min",
-                "precipitation_probability_max",
-                "wind_speed_10m_max",
-            ]
-        ),
-        "forecast_days": forecast_days,
+        "hourly": ",".join(HOURLY_VARIABLES),
         "timezone": "auto",
     }
+    if start_date:
+        params["start_date"] = start_date
+        params["end_date"] = end_date
+    else:
+        forecast_days = max(1, min(10, math.ceil(hours / 24)))
+        params["forecast_days"] = forecast_days
 
-    r = requests.get(OPEN_METEO_URL, params=params, timeout=30)
+    r = http_client.get(OPEN_METEO_URL, params=params)
+    if start_date and r.status_code == 400:
+        # Open-Meteo rejects dates outside its forecast range.
+        return {
+            "_error": True,
+            "status_code": r.status_code,
+            "body": r.text[:500],
+            "hourly": {},
+            "_date_index": {},
+        }
     r.raise_for_status()
     data = r.json()
-    data["_tool_window_hours"] = hours
-    data["_tool_window_days"] = forecast_days
+    data["_date_index"] = _index_by_date((data.get("hourly") or {}).get("time") or [])
+    if start_date:
+        data["_tool_window_dates"] = [start_date, end_date]
+    else:
+        data["_tool_window_hours"] = hours
+        data["_tool_window_days"] = params["forecast_days"]
     return data
 
 
+def date_span(wx_json: Dict[str, Any], target_date: str) -> Optional[Tuple[int, int]]:
+    """Hourly index range [start, end) for target_date, or None if not in the data."""
+    index = wx_json.get("_date_index")
+    if index is None:
+        index = _index_by_date(((wx_json.get("hourly") or {}).get("time")) or [])
+    span = index.get(target_date)
+    return (span[0], span[1]) if span else None
+
+
 def summarize_weather_for_date(wx_json: Dict[str, Any], target_date: str) -> Dict[str, Any]:
     """
     Build a business-ready date summary from hourly arrays for YYYY-MM-DD.
@@ -54,29 +149,25 @@ def summarize_weather_for_date(wx_json: Dict[str, Any], target_date: str) -> Dic
     """
     wx_json = wx_json or {}
     hourly = wx_json.get("hourly") or {}
-    times = hourly.get("time") or []
-
-    temps = hourly.get("temperature_2m") or []
-    feels = hourly.get("apparent_temperature") or []
-    probs = hourly.get("precipitation_probability") or []
-    wind = hourly.get("wind_speed_10m") or []
 
-    idxs = [i for i, t in enumerate(times) if isinstance(t, str) and t.startswith(target_date)]
-    if not idxs:
+    span = date_span(wx_json, target_date)
+    if span is None:
         return {
             "available": False,
             "target_date": target_date,
             "timezone": wx_json.get("timezone", "local"),
             "reason": "Forecast available up to 10 days only.",
         }
+    lo, hi = span
 
-    def _slice(arr):
-        return [arr[i] for i in idxs] if arr else []
+    def _day(name):
+        # Only this date's hours; Open-Meteo pads missing hours with null.
+        return [v for v in (hourly.get(name) or [])[lo:hi] if v is not None]
 
-    temps_d = _slice(temps)
-    feels_d = _slice(feels)
-    probs_d = _slice(probs)
-    wind_d = _slice(wind)
+    temps_d = _day("temperature_2m")
+    feels_d = _day("apparent_temperature")
+    probs_d = _day("precipitation_probability")
+    wind_d = _day("wind_speed_10m")
 
     def _avg(a):
         return (sum(a) / len(a)) if a else None
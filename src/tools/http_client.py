@@ -0,0 +1,228 @@
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import functools
+import json
+import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, TypeVar
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from ..cache import SingleFlight
+from ..tracing import record_http
+from ..config import (
+    HTTP_POOL_SIZE,
+    HTTP_CONNECT_TIMEOUT,
+    HTTP_READ_TIMEOUT,
+    HTTP_MAX_RETRIES,
+    HTTP_BACKOFF_BASE,
+    ASYNC_IO_WORKERS,
+    HTTP_COALESCE,
+    GOOGLE_PLACES_BASE_URL,
+    GOOGLE_AIR_QUALITY_BASE_URL,
+    OPEN_METEO_BASE_URL,
+)
+from ..offline.cassette import active_cassette
+
+logger = logging.getLogger("travel_agent")
+
+# Base URLs the tool modules talk to (used for optional startup pre-connect).
+UPSTREAM_BASE_URLS = (
+    GOOGLE_PLACES_BASE_URL,
+    GOOGLE_AIR_QUALITY_BASE_URL,
+    OPEN_METEO_BASE_URL,
+)
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+_lock = threading.Lock()
+_sessions: Dict[str, requests.Session] = {}
+_stats: Dict[str, Dict[str, int]] = {}
+
+T = TypeVar("T")
+_io_pool = ThreadPoolExecutor(max_workers=ASYNC_IO_WORKERS, thread_name_prefix="tool-io")
+_flight = SingleFlight()
+
+
+def _host(url: str) -> str:
+    return urlsplit(url).netloc
+
+
+def _session_for(host: str) -> requests.Session:
+    s = _sessions.get(host)
+    if s is not None:
+        return s
+    with _lock:
+        s = _sessions.get(host)
+        if s is None:
+            s = requests.Session()
+            # Retries are handled below (jittered), so the adapter itself never retries.
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=HTTP_POOL_SIZE, max_retries=0)
+            s.mount("https://", adapter)
+            s.mount("http://", adapter)
+            _sessions[host] = s
+            _stats[host] = {"requests": 0, "retries": 0, "errors": 0}
+    return s
+
+
+def _count(host: str, key: str) -> None:
+    with _lock:
+        _stats[host][key] += 1
+
+
+def _backoff_seconds(attempt: int, resp: Optional[requests.Response]) -> float:
+    if resp is not None:
+        retry_after = resp.headers.get("Retry-After", "")
+        if retry_after.isdigit():
+            return min(float(retry_after), 30.0)
+    # Full jitter: uniform(0, base * 2^attempt)
+    return random.uniform(0, HTTP_BACKOFF_BASE * (2 ** attempt))
+
+
+def _request_key(method: str, url: str, kwargs: Dict[str, Any]) -> str:
+    return json.dumps(
+        [
+            method.upper(),
+            url,
+            kwargs.get("params"),
+            kwargs.get("json"),
+            sorted((kwargs.get("headers") or {}).items()),
+        ],
+        sort_keys=True,
+        default=str,
+    )
+
+
+def request(method: str, url: str, **kwargs: Any) -> requests.Response:
+    """
+    Send a request through the pooled keep-alive session for the URL's host.
+    Retries 429/5xx and connection failures with jittered exponential backoff.
+    Identical requests already in flight (same method/url/params/body/headers)
+    wait for that call and share its Response instead of going upstream again.
+    Returns the final Response (callers keep their own r.ok / raise_for_status handling).
+    With a replay cassette active (src/offline/cassette.py) nothing is sent.
+    """
+    cassette = active_cassette()
+    if cassette is not None and cassette.replaying:
+        return cassette.replay_http(method, url, kwargs)
+    if not HTTP_COALESCE:
+        return _send(method, url, **kwargs)
+    resp, _shared = _flight.do(
+        _request_key(method, url, kwargs),
+        lambda: _send(method, url, **kwargs),
+    )
+    return resp
+
+
+def _send(method: str, url: str, **kwargs: Any) -> requests.Response:
+    host = _host(url)
+    t0 = time.perf_counter()
+    status: Any = "error"
+    try:
+        resp = _send_with_retries(host, method, url, **kwargs)
+        status = resp.status_code
+    finally:
+        elapsed = time.perf_counter() - t0
+        record_http(host, method.upper(), status, elapsed)
+    cassette = active_cassette()
+    if cassette is not None:
+        cassette.record_http(method, url, kwargs, resp, elapsed)
+    return resp
+
+
+def _send_with_retries(host: str, method: str, url: str, **kwargs: Any) -> requests.Response:
+    session = _session_for(host)
+    kwargs.setdefault("timeout", (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT))
+
+    attempt = 0
+    while True:
+        _count(host, "requests")
+        try:
+            resp = session.request(method, url, **kwargs)
+        except (requests.ConnectionError, requests.Timeout):
+            _count(host, "errors")
+            if attempt >= HTTP_MAX_RETRIES:
+                raise
+            resp = None
+        else:
+            if resp.status_code not in RETRY_STATUSES or attempt >= HTTP_MAX_RETRIES:
+                return resp
+
+        delay = _backoff_seconds(attempt, resp)
+        logger.info(
+            "HTTP retry %d/%d for %s (%s) in %.2fs",
+            attempt + 1, HTTP_MAX_RETRIES, host,
+            resp.status_code if resp is not None else "connection error", delay,
+        )
+        _count(host, "retries")
+        attempt += 1
+        time.sleep(delay)
+
+
+def post_json(url: str, body: Dict[str, Any], headers: Optional[Dict[str, str]] = None) -> requests.Response:
+    return request("POST", url, headers=headers, json=body)
+
+
+def get(url: str, params: Optional[Dict[str, Any]] = None) -> requests.Response:
+    return request("GET", url, params=params)
+
+
+async def run_io(fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """
+    Await a blocking tool/network call without blocking the event loop.
+    Runs on a dedicated bounded pool (ASYNC_IO_WORKERS) and keeps the caller's contextvars.
+    """
+    loop = asyncio.get_running_loop()
+    ctx = contextvars.copy_context()
+    return await loop.run_in_executor(_io_pool, functools.partial(ctx.run, fn, *args, **kwargs))
+
+
+def preconnect(base_urls=UPSTREAM_BASE_URLS) -> None:
+    """Open a pooled TLS connection to each upstream host so the first tool call skips the handshake."""
+    cassette = active_cassette()
+    if cassette is not None and cassette.replaying:
+        return
+    for url in base_urls:
+        try:
+            _session_for(_host(url)).head(f"{url}/", timeout=(HTTP_CONNECT_TIMEOUT, HTTP_CONNECT_TIMEOUT))
+        except requests.RequestException as e:
+            logger.warning("Pre-connect to %s failed: %s", url, e)
+
+
+def http_stats() -> Dict[str, Dict[str, int]]:
+    """
+    Per-host counters: requests sent, retries, connection errors, and how many
+    connections were opened vs. reused. The connection counts come from the urllib3
+    pools (every request on a pooled connection it did not open is a reuse), so they
+    include the pre-connect HEAD.
+    """
+    out: Dict[str, Dict[str, int]] = {}
+    with _lock:
+        items = [(h, _sessions[h], dict(c)) for h, c in _stats.items()]
+    for host, session, counters in items:
+        opened = sent = 0
+        for adapter in set(session.adapters.values()):
+            pools = adapter.poolmanager.pools
+            for key in list(pools.keys()):
+                try:
+                    pool = pools[key]
+                except KeyError:
+                    continue
+                opened += pool.num_connections
+                sent += pool.num_requests
+        counters["connections_opened"] = opened
+        counters["connections_reused"] = max(0, sent - opened)
+        out[host] = counters
+    return out
+
+
+def coalescing_stats() -> Dict[str, int]:
+    """How many upstream calls were requested vs. actually sent vs. collapsed onto an in-flight call."""
+    return _flight.stats()
@@ -0,0 +1,407 @@
+# src/tracing.py
+from __future__ import annotations
+
+import contextlib
+import contextvars
+import hashlib
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from .config import TRACE_ENABLED, TRACE_JSONL_PATH, TRACE_PROM_PATH
+
+logger = logging.getLogger("travel_agent")
+
+# Latency histogram buckets (seconds), shared by every *_latency_seconds metric.
+_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+_METRIC_HELP = {
+    "travel_plans_total": ("counter", "Traced plan runs"),
+    "travel_plan_latency_seconds": ("histogram", "End-to-end plan latency"),
+    "travel_llm_calls_total": ("counter", "LLM calls"),
+    "travel_llm_tokens_total": ("counter", "LLM tokens by type"),
+    "travel_llm_latency_seconds": ("histogram", "LLM call latency"),
+    "travel_tool_calls_total": ("counter", "Tool calls by cache outcome"),
+    "travel_tool_latency_seconds": ("histogram", "Tool call latency"),
+    "travel_upstream_requests_total": ("counter", "Upstream HTTP requests by status"),
+    "travel_upstream_latency_seconds": ("histogram", "Upstream HTTP latency (including retries)"),
+}
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class _Metrics:
+    """Process-wide counters/histograms rendered in the Prometheus text format."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[Tuple[str, Labels], float] = {}
+        self._hists: Dict[Tuple[str, Labels], List[float]] = {}  # bucket counts..., sum, count
+
+    def inc(self, name: str, labels: Dict[str, Any], value: float = 1) -> None:
+        key = (name, tuple(sorted((k, str(v)) for k, v in labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name: str, labels: Dict[str, Any], seconds: float) -> None:
+        key = (name, tuple(sorted((k, str(v)) for k, v in labels.items())))
+        with self._lock:
+            h = self._hists.setdefault(key, [0.0] * (len(_BUCKETS) + 2))
+            for i, le in enumerate(_BUCKETS):
+                if seconds <= le:
+                    h[i] += 1
+            h[-2] += seconds
+            h[-1] += 1
+
+    def render(self) -> str:
+        with self._lock:
+            counters = dict(self._counters)
+            hists = {k: list(v) for k, v in self._hists.items()}
+
+        def fmt(labels: Labels, extra: Optional[Tuple[str, str]] = None) -> str:
+            items = list(labels) + ([extra] if extra else [])
+            if not items:
+                return ""
+            return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in items) + "}"
+
+        out: List[str] = []
+        names = sorted({n for n, _ in counters} | {n for n, _ in hists})
+        for name in names:
+            kind, help_text = _METRIC_HELP.get(name, ("untyped", name))
+            out.append(f"# HELP {name} {help_text}")
+            out.append(f"# TYPE {name} {kind}")
+            for (n, labels), value in sorted(counters.items()):
+                if n == name:
+                    out.append(f"{name}{fmt(labels)} {value:g}")
+            for (n, labels), h in sorted(hists.items()):
+                if n != name:
+                    continue
+                for i, le in enumerate(_BUCKETS):
+                    out.append(f"{name}_bucket{fmt(labels, ('le', f'{le:g}'))} {h[i]:g}")
+                out.append(f"{name}_bucket{fmt(labels, ('le', '+Inf'))} {h[-1]:g}")
+                out.append(f"{name}_sum{fmt(labels)} {h[-2]:.6f}")
+                out.append(f"{name}_count{fmt(labels)} {h[-1]:g}")
+        return "\n".join(out) + "\n"
+
+
+def _escape(v: str) -> str:
+    return v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+_metrics = _Metrics()
+_file_lock = threading.Lock()
+
+
+def _ms(seconds: float) -> float:
+    return round(seconds * 1000, 1)
+
+
+def args_hash(args: Any) -> str:
+    text = json.dumps(args, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:12]
+
+
+class Trace:
+    """
+    Spans of one plan run (LLM steps, tool calls, upstream HTTP requests).
+    Spans arrive from agent, tool and pool threads, so adds are locked.
+    """
+
+    def __init__(self, label: str):
+        self.run_id = uuid.uuid4().hex[:12]
+        self.label = label
+        self.started_at = time.time()
+        self._t0 = time.perf_counter()
+        self.total_ms: Optional[float] = None
+        self._lock = threading.Lock()
+        self.spans: List[Dict[str, Any]] = []
+        self.handler = TraceCallbackHandler(self)
+
+    def add(self, span: Dict[str, Any]) -> None:
+        with self._lock:
+            self.spans.append(span)
+
+    def finish(self) -> None:
+        seconds = time.perf_counter() - self._t0
+        self.total_ms = _ms(seconds)
+        _metrics.inc("travel_plans_total", {"label": self.label})
+        _metrics.observe("travel_plan_latency_seconds", {"label": self.label}, seconds)
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        End-to-end totals. Latencies per bucket are summed busy time, so with
+        parallel tool calls they can add up to more than total_ms.
+        """
+        with self._lock:
+            spans = list(self.spans)
+        llm = {"calls": 0, "latency_ms": 0.0, "prompt_tokens": 0, "completion_tokens": 0}
+        tools: Dict[str, Dict[str, Any]] = {}
+        upstream: Dict[str, Dict[str, Any]] = {}
+        for s in spans:
+            if s["kind"] == "llm":
+                llm["calls"] += 1
+                llm["latency_ms"] += s["latency_ms"]
+                llm["prompt_tokens"] += s.get("prompt_tokens", 0)
+                llm["completion_tokens"] += s.get("completion_tokens", 0)
+            elif s["kind"] == "tool":
+                t = tools.setdefault(s["name"], {"calls": 0, "cache_hits": 0, "latency_ms": 0.0})
+                t["calls"] += 1
+                t["cache_hits"] += int(s["cache_hit"])
+                t["latency_ms"] += s["latency_ms"]
+            elif s["kind"] == "http":
+                u = upstream.setdefault(s["host"], {"calls": 0, "errors": 0, "latency_ms": 0.0})
+                u["calls"] += 1
+                u["errors"] += int(not (isinstance(s["status"], int) and s["status"] < 400))
+                u["latency_ms"] += s["latency_ms"]
+
+        attribution = {"openai": round(llm["latency_ms"], 1)}
+        attribution.update({h: round(u["latency_ms"], 1) for h, u in upstream.items()})
+        llm["latency_ms"] = round(llm["latency_ms"], 1)
+        for d in list(tools.values()) + list(upstream.values()):
+            d["latency_ms"] = round(d["latency_ms"], 1)
+        return {
+            "run_id": self.run_id,
+            "label": self.label,
+            "started_at": self.started_at,
+            "total_ms": self.total_ms,
+            "llm": llm,
+            "tools": tools,
+            "upstream": upstream,
+            "attribution_ms": attribution,
+        }
+
+    def to_jsonl(self) -> str:
+        """One JSON line per span, then a summary line (all tagged with run_id)."""
+        with self._lock:
+            spans = list(self.spans)
+        lines = [json.dumps({"run_id": self.run_id, **s}, default=str) for s in spans]
+        lines.append(json.dumps({"kind": "summary", **self.summary()}, default=str))
+        return "\n".join(lines) + "\n"
+
+
+class TraceCallbackHandler(BaseCallbackHandler):
+    """LangChain callbacks -> llm spans (latency, prompt/completion tokens) on a Trace."""
+
+    def __init__(self, trace: Trace):
+        self._trace = trace
+        self._starts: Dict[Any, Tuple[float, str]] = {}
+
+    def _start(self, run_id, serialized, kwargs) -> None:
+        params = kwargs.get("invocation_params") or {}
+        meta = kwargs.get("metadata") or {}
+        model = params.get("model") or params.get("model_name") or meta.get("ls_model_name") or ""
+        if not model and serialized:
+            model = (serialized.get("kwargs") or {}).get("model_name") or serialized.get("name", "")
+        self._starts[run_id] = (time.perf_counter(), str(model))
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        self._start(run_id, serialized, kwargs)
+
+    def on_llm_start(self, serialized, prompts, *, run_id, **kwargs):
+        self._start(run_id, serialized, kwargs)
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        t0, model = self._starts.pop(run_id, (None, ""))
+        if t0 is None:
+            return
+        prompt_tokens, completion_tokens = _token_usage(response)
+        record_llm(self._trace, model, time.perf_counter() - t0, prompt_tokens, completion_tokens)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        t0, model = self._starts.pop(run_id, (None, ""))
+        if t0 is not None:
+            record_llm(self._trace, model, time.perf_counter() - t0, 0, 0, error=type(error).__name__)
+
+
+def _token_usage(response) -> Tuple[int, int]:
+    for gens in getattr(response, "generations", None) or []:
+        for g in gens:
+            usage = getattr(getattr(g, "message", None), "usage_metadata", None)
+            if usage:
+                return int(usage.get("input_tokens", 0)), int(usage.get("output_tokens", 0))
+    usage = (getattr(response, "llm_output", None) or {}).get("token_usage") or {}
+    return int(usage.get("prompt_tokens", 0)), int(usage.get("completion_tokens", 0))
+
+
+_current: contextvars.ContextVar[Optional[Trace]] = contextvars.ContextVar("plan_trace", default=None)
+_tool: contextvars.ContextVar[Optional[Dict[str, Any]]] = contextvars.ContextVar("trace_tool_span", default=None)
+
+
+def current_trace() -> Optional[Trace]:
+    return _current.get()
+
+
+def trace_callbacks() -> List[BaseCallbackHandler]:
+    """Callbacks to pass in a runnable config so LLM steps land on the current trace."""
+    trace = _current.get()
+    return [trace.handler] if trace is not None else []
+
+
+def record_llm(trace: Trace, model: str, seconds: float, prompt_tokens: int, completion_tokens: int, error: str = "") -> None:
+    span = {
+        "kind": "llm",
+        "name": model,
+        "latency_ms": _ms(seconds),
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+    }
+    if error:
+        span["error"] = error
+    trace.add(span)
+    _metrics.inc("travel_llm_calls_total", {"model": model})
+    _metrics.inc("travel_llm_tokens_total", {"model": model, "type": "prompt"}, prompt_tokens)
+    _metrics.inc("travel_llm_tokens_total", {"model": model, "type": "completion"}, completion_tokens)
+    _metrics.observe("travel_llm_latency_seconds", {"model": model}, seconds)
+
+
+def record_http(host: str, method: str, status: Any, seconds: float) -> None:
+    """Called by the HTTP transport once per request (retries included in the latency)."""
+    if not TRACE_ENABLED:
+        return
+    _metrics.inc("travel_upstream_requests_total", {"host": host, "status": status})
+    _metrics.observe("travel_upstream_latency_seconds", {"host": host}, seconds)
+    trace = _current.get()
+    if trace is None:
+        return
+    tool = _tool.get()
+    span = {"kind": "http", "host": host, "method": method, "status": status, "latency_ms": _ms(seconds)}
+    if tool is not None:
+        span["tool"] = tool["name"]
+        tool["upstream"].append(status)
+    trace.add(span)
+
+
+@contextlib.contextmanager
+def tool_span(name: str, args: Any) -> Iterator[Optional[Dict[str, Any]]]:
+    """
+    Time one tool call on the current trace. Upstream requests made inside it are
+    attached to it; a call that needed none counts as a cache hit.
+    """
+    trace = _current.get()
+    if trace is None:
+        yield None
+        return
+    span: Dict[str, Any] = {"kind": "tool", "name": name, "args_hash": args_hash(args), "upstream": []}
+    token = _tool.set(span)
+    t0 = time.perf_counter()
+    try:
+        yield span
+    except Exception as e:
+        span["error"] = type(e).__name__
+        raise
+    finally:
+        _tool.reset(token)
+        seconds = time.perf_counter() - t0
+        upstream = span.pop("upstream")
+        span["latency_ms"] = _ms(seconds)
+        span["upstream_calls"] = len(upstream)
+        span["upstream_status"] = sorted({str(s) for s in upstream})
+        span["cache_hit"] = not upstream and "error" not in span
+        trace.add(span)
+        _metrics.inc("travel_tool_calls_total", {"tool": name, "cache_hit": str(span["cache_hit"]).lower()})
+        _metrics.observe("travel_tool_latency_seconds", {"tool": name}, seconds)
+
+
+@contextlib.contextmanager
+def trace_run(label: str) -> Iterator[Optional[Trace]]:
+    """
+    Trace everything done inside the block (including pool threads that copy the
+    context). On exit the trace is appended to TRACE_JSONL_PATH and the Prometheus
+    text file at TRACE_PROM_PATH is rewritten.
+    """
+    if not TRACE_ENABLED:
+        yield None
+        return
+    trace = Trace(label)
+    token = _current.set(trace)
+    try:
+        yield trace
+    finally:
+        _current.reset(token)
+        trace.finish()
+        _export(trace)
+
+
+# Sections of upstream_stats() -> label name for their per-item dicts (None = flat counters).
+_STATS_LABELS: Dict[str, Optional[str]] = {"http": "host", "coalescing": None, "cache": "cache"}
+# cache name -> (module, stats function). Only modules that are already loaded are
+# asked: a cache whose tool never ran has nothing to report, and exporting must not
+# pull in the LLM stack.
+_CACHE_STATS = {
+    "geocode": (".tools.google_places", "geocode_cache_stats"),
+    "forecast": (".tools.google_weather", "forecast_cache_stats"),
+    "air_quality": (".tools.google_air_quality", "air_quality_cache_stats"),
+    "attractions": (".tools.attractions_llm", "attractions_cache_stats"),
+    "plan": (".agent.plan_cache", "plan_cache_stats"),
+}
+
+
+def upstream_stats() -> Dict[str, Any]:
+    """
+    Process-wide counters kept outside the traces: connection reuse per upstream host,
+    requests collapsed by single-flight coalescing and hit rates of the result caches.
+    Logged after each traced run and exported as gauges with the Prometheus metrics.
+    """
+    from .tools.http_client import coalescing_stats, http_stats  # late import: http_client imports this module
+
+    caches = {}
+    for name, (module, fn) in _CACHE_STATS.items():
+        loaded = sys.modules.get(__package__ + module)
+        if loaded is not None:
+            caches[name] = getattr(loaded, fn)()
+    return {"http": http_stats(), "coalescing": coalescing_stats(), "cache": caches}
+
+
+def _stats_text(stats: Dict[str, Any]) -> str:
+    samples: Dict[str, List[str]] = {}
+    for section, data in stats.items():
+        label = _STATS_LABELS.get(section)
+        items = data.items() if label else [(None, data)]
+        for item, counters in items:
+            for key, value in (counters or {}).items():
+                if not isinstance(value, (int, float)):
+                    continue
+                name = f"travel_{section}_{key}"
+                labels = f'{{{label}="{_escape(str(item))}"}}' if label else ""
+                samples.setdefault(name, []).append(f"{name}{labels} {value:g}")
+    out: List[str] = []
+    for name in sorted(samples):
+        out.append(f"# TYPE {name} gauge")
+        out.extend(sorted(samples[name]))
+    return "\n".join(out) + "\n" if out else ""
+
+
+def prometheus_text() -> str:
+    try:
+        stats = _stats_text(upstream_stats())
+    except Exception as e:  # stats must never break the trace export
+        logger.warning("Upstream stats unavailable: %s", e)
+        stats = ""
+    return _metrics.render() + stats
+
+
+def _export(trace: Trace) -> None:
+    try:
+        with _file_lock:
+            if TRACE_JSONL_PATH:
+                path = Path(TRACE_JSONL_PATH)
+                path.parent.mkdir(parents=True, exist_ok=True)
+                with path.open("a", encoding="utf-8") as f:
+                    f.write(trace.to_jsonl())
+            if TRACE_PROM_PATH:
+                # Written atomically so a node_exporter textfile collector never reads half a file.
+                path = Path(TRACE_PROM_PATH)
+                path.parent.mkdir(parents=True, exist_ok=True)
+                tmp = path.with_suffix(path.suffix + ".tmp")
+                tmp.write_text(prometheus_text(), encoding="utf-8")
+                os.replace(tmp, path)
+    except OSError as e:
+        logger.warning("Trace export failed: %s", e)
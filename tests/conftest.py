@@ -0,0 +1,20 @@
+# tests/conftest.py
+"""
+src/config.py reads the environment at import time, so the test environment is
+set here, before any test module imports src: dummy keys, no tracing files, no
+cassette, and persistent caches in a throwaway directory instead of .cache/.
+"""
+import os
+import tempfile
+
+os.environ.update({
+    "OPENAI_API_KEY": "test",
+    "GOOGLE_MAPS_API_KEY": "test",
+    "CACHE_DIR": tempfile.mkdtemp(prefix="travel-agent-tests-"),
+    "CASSETTE_MODE": "off",
+    "TRACE_ENABLED": "0",
+    "TRACE_JSONL_PATH": "",
+    "TRACE_PROM_PATH": "",
+    "HTTP_PRECONNECT": "0",
+    "HTTP_MAX_RETRIES": "0",
+})
@@ -0,0 +1,41 @@
+# tests/helpers.py
+import json
+from typing import Any, Callable, Dict, List, Union
+
+from langchain_core.messages import AIMessage
+
+
+def city(name: str = "Paris", date: str = "2030-05-01", **overrides: Any) -> Dict[str, Any]:
+    """A cities[i] block that passes check_city_block."""
+    block = {
+        "city": name,
+        "date": date,
+        "schedule": [{"start": "10:00", "end": "12:00", "activity": "Louvre", "address": "Rue de Rivoli, Paris"}],
+        "insights": {"weather": "Mild", "umbrella": "No", "air_quality": "Good"},
+        "risk": {"weather_risk": 2, "air_quality_risk": 1, "overall_risk": 2},
+        "packing": ["Walking shoes"],
+    }
+    block.update(overrides)
+    return block
+
+
+class FakeAgent:
+    """Stands in for the agent executor: each invoke() answers with the next reply (or raises it)."""
+
+    def __init__(self, *replies: Union[str, Exception, Callable[[List[Any]], str]]):
+        self.replies = list(replies)
+        self.prompts: List[str] = []
+
+    def invoke(self, inputs: Dict[str, Any], **kwargs: Any) -> Dict[str, Any]:
+        messages = inputs["messages"]
+        self.prompts.append(messages[-1].content)
+        reply = self.replies.pop(0) if len(self.replies) > 1 else self.replies[0]
+        if isinstance(reply, Exception):
+            raise reply
+        if callable(reply):
+            reply = reply(messages)
+        return {"messages": list(messages) + [AIMessage(content=reply)]}
+
+
+def reply(*blocks: Dict[str, Any]) -> str:
+    return json.dumps({"cities": list(blocks)})
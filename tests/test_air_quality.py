@@ -0,0 +1,67 @@
+# tests/test_air_quality.py
+import json
+
+import pytest
+import requests
+
+from src.cache import TTLCache
+from src.tools import google_air_quality as aq
+
+CURRENT = {"indexes": [{"code": "uaqi", "aqi": 80, "category": "Good"}]}
+
+
+def _response(status: int, payload) -> requests.Response:
+    resp = requests.Response()
+    resp.status_code = status
+    resp._content = json.dumps(payload).encode("utf-8")
+    return resp
+
+
+def _error(status: int, message: str):
+    return _response(status, {"error": {"code": status, "message": message}})
+
+
+class Calls(list):
+    """(endpoint, location) of every request sent; `forecast` is the forecast:lookup reply."""
+    forecast: requests.Response
+
+
+@pytest.fixture
+def calls(monkeypatch):
+    monkeypatch.setattr(aq, "_AQ_CACHE", TTLCache())
+    monkeypatch.setattr(aq, "_FORECAST_UNSUPPORTED", TTLCache())
+    sent = Calls()
+
+    def post_json(url, body, headers=None):
+        sent.append((url.rsplit("/", 1)[-1], body["location"]))
+        return _response(200, CURRENT) if url == aq.AQ_CURRENT_URL else sent.forecast
+
+    monkeypatch.setattr(aq.http_client, "post_json", post_json)
+    return sent
+
+
+@pytest.mark.parametrize("reply, remembered", [
+    (_error(400, "Information is unavailable for this location. Please try a different location."), True),
+    (_error(400, "Period or dateTime is required"), True),
+    (_error(400, "Invalid location."), False),
+    (_error(403, "API key not valid."), False),
+    (_error(404, "Not found"), False),
+    (_error(429, "Quota exceeded"), False),
+])
+def test_only_location_rejections_mark_the_region(calls, reply, remembered):
+    calls.forecast = reply
+    assert aq.get_air_quality_forecast(48.8566, 2.3522)["_mode"] == "current"
+    calls.clear()
+    aq.get_air_quality_forecast(48.95, 2.45)  # same 1° region, different AQ cache cell
+    assert [name for name, _ in calls][0] == ("currentConditions:lookup" if remembered else "forecast:lookup")
+
+
+def test_requests_carry_the_real_coordinates_and_the_cache_key_is_snapped(calls):
+    calls.forecast = _error(400, "Information is unavailable for this location.")
+    aq.get_air_quality_forecast(48.85661, 2.35222)
+    assert {loc["latitude"] for _, loc in calls} == {48.85661}
+    assert {loc["longitude"] for _, loc in calls} == {2.35222}
+
+    calls.clear()
+    aq.get_air_quality_forecast(48.85662, 2.35223)  # same AQ_GRID_DEG cell
+    assert calls == []
@@ -0,0 +1,178 @@
+# tests/test_cache.py
+import threading
+import time
+from datetime import date, timedelta
+
+import pytest
+
+from src.agent.plan_cache import plan_ttl_seconds
+from src.cache import (
+    SingleFlight,
+    SqliteTTLCache,
+    TTLCache,
+    normalize_key_part,
+    seconds_until_next_boundary,
+    snap_to_grid,
+)
+from src.config import PLAN_CACHE_MAX_TTL_HOURS, WEATHER_HORIZON_DAYS, WEATHER_MODEL_UPDATE_HOURS
+
+
+def test_key_helpers():
+    assert normalize_key_part("  CN  Tower, ") == "cn tower"
+    assert snap_to_grid(43.6532, -79.3832, 0.05) == (43.65, -79.4)
+    assert snap_to_grid(1.23456, 2.5, 0) == (1.23456, 2.5)
+    assert seconds_until_next_boundary(3600, now=7200 + 600) == 3000
+    assert seconds_until_next_boundary(0) == 0.0
+
+
+# -----------------------------
+# SingleFlight
+# -----------------------------
+def _concurrently(n, target):
+    start = threading.Barrier(n)
+    results, threads = [], []
+
+    def run():
+        start.wait()
+        results.append(target())
+
+    for _ in range(n):
+        threads.append(threading.Thread(target=run))
+        threads[-1].start()
+    for t in threads:
+        t.join(5)
+    return results
+
+
+def test_single_flight_collapses_concurrent_calls():
+    flight = SingleFlight()
+    calls = []
+
+    def slow():
+        calls.append(1)
+        time.sleep(0.2)
+        return "value"
+
+    results = _concurrently(5, lambda: flight.do("k", slow))
+    assert len(calls) == 1
+    assert sorted(shared for _, shared in results) == [False, True, True, True, True]
+    assert all(value == "value" for value, _ in results)
+    assert flight.stats() == {"calls": 5, "executed": 1, "collapsed": 4, "in_flight": 0}
+
+
+def test_single_flight_shares_errors_and_forgets_the_key():
+    flight = SingleFlight()
+
+    def boom():
+        time.sleep(0.1)
+        raise RuntimeError("upstream down")
+
+    errors = []
+
+    def call():
+        try:
+            flight.do("k", boom)
+        except RuntimeError as e:
+            errors.append(e)
+
+    _concurrently(3, call)
+    assert len(errors) == 3
+    assert flight.do("k", lambda: "recovered") == ("recovered", False)
+
+
+# -----------------------------
+# TTLCache
+# -----------------------------
+def test_ttl_cache_expiry_and_lru_eviction(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(time, "time", lambda: now[0])
+    cache = TTLCache(max_entries=2)
+    cache.set("a", 1, ttl_seconds=10)
+    cache.set("b", 2, ttl_seconds=10)
+    assert cache.get("a") == 1          # "a" is now most recently used
+    cache.set("c", 3, ttl_seconds=10)   # evicts "b"
+    assert cache.get("b") is None
+    now[0] += 11
+    assert cache.get("a", "gone") == "gone"
+    stats = cache.stats()
+    assert stats["evictions"] == 1 and stats["hits"] == 1 and stats["misses"] == 2
+
+
+def test_ttl_cache_get_or_set_skips_caching_when_ttl_is_zero():
+    cache = TTLCache()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return {"_error": True}
+
+    ttl = lambda value: 0 if value.get("_error") else 60  # noqa: E731
+    cache.get_or_set("k", compute, ttl)
+    cache.get_or_set("k", compute, ttl)
+    assert len(calls) == 2
+    cache.get_or_set("ok", lambda: {"v": 1}, ttl)
+    assert cache.get_or_set("ok", compute, ttl) == {"v": 1}
+
+
+def test_ttl_cache_coalesces_concurrent_misses():
+    cache = TTLCache()
+    calls = []
+
+    def slow():
+        calls.append(1)
+        time.sleep(0.2)
+        return 42
+
+    assert _concurrently(4, lambda: cache.get_or_set("k", slow, 60)) == [42] * 4
+    assert len(calls) == 1
+    assert cache.stats()["shared"] == 3
+
+
+# -----------------------------
+# SqliteTTLCache
+# -----------------------------
+def test_sqlite_cache_round_trip_expiry_and_eviction(tmp_path):
+    cache = SqliteTTLCache(tmp_path / "c.sqlite3", table="t", max_entries=2)
+    cache.set("a", {"lat": 1.5, "names": ["x"]}, ttl_seconds=60)
+    assert cache.get("a") == (True, {"lat": 1.5, "names": ["x"]})
+    cache.set("gone", 1, ttl_seconds=-1)
+    assert cache.get("gone") == (False, None)
+    assert cache.get("missing") == (False, None)
+    cache.set("b", 2, ttl_seconds=60)
+    cache.set("c", 3, ttl_seconds=60)
+    stats = cache.stats()
+    assert stats["entries"] == 2 and stats["evictions"] >= 1
+    assert stats["expired"] == 1 and stats["hits"] == 1
+
+
+def test_sqlite_cache_is_shared_across_instances_and_threads(tmp_path):
+    path = tmp_path / "shared.sqlite3"
+    SqliteTTLCache(path, table="t").set("k", "v", ttl_seconds=60)
+    other = SqliteTTLCache(path, table="t")
+    assert _concurrently(3, lambda: other.get("k")) == [(True, "v")] * 3
+
+
+# -----------------------------
+# plan_ttl_seconds
+# -----------------------------
+TODAY = date(2030, 5, 1)
+MAX_TTL = PLAN_CACHE_MAX_TTL_HOURS * 3600
+
+
+def test_forecast_window_plans_expire_with_the_next_model_update():
+    ttl = plan_ttl_seconds([TODAY.isoformat()], today=TODAY)
+    assert 0 < ttl <= min(MAX_TTL, WEATHER_MODEL_UPDATE_HOURS * 3600)
+
+
+def test_climate_normal_plans_live_until_the_forecast_window():
+    far = (TODAY + timedelta(days=WEATHER_HORIZON_DAYS + 30)).isoformat()
+    assert plan_ttl_seconds([far], today=TODAY) == MAX_TTL
+    just_outside = (TODAY + timedelta(days=WEATHER_HORIZON_DAYS)).isoformat()
+    assert 0 < plan_ttl_seconds([just_outside], today=TODAY) <= min(MAX_TTL, 86400)
+
+
+def test_plan_ttl_edge_cases():
+    assert plan_ttl_seconds(["2000-01-01"], today=TODAY) == MAX_TTL          # past trip
+    assert 0 < plan_ttl_seconds([], today=TODAY) <= WEATHER_MODEL_UPDATE_HOURS * 3600
+    mixed = [TODAY.isoformat(), (TODAY + timedelta(days=200)).isoformat()]
+    assert plan_ttl_seconds(mixed, today=TODAY) <= WEATHER_MODEL_UPDATE_HOURS * 3600
@@ -0,0 +1,63 @@
+# tests/test_cache_isolation.py
+import os
+import sqlite3
+import subprocess
+import sys
+import textwrap
+from pathlib import Path
+
+import pytest
+
+from src.offline.standins import StandIns
+
+ROOT = Path(__file__).resolve().parents[1]
+
+# Runs in a fresh interpreter: src/config.py reads the base URLs at import time.
+_STANDIN_RUN = textwrap.dedent("""
+    from src.agent.plan_cache import store_plan, trip_cache_key
+    from src.config import UPSTREAM_CACHE_SUFFIX
+    from src.models import CityStop
+    from src.tools.google_places import resolve_city_to_latlng, resolve_place_address
+
+    assert resolve_city_to_latlng("Paris")["lat"] is not None
+    resolve_place_address("Paris", "Louvre")
+    stops = [CityStop(city="Paris", date="2099-01-01", activities=["Louvre 10:00-12:00"])]
+    store_plan(trip_cache_key(stops), {"cities": [{"city": "Paris"}]}, ["2099-01-01"])
+    print(UPSTREAM_CACHE_SUFFIX)
+""")
+
+
+def _rows(path: Path, table: str) -> int:
+    if not path.exists():
+        return 0
+    with sqlite3.connect(path) as conn:
+        return conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+
+def _run(env_extra, cache_dir: Path) -> str:
+    env = dict(os.environ, PYTHONPATH=str(ROOT), CACHE_DIR=str(cache_dir), **env_extra)
+    proc = subprocess.run(
+        [sys.executable, "-c", _STANDIN_RUN], cwd=ROOT, env=env, capture_output=True, text=True, timeout=60
+    )
+    assert proc.returncode == 0, proc.stderr[-2000:]
+    return proc.stdout.strip()
+
+
+def test_default_upstreams_use_the_plain_cache_files():
+    from src import config
+
+    if any(os.environ.get(v) for v in ("GOOGLE_PLACES_BASE_URL", "GOOGLE_AIR_QUALITY_BASE_URL", "OPEN_METEO_BASE_URL")):
+        pytest.skip("base URLs overridden in this environment")
+    assert config.UPSTREAM_CACHE_SUFFIX == ""
+
+
+def test_standin_run_leaves_no_rows_in_the_real_cache(tmp_path):
+    with StandIns() as standins:
+        suffix = _run(standins.env(), tmp_path)
+
+    assert suffix.startswith("-")
+    assert _rows(tmp_path / "geocode.sqlite3", "geocode") == 0
+    assert _rows(tmp_path / "plans.sqlite3", "plans") == 0
+    # The stand-in results went to their own files instead.
+    assert _rows(tmp_path / f"geocode{suffix}.sqlite3", "geocode") == 2
+    assert _rows(tmp_path / f"plans{suffix}.sqlite3", "plans") == 1
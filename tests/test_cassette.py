@@ -0,0 +1,51 @@
+# tests/test_cassette.py
+import json
+from datetime import date
+
+import pytest
+import requests
+
+from src.offline.cassette import CassetteMiss, reference_date, use_cassette
+from src.tools.google_weather import in_forecast_window
+
+
+@pytest.fixture(autouse=True)
+def _cassette_off():
+    yield
+    use_cassette(None, "off")
+
+
+def _response(body: str) -> requests.Response:
+    resp = requests.Response()
+    resp.status_code = 200
+    resp._content = body.encode("utf-8")
+    resp.headers["Content-Type"] = "application/json"
+    return resp
+
+
+def test_replay_answers_recorded_requests_only(tmp_path):
+    path = tmp_path / "c.json"
+    recorder = use_cassette(path, "record")
+    recorder.record_http("GET", "http://a/v1/forecast", {"params": {"x": 1}}, _response('{"ok": true}'), 0.01)
+
+    player = use_cassette(path, "replay")
+    assert player.replay_http("GET", "http://b/v1/forecast", {"params": {"x": 1}}).json() == {"ok": True}
+    with pytest.raises(CassetteMiss):
+        player.replay_http("GET", "http://b/v1/forecast", {"params": {"x": 2}})
+
+
+def test_replay_pins_today_to_the_recording_date(tmp_path):
+    path = tmp_path / "c.json"
+    recorder = use_cassette(path, "record")
+    recorder.today = date(2030, 1, 1)  # as if recorded on another day
+    recorder.record_http("GET", "http://a/v1/forecast", {}, _response("{}"), 0.01)
+    assert json.loads(path.read_text())["today"] == "2030-01-01"
+    assert reference_date() == date.today()  # recording itself runs on the real date
+
+    use_cassette(path, "replay")
+    assert reference_date() == date(2030, 1, 1)
+    assert in_forecast_window("2030-01-05")
+    assert not in_forecast_window(date.today().isoformat())
+
+    use_cassette(None, "off")
+    assert reference_date() == date.today()
@@ -0,0 +1,92 @@
+# tests/test_compaction.py
+import json
+
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+
+from src.agent.compaction import _group_by_city, _settled, compact_messages, compaction_hook
+
+DATE = "2030-05-01"
+
+
+def _ai(*calls):
+    return AIMessage(content="", tool_calls=[{"name": n, "args": a, "id": i} for n, a, i in calls])
+
+
+def _tool(call_id, payload):
+    return ToolMessage(content=json.dumps(payload), tool_call_id=call_id)
+
+
+def _city_steps(name, lat, lng, prefix):
+    """The two tool-calling steps the agent makes for one city, with results."""
+    return [
+        _ai(("city_latlng", {"city": name}, f"{prefix}1"),
+            ("place_addresses", {"city": name, "place_names": ["Museum"]}, f"{prefix}2")),
+        _tool(f"{prefix}1", {"city": name, "lat": lat, "lng": lng}),
+        _tool(f"{prefix}2", {"city": name, "places": [{"place_name": "Museum", "formatted_address": f"1 Main St, {name}"}]}),
+        _ai(("weather", {"lat": lat, "lng": lng, "target_date": DATE}, f"{prefix}3"),
+            ("air_quality", {"lat": lat, "lng": lng}, f"{prefix}4")),
+        _tool(f"{prefix}3", {"weather_line": "Mild", "umbrella": "No", "clothes": "Layers", "risk": {"weather_risk": 2}}),
+        _tool(f"{prefix}4", {"aqi": 40, "category": "Good", "mask_needed": False, "risk": {"air_quality_risk": 2}}),
+    ]
+
+
+def _contents(messages):
+    return [m.content for m in messages if isinstance(m, ToolMessage)]
+
+
+def test_finished_city_is_replaced_by_one_digest():
+    messages = [HumanMessage("plan")] + _city_steps("Toronto", 43.65, -79.38, "t") + \
+        [_ai(("city_latlng", {"city": "Tokyo"}, "k1")), _tool("k1", {"city": "Tokyo", "lat": 35.68, "lng": 139.69})]
+    out = compact_messages(messages)
+
+    toronto = _contents(out)[:4]
+    assert toronto[:3] == ["(in Toronto digest)"] * 3
+    digest = toronto[3]
+    assert digest.startswith("Toronto (settled) | lat/lng: 43.65, -79.38")
+    assert "Museum = 1 Main St, Toronto" in digest
+    assert f"weather {DATE}: Mild; umbrella No" in digest
+    assert "UAQI 40 (Good), no mask needed" in digest
+    # the city still being worked on is untouched, and so is the graph state
+    assert _contents(out)[4] == messages[-1].content
+    assert [m.tool_call_id for m in out if isinstance(m, ToolMessage)] == \
+        [m.tool_call_id for m in messages if isinstance(m, ToolMessage)]
+    assert messages[2].content.startswith("{")
+
+
+def test_city_with_missing_results_is_not_settled():
+    # Toronto only has its coordinates when the agent moves on to Tokyo.
+    messages = [HumanMessage("plan"),
+                _ai(("city_latlng", {"city": "Toronto"}, "t1")), _tool("t1", {"city": "Toronto", "lat": 43.65, "lng": -79.38}),
+                _ai(("city_latlng", {"city": "Tokyo"}, "k1")), _tool("k1", {"city": "Tokyo", "lat": 35.68, "lng": 139.69})]
+    assert compact_messages(messages) == messages
+
+
+def test_failed_result_does_not_count_towards_settled():
+    steps = _city_steps("Toronto", 43.65, -79.38, "t")
+    steps[5] = _tool("t4", {"error": "Air Quality API error 503"})
+    cities, latest = _group_by_city([HumanMessage("plan")] + steps + [_ai(("city_latlng", {"city": "Tokyo"}, "k1"))])
+    assert not _settled(cities["toronto"], latest)
+
+
+def test_city_touched_in_the_latest_step_is_not_settled():
+    messages = [HumanMessage("plan")] + _city_steps("Toronto", 43.65, -79.38, "t")
+    cities, latest = _group_by_city(messages)
+    assert not _settled(cities["toronto"], latest)
+    assert compact_messages(messages) == messages
+
+
+def test_coordinates_matching_no_city_are_not_attributed():
+    # pre-enrichment coordinates (Paris) must not be filed under the city of the step before
+    messages = [HumanMessage("plan"),
+                _ai(("city_latlng", {"city": "Tokyo"}, "k1")), _tool("k1", {"city": "Tokyo", "lat": 35.68, "lng": 139.69}),
+                _ai(("weather", {"lat": 48.85, "lng": 2.35, "target_date": DATE}, "p1")), _tool("p1", {"weather_line": "Paris"})]
+    cities, _ = _group_by_city(messages)
+    assert list(cities) == ["tokyo"]
+    assert [r[0] for r in cities["tokyo"].results] == ["city_latlng"]
+
+
+def test_hook_feeds_the_model_only():
+    messages = [HumanMessage("plan")] + _city_steps("Toronto", 43.65, -79.38, "t") + [_ai(("city_latlng", {"city": "Oslo"}, "o1"))]
+    update = compaction_hook({"messages": messages})
+    assert set(update) == {"llm_input_messages"}
+    assert update["llm_input_messages"] != messages
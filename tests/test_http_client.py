@@ -0,0 +1,16 @@
+# tests/test_http_client.py
+from src.offline.standins import StandIns
+from src.tools import http_client
+
+
+def test_connection_reuse_is_counted_from_the_pool():
+    with StandIns() as standins:
+        url = standins.urls["open_meteo"]
+        http_client.preconnect((url,))
+        for day in ("2030-01-01", "2030-01-02", "2030-01-03"):
+            http_client.get(f"{url}/v1/forecast", params={"latitude": 1, "longitude": 2, "start_date": day})
+        stats = http_client.http_stats()[url.split("://", 1)[1]]
+
+    assert stats["requests"] == 3
+    assert stats["connections_opened"] == 1
+    assert stats["connections_reused"] == 3  # the pre-connect HEAD opened the connection
@@ -0,0 +1,59 @@
+# tests/test_map_reduce.py
+import pytest
+
+from src.agent import map_reduce
+from src.agent.map_reduce import city_block, plan_city, plan_trip_map_reduce
+from src.agent.validation import check_city_block, validate_plan_output
+from src.models import CityStop
+
+from .helpers import FakeAgent, city, reply
+
+STOP = CityStop(city="Paris", date="2030-05-01", activities=["Louvre;10:00-12:00"])
+
+
+@pytest.fixture(autouse=True)
+def _no_summary_llm(monkeypatch):
+    monkeypatch.setattr(map_reduce, "summarize_plan", lambda cities: {"executive_summary": "S", "scope": "Paris"})
+
+
+def test_city_block_repairs_fenced_and_trailing_comma_replies():
+    assert city_block("```json\n" + reply(city()) + "\n```")["city"] == "Paris"
+    assert city_block('{"cities": [{"city": "Paris", "date": "2030-05-01",},]}')["date"] == "2030-05-01"
+
+
+def test_city_block_rejects_replies_without_a_city():
+    with pytest.raises(ValueError):
+        city_block("Sorry, I cannot help with that.")
+    with pytest.raises(ValueError):
+        city_block('{"cities": []}')
+
+
+def test_failed_sub_run_gives_a_placeholder_instead_of_raising():
+    block = plan_city(FakeAgent(RuntimeError("rate limited")), STOP)
+    assert block["city"] == "Paris" and "rate limited" in block["_error"]
+    assert block["schedule"][0]["activity"] == "Louvre"
+
+
+def test_one_failed_city_does_not_fail_the_trip():
+    tokyo = CityStop(city="Tokyo", date="2030-05-03", activities=[])
+
+    def answer(messages):
+        if "Tokyo" in messages[-1].content:
+            raise TimeoutError("upstream timeout")
+        return reply(city())
+
+    plan = plan_trip_map_reduce(FakeAgent(answer), [STOP, tokyo])
+    assert [c["city"] for c in plan["cities"]] == ["Paris", "Tokyo"]
+    assert "_error" not in plan["cities"][0]
+    assert "upstream timeout" in plan["cities"][1]["_error"]
+
+
+def test_placeholders_are_invalid_and_get_regenerated():
+    placeholder = map_reduce._unavailable_block(STOP, "City plan could not be generated: boom")
+    errors, _ = check_city_block(placeholder)
+    assert errors and errors[0].startswith("placeholder")
+
+    raw = reply(placeholder)
+    plan, report = validate_plan_output(raw, "Trip Planner", agent=FakeAgent(reply(city())), stops=[STOP])
+    assert report["regenerated"] == [0]
+    assert "_error" not in plan["cities"][0]
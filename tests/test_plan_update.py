@@ -0,0 +1,96 @@
+# tests/test_plan_update.py
+import pytest
+
+from src.agent import plan_update
+from src.agent.plan_update import affected_city_indexes, apply_patch, plan_update_delta
+from src.agent.prompts import CITY_UPDATE_SYSTEM_MESSAGE, SYSTEM_MESSAGE
+from src.agent.single_agent import _AgentWithSystemMessage
+
+from .helpers import FakeAgent, city, reply
+
+PLAN = {
+    "executive_summary": "Old summary",
+    "scope": "Toronto; Tokyo",
+    "cities": [
+        city("Toronto", "2030-05-01", schedule=[{"start": "09:00", "end": "10:00", "activity": "CN Tower", "address": "x"}]),
+        city("Tokyo", "2030-05-05", schedule=[{"start": "09:00", "end": "10:00", "activity": "Senso-ji", "address": "y"}]),
+    ],
+}
+
+
+@pytest.fixture(autouse=True)
+def _no_summary_llm(monkeypatch):
+    monkeypatch.setattr(plan_update, "summarize_plan",
+                        lambda cities: {"executive_summary": "New summary", "scope": "; ".join(c["city"] for c in cities)})
+
+
+@pytest.mark.parametrize("request_text, expected", [
+    ("Move the CN Tower visit to 3pm", [0]),
+    ("Add a dinner in Toronto", [0]),
+    ("Replace Senso-ji with Meiji Shrine", [1]),
+    ("Skip the CN Tower visit", [0]),
+    ("Change the plan for 2030-05-05", [1]),
+    ("Swap the CN Tower and Senso-ji times", []),   # reorder
+    ("Remove Toronto from the trip", []),
+    ("Add Chicago after Toronto", []),
+    ("Drop Tokyo", []),
+    ("Add another city before Tokyo", []),
+    ("Make every day more relaxed", []),             # trip-wide
+    ("Rewrite the summary", []),
+    ("Something nice please", []),                  # names nothing
+])
+def test_routing(request_text, expected):
+    assert affected_city_indexes(PLAN, request_text) == expected
+
+
+def test_apply_patch_replaces_only_the_given_blocks():
+    new = city("Tokyo", "2030-05-06")
+    patched = apply_patch(PLAN, [{"op": "replace", "path": "/cities/1", "value": new}])
+    assert patched["cities"][1] is new
+    assert patched["cities"][0] is PLAN["cities"][0]
+    assert PLAN["cities"][1]["date"] == "2030-05-05"  # input not modified
+
+
+@pytest.mark.parametrize("op", [
+    {"op": "add", "path": "/cities/1", "value": {}},
+    {"op": "replace", "path": "/scope", "value": ""},
+])
+def test_apply_patch_rejects_other_ops(op):
+    with pytest.raises(ValueError):
+        apply_patch(PLAN, [op])
+
+
+def test_delta_patches_one_city_and_refreshes_the_summary():
+    moved = city("Toronto", "2030-05-01", schedule=[{"start": "15:00", "end": "16:00", "activity": "CN Tower", "address": "x"}])
+    delta = plan_update_delta(FakeAgent(reply(moved)), PLAN, "Move the CN Tower visit to 3pm")
+    assert delta["patch"] == [{"op": "replace", "path": "/cities/0", "value": moved}]
+    assert delta["plan"]["cities"][1] is PLAN["cities"][1]
+    assert delta["plan"]["executive_summary"] == "New summary"
+
+
+def test_city_update_runs_under_the_update_system_prompt():
+    seen = []
+    inner = FakeAgent(lambda messages: seen.extend(messages) or reply(PLAN["cities"][0]))
+    plan_update_delta(_AgentWithSystemMessage(inner, SYSTEM_MESSAGE), PLAN, "Move the CN Tower visit to 3pm")
+    assert [m.type for m in seen] == ["system", "human"]
+    assert seen[0].content == CITY_UPDATE_SYSTEM_MESSAGE
+
+
+def test_unchanged_block_gives_an_empty_patch():
+    delta = plan_update_delta(FakeAgent(reply(PLAN["cities"][0])), PLAN, "Move the CN Tower visit to 3pm")
+    assert delta["patch"] == []
+    assert delta["plan"]["executive_summary"] == "Old summary"
+
+
+@pytest.mark.parametrize("agent", [
+    FakeAgent(reply({"city": "Toronto"})),      # invalid block
+    FakeAgent(RuntimeError("rate limited")),    # failed sub-run
+])
+def test_delta_falls_back_to_the_full_update(agent):
+    assert plan_update_delta(agent, PLAN, "Move the CN Tower visit to 3pm") is None
+
+
+def test_structural_request_never_runs_the_agent():
+    agent = FakeAgent(AssertionError("must not run"))
+    assert plan_update_delta(agent, PLAN, "Remove Toronto from the trip") is None
+    assert agent.prompts == []
@@ -0,0 +1,80 @@
+# tests/test_risk_score.py
+import array
+import math
+
+import pytest
+
+from src.risk.risk_score import (
+    _column_max,
+    compute_risk_score,
+    compute_risk_score_pairs,
+    score_weather_batch,
+    score_weather_pairs,
+)
+from src.tools.google_weather import _index_by_date
+
+NAN = float("nan")
+
+
+def _payload(days, probs, winds):
+    times = [f"{day}T{h:02d}:00" for day in days for h in range(24)]
+    assert len(times) == len(probs) == len(winds)
+    return {
+        "hourly": {"time": times, "precipitation_probability": probs, "wind_speed_10m": winds},
+        "_date_index": _index_by_date(times),
+    }
+
+
+def test_column_max_skips_nulls_and_nan():
+    assert _column_max([None]) == 0
+    assert _column_max([]) == 0
+    assert _column_max([NAN, NAN]) == 0
+    assert _column_max([None, 30, NAN, 70, None]) == 70
+    assert _column_max([NAN, 10, NAN]) == 10  # NaN first would otherwise poison max()
+    assert _column_max(array.array("d", [NAN, 5.0, 2.0])) == 5.0
+
+
+def test_column_max_on_numpy_columns():
+    np = pytest.importorskip("numpy")
+    col = np.array([np.nan, 40.0, np.nan, 55.0])
+    assert _column_max(col) == 55.0
+    assert _column_max(col[:1]) == 0
+
+
+def test_null_heavy_day_scores_only_its_readings():
+    # day 1: all nulls except one hour; day 2: entirely null
+    probs = [None] * 23 + [80] + [None] * 24
+    winds = [None] * 48
+    wx = _payload(["2030-05-01", "2030-05-02"], probs, winds)
+    assert score_weather_batch(wx, ["2030-05-01", "2030-05-02"]) == [8, 0]
+
+
+def test_nan_heavy_day_is_not_poisoned():
+    probs = [NAN] * 12 + [50] + [NAN] * 11
+    winds = [NAN] * 23 + [40.0]
+    wx = _payload(["2030-05-01"], probs, winds)
+    assert score_weather_batch(wx, ["2030-05-01"]) == [5 + 2]
+
+
+def test_each_date_reads_only_its_own_hours():
+    probs = [0] * 24 + [100] * 24
+    winds = [0.0] * 48
+    wx = _payload(["2030-05-01", "2030-05-02"], probs, winds)
+    assert score_weather_batch(wx, ["2030-05-01", "2030-05-02", "2030-05-03", None]) == [0, 10, 0, 10]
+
+
+def test_pairs_across_payloads_and_bad_entries():
+    dry = _payload(["2030-05-01"], [10] * 24, [5.0] * 24)
+    wet = _payload(["2030-05-01"], [90] * 24, [55.0] * 24)
+    broken = {"hourly": {"precipitation_probability": 42}}  # not a column
+    pairs = [(dry, "2030-05-01"), (wet, "2030-05-01"), (broken, None), (None, "2030-05-01"), (wet, "bad-date")]
+    assert score_weather_pairs(pairs) == [1, 10, 0, 0, 0]
+
+
+def test_pairs_match_single_scores():
+    aq = {"indexes": [{"code": "uaqi", "aqi": 120}]}
+    wx = _payload(["2030-05-01", "2030-05-02"], [20] * 24 + [60] * 24, [30.0] * 48)
+    items = [(wx, aq, "2030-05-01"), (wx, None, "2030-05-02")]
+    assert compute_risk_score_pairs(items) == [compute_risk_score(w, a, d) for w, a, d in items]
+    assert compute_risk_score_pairs(items)[0] == {"weather_risk": 3, "air_quality_risk": 7, "overall_risk": 7}
+    assert not any(math.isnan(v) for r in compute_risk_score_pairs(items) for v in r.values())
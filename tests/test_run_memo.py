@@ -0,0 +1,72 @@
+# tests/test_run_memo.py
+import src.agent.single_agent as single_agent
+from src.agent.run_memo import memoized, run_scope
+
+
+def _counting(payloads):
+    calls = []
+
+    def fn():
+        calls.append(1)
+        return payloads[min(len(calls), len(payloads)) - 1]
+
+    return fn, calls
+
+
+def test_successful_payload_is_replayed_within_a_run():
+    fn, calls = _counting([{"city": "Paris", "lat": 48.85, "lng": 2.35}])
+    with run_scope() as memo:
+        first = memoized("city_latlng", {"city": "Paris"}, fn)
+        second = memoized("city_latlng", {"city": "Paris"}, fn)
+    assert first == second
+    assert len(calls) == 1
+    assert memo.stats()["repeats"] == 1
+
+
+def test_failed_payload_is_not_memoized():
+    fn, calls = _counting([{"city": "Paris", "lat": None, "lng": None, "_error": "No city location found"},
+                           {"city": "Paris", "lat": 48.85, "lng": 2.35}])
+    with run_scope():
+        first = memoized("city_latlng", {"city": "Paris"}, fn)
+        second = memoized("city_latlng", {"city": "Paris"}, fn)
+    assert first["_error"]
+    assert second["lat"] == 48.85
+    assert len(calls) == 2
+
+
+def test_memo_does_not_outlive_the_run():
+    fn, calls = _counting([{"ok": True}])
+    with run_scope():
+        memoized("t", {}, fn)
+    with run_scope():
+        memoized("t", {}, fn)
+    memoized("t", {}, fn)  # no run: plain call
+    assert len(calls) == 3
+
+
+def test_places_failure_shapes_are_flagged(monkeypatch):
+    # city_latlng: upstream error -> lat/lng null
+    monkeypatch.setattr(single_agent, "resolve_city_to_latlng",
+                        lambda city: {"_error": True, "status_code": 503, "body": "unavailable"})
+    payload = single_agent.city_latlng_payload("Paris")
+    assert payload["lat"] is None and payload["_error"]
+
+    # place lookup: no error key upstream but an empty address
+    monkeypatch.setattr(single_agent, "resolve_place_addresses", lambda city, names: [
+        {"place_name": "Louvre", "formatted_address": "Rue de Rivoli, Paris"},
+        {"place_name": "Nowhere", "formatted_address": None},
+    ])
+    payload = single_agent.place_addresses_payload("Paris", ["Louvre", "Nowhere"])
+    assert payload["_error"] == "1 of 2 addresses not resolved"
+    assert "_error" not in payload["places"][0] and payload["places"][1]["_error"]
+
+
+def test_failed_lookup_is_retried_by_the_tool(monkeypatch):
+    answers = [{"_error": True, "status_code": 503}, {"city": "Paris", "lat": 48.85, "lng": 2.35}]
+    monkeypatch.setattr(single_agent, "resolve_city_to_latlng", lambda city: answers.pop(0))
+    with run_scope():
+        first = single_agent.tool_city_latlng.invoke({"city": "Paris"})
+        second = single_agent.tool_city_latlng.invoke({"city": "Paris"})
+    assert '"error"' in first
+    assert '"lat":48.85' in second
+    assert answers == []
@@ -0,0 +1,48 @@
+# tests/test_streaming.py
+import json
+
+from src.agent.streaming import CityBlockScanner
+
+from .helpers import city
+
+PLAN = json.dumps({
+    "executive_summary": 'Mentions "cities": [ and braces { } inside a string',
+    "cities": [city(), city("Lyon", "2030-05-02", packing=["Scarf {wool}", "Umbrella ]"])],
+    "scope": "Paris; Lyon",
+})
+
+
+def _feed_in_chunks(text, size):
+    scanner = CityBlockScanner()
+    seen = []
+    for i in range(0, len(text), size):
+        for block in scanner.feed(text[i:i + size]):
+            seen.append((i + size, block))
+    return scanner, seen
+
+
+def test_blocks_are_emitted_as_soon_as_they_close():
+    scanner, seen = _feed_in_chunks(PLAN, 1)
+    assert [b for _, b in seen] == json.loads(PLAN)["cities"]
+    first_closed_at = PLAN.index(json.dumps(city())) + len(json.dumps(city()))
+    assert seen[0][0] == first_closed_at
+    assert scanner.count == 2
+
+
+def test_chunk_size_does_not_matter():
+    for size in (2, 7, 64, len(PLAN)):
+        _, seen = _feed_in_chunks(PLAN, size)
+        assert [b["city"] for _, b in seen] == ["Paris", "Lyon"]
+
+
+def test_fenced_output_and_text_after_the_array():
+    scanner = CityBlockScanner()
+    blocks = scanner.feed("```json\n" + PLAN + "\n```")
+    assert [b["city"] for b in blocks] == ["Paris", "Lyon"]
+    assert scanner.feed('{"cities": [{"city": "Ignored"}]}') == []
+
+
+def test_nothing_before_the_cities_key():
+    scanner = CityBlockScanner()
+    assert scanner.feed('{"executive_summary": "S", ') == []
+    assert scanner.feed('"cities": [{"city": "Paris"}') == [{"city": "Paris"}]
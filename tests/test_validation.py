@@ -0,0 +1,149 @@
+# tests/test_validation.py
+import json
+
+import pytest
+
+from src.agent import validation
+from src.agent.validation import check_city_block, check_explorer_plan, repair_json_text, validate_plan_output
+from src.models import CityStop
+
+from .helpers import FakeAgent, city, reply
+
+
+@pytest.fixture(autouse=True)
+def _no_summary_llm(monkeypatch):
+    monkeypatch.setattr(validation, "summarize_plan", lambda cities: {"executive_summary": "Summary", "scope": "Scope"})
+
+
+# -----------------------------
+# repair_json_text
+# -----------------------------
+@pytest.mark.parametrize("raw, expected, repairs", [
+    ('{"a": 1}', {"a": 1}, []),
+    ('```json\n{"a": 1}\n```', {"a": 1}, ["fences"]),
+    ('Here is the plan: {"a": 1}', {"a": 1}, ["leading_text"]),
+    ('{"a": 1} Let me know!', {"a": 1}, ["trailing_text"]),
+    ('{"a": [1, 2,], "b": {"c": 3,},}', {"a": [1, 2], "b": {"c": 3}}, ["trailing_commas"]),
+    ('{"a": 1}}', {"a": 1}, ["unmatched_brackets"]),
+    ('{"a": "x", "b": "unterminated', {"a": "x", "b": "unterminated"}, ["truncated"]),
+    ('{"a": [1, 2', {"a": [1, 2]}, ["truncated"]),
+    ('{"a": tr', {}, ["truncated"]),
+    ('{"a": 1, "b": tr', {"a": 1}, ["truncated"]),
+    ('{"a": "comma, and } brace in a string",}', {"a": "comma, and } brace in a string"}, ["trailing_commas"]),
+    ('{"a": "escaped \\" quote", "b": [', {"a": 'escaped " quote', "b": []}, ["truncated"]),
+])
+def test_repair_json_text(raw, expected, repairs):
+    obj, done = repair_json_text(raw)
+    assert obj == expected
+    assert done == repairs
+
+
+@pytest.mark.parametrize("raw", ["", "no json here", None])
+def test_repair_json_text_gives_up_on_non_json(raw):
+    assert repair_json_text(raw) == (None, [])
+
+
+def test_repair_keeps_complete_cities_of_a_truncated_plan():
+    full = json.dumps({"executive_summary": "S", "cities": [city(), city("Lyon", "2030-05-02")]})
+    obj, repairs = repair_json_text(full[: full.index('"Lyon"') + 20])
+    assert repairs == ["truncated"]
+    assert obj["cities"][0] == city()
+    assert obj["cities"][1]["city"] == "Lyon"
+
+
+# -----------------------------
+# check_city_block
+# -----------------------------
+def test_check_city_block_accepts_a_valid_block():
+    assert check_city_block(city()) == ([], 0)
+
+
+def test_check_city_block_normalizes_fixable_values():
+    block = city(risk={"weather_risk": "3", "air_quality_risk": 4.6, "overall_risk": 12},
+                 insights={"weather": "Mild", "umbrella": "yes", "air_quality": "Good"})
+    errors, coerced = check_city_block(block)
+    assert errors == []
+    assert coerced == 4
+    assert block["risk"] == {"weather_risk": 3, "air_quality_risk": 5, "overall_risk": 10}
+    assert block["insights"]["umbrella"] == "Yes"
+
+
+@pytest.mark.parametrize("overrides, error", [
+    ({"city": " "}, "city missing"),
+    ({"date": "May 1"}, "date is not YYYY-MM-DD"),
+    ({"schedule": "10:00 Louvre"}, "schedule is not a list"),
+    ({"schedule": [{"start": "10:00"}]}, "schedule[0].activity missing"),
+    ({"schedule": [{"activity": "Louvre", "start": 10}]}, "schedule[0] has non-string fields"),
+    ({"insights": {"weather": "Mild"}}, "insights incomplete"),
+    ({"risk": {"weather_risk": True, "air_quality_risk": 1, "overall_risk": 1}}, "risk is not three integers 0-10"),
+    ({"risk": {"weather_risk": "high", "air_quality_risk": 1, "overall_risk": 1}}, "risk is not three integers 0-10"),
+    ({"packing": "shoes"}, "packing is not a list of strings"),
+    ({"_error": "sub-run failed"}, "placeholder: sub-run failed"),
+])
+def test_check_city_block_reports_problems(overrides, error):
+    errors, _ = check_city_block(city(**overrides))
+    assert error in errors
+
+
+def test_check_city_block_rejects_non_objects():
+    assert check_city_block(["Paris"]) == (["not an object"], 0)
+
+
+def test_check_explorer_plan():
+    plan = {"city": "Paris", "date": "", "summary": "S", "weather": "W", "air_quality": "A",
+            "schedule": [{"activity": "Louvre", "start": "10:00", "end": "12:00"}], "tips": [], "packing": []}
+    assert check_explorer_plan(plan) == []
+    assert "summary missing" in check_explorer_plan({**plan, "summary": None})
+
+
+# -----------------------------
+# validate_plan_output
+# -----------------------------
+def _plan(*blocks, **fields):
+    return json.dumps({"executive_summary": "S", "scope": "Paris", "cities": list(blocks), **fields})
+
+
+def test_valid_plan_passes_untouched():
+    agent = FakeAgent(AssertionError("must not regenerate"))
+    plan, report = validate_plan_output(_plan(city()), "Trip Planner", agent=agent)
+    assert plan["cities"] == [city()]
+    assert report == {"repairs": [], "errors": {}, "regenerated": [], "coerced": 0}
+    assert agent.prompts == []
+
+
+def test_only_the_invalid_city_is_regenerated():
+    stops = [CityStop("Paris", "2030-05-01", ["Louvre;10:00-12:00"]), CityStop("Lyon", "2030-05-02", [])]
+    broken = city("Lyon", "2030-05-02", insights=None)
+    agent = FakeAgent(reply(city("Lyon", "2030-05-02")))
+    plan, report = validate_plan_output(_plan(city(), broken), "Trip Planner", agent=agent, stops=stops)
+    assert report["regenerated"] == [1]
+    assert len(agent.prompts) == 1 and "Lyon" in agent.prompts[0]
+    assert plan["cities"][0] == city()
+    assert plan["cities"][1]["insights"]["weather"] == "Mild"
+
+
+def test_missing_cities_are_planned_from_the_stops():
+    stops = [CityStop("Paris", "2030-05-01", []), CityStop("Lyon", "2030-05-02", [])]
+    agent = FakeAgent(reply(city("Lyon", "2030-05-02")))
+    plan, report = validate_plan_output(_plan(city()), "Trip Planner", agent=agent, stops=stops)
+    assert report["errors"]["cities"] == ["1 of 2 cities missing"]
+    assert [c["city"] for c in plan["cities"]] == ["Paris", "Lyon"]
+
+
+def test_broken_json_and_missing_summary_are_fixed_locally():
+    raw = "```json\n" + json.dumps({"cities": [city()]})[:-1] + ",}\n```"
+    plan, report = validate_plan_output(raw, "Trip Planner")
+    assert report["repairs"] == ["fences", "trailing_commas"]
+    assert plan["executive_summary"] == "Summary" and plan["scope"] == "Scope"
+    assert report["errors"]["plan"] == ["executive_summary missing", "scope missing"]
+
+
+def test_unusable_output_returns_none():
+    plan, report = validate_plan_output("I could not plan this trip.", "Trip Planner")
+    assert plan is None
+
+
+def test_explorer_plans_are_reported_not_regenerated():
+    plan, report = validate_plan_output(json.dumps({"city": "Paris"}), "City Explorer", agent=FakeAgent("{}"))
+    assert plan == {"city": "Paris"}
+    assert "summary missing" in report["errors"]["plan"]